@@ -0,0 +1,272 @@
+import sys
+import time
+import pathlib
+import asyncio
+import serial
+
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools import *
+from ioloop import build_gga, check_ntrip_response, LogWriter
+from user_program_config import debug_print, IO_LOOP_POLL_SECONDS, ASYNC_QUEUE_SIZE, \
+    NTRIP_TIMEOUT_SECONDS, NTRIP_RETRY_SECONDS, NTRIP_READ_INTERVAL_SECONDS, NTRIP_MAX_BYTES_PER_INTERVAL, \
+    NTRIP_MAX_BYTES_PER_WRITE, NTRIP_GGA_PERIOD_SECONDS, ODOMETER_SEND_RATE_HZ
+
+# asyncio version of io_loop for scripts without the UI: one coroutine per stream, all units on one event loop.
+# streams are joined by bounded asyncio.Queues: when a consumer falls behind, its producer waits on put()
+# (and stops reading its socket, so TCP pushes back on the caster) instead of buffering without limit.
+#
+# per unit:  data port -> read_data -> data_queue -> handle_data (log, parse, keep last GPS for GGA)
+#            caster -> run_ntrip (+ GGA upload) -> correction_queue -> write_corrections -> data port
+#            odometer_queue -> send_odometer -> unit
+
+
+# serial data port. waits for the fd to be readable on the event loop, or polls where pyserial has no fileno (Windows)
+class AsyncSerialPort:
+    def __init__(self, port_name, baud):
+        self.connection = SerialConnection(port_name, baud)
+        self.fd = self.connection.fileno()
+
+    def __repr__(self):
+        return "AsyncSerialPort: "+str(self.connection)
+
+    async def start(self):
+        pass
+
+    # wait for data and return all of it
+    async def read(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.fd is None:
+                await asyncio.sleep(IO_LOOP_POLL_SECONDS)
+            else:
+                # only watch the fd while waiting, so unread data doesn't wake the loop while read_data waits on the queue
+                readable = loop.create_future()
+                loop.add_reader(self.fd, lambda: readable.done() or readable.set_result(None))
+                try:
+                    await readable
+                finally:
+                    loop.remove_reader(self.fd)
+            if self.connection.read_ready():
+                return self.connection.readall()
+            if self.fd is not None:
+                # readable with nothing to read: unplugged
+                raise serial.SerialException("data port readable but has no data")
+
+    # pyserial writes block until the data is sent, so they run in the default executor instead of on the loop
+    async def write(self, data):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.connection.write, data)
+
+    def close(self):
+        self.connection.close()
+
+
+# UDP data port on the unit's data socket. UDP can't push back on the unit, so datagrams that don't fit are dropped
+class AsyncUDPPort(asyncio.DatagramProtocol):
+    def __init__(self, remote_ip, local_port):
+        self.addr = (remote_ip, UDP_LOCAL_DATA_PORT)
+        self.local_port = local_port
+        self.datagrams = asyncio.Queue(ASYNC_QUEUE_SIZE)
+        self.transport = None
+        self.dropped_bytes = 0
+
+    def __repr__(self):
+        return f"AsyncUDPPort: {self.addr[0]} on local port {self.local_port}"
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self.transport, protocol = await loop.create_datagram_endpoint(lambda: self, local_addr=('0.0.0.0', self.local_port))
+
+    def datagram_received(self, data, addr):
+        try:
+            self.datagrams.put_nowait(data)
+        except asyncio.QueueFull:
+            self.dropped_bytes += len(data)
+
+    def error_received(self, exc):
+        debug_print(f"{self} error: {exc}")
+
+    # wait for a datagram, then join it with any others already waiting
+    async def read(self):
+        chunks = [await self.datagrams.get()]
+        while not self.datagrams.empty():
+            chunks.append(self.datagrams.get_nowait())
+        return b''.join(chunks)
+
+    # sendto doesn't block: the transport buffers it
+    async def write(self, data):
+        self.transport.sendto(data, self.addr)
+
+    def close(self):
+        if self.transport:
+            self.transport.close()
+
+
+# all streams of one unit. ntrip is (caster ip, port, request bytes, send gga), like the io_loop ntrip_ip/port/req/gga.
+# send_odometer(speed) sends one odometer message, eg IMUBoard.send_odometer. put speeds in odometer_queue to send them.
+# it runs in the default executor, since it can block on a serial write.
+# on_message(message) is called with each valid parsed message. default_gps is used for GGA until the unit sends GPS.
+# make it and its data port inside the running event loop: on Python 3.9 an asyncio.Queue binds to the loop it's made in.
+class AsyncUnitEngine:
+    def __init__(self, data_port, name="", log_name=None, ntrip=None, send_odometer=None, on_message=None, default_gps=None):
+        self.data_port = data_port
+        self.name = name or str(data_port)
+        self.log_name = log_name
+        self.ntrip = ntrip
+        self.send_odometer_function = send_odometer
+        self.on_message = on_message
+        self.last_gps = default_gps
+
+        self.data_queue = asyncio.Queue(ASYNC_QUEUE_SIZE)
+        self.correction_queue = asyncio.Queue(ASYNC_QUEUE_SIZE)
+        self.odometer_queue = asyncio.Queue(ASYNC_QUEUE_SIZE)
+        self.frame_schemes = {FRAME_ASCII: ReadableScheme(), FRAME_RTCM: RTCM_Scheme(), FRAME_BINARY: Binary_Scheme()}
+        self.message_framer = MessageFramer()
+        self.log_file = None
+        self.ntrip_on = False
+
+        # counts for status output
+        self.bytes_read = 0
+        self.message_count = 0
+        self.ntrip_bytes = 0
+        self.ntrip_bytes_dropped = 0
+        self.odometer_count = 0
+
+    # run until the data port fails or the task running this is cancelled. any error stops only this unit
+    async def run(self):
+        tasks = []
+        try:
+            await self.data_port.start()
+            if self.log_name:
+                self.log_file = LogWriter(self.log_name)
+            coroutines = [self.read_data(), self.handle_data()]
+            if self.ntrip:
+                coroutines += [self.run_ntrip(), self.write_corrections()]
+            if self.send_odometer_function:
+                coroutines.append(self.send_odometer())
+            tasks = [asyncio.create_task(coroutine) for coroutine in coroutines]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()  # raise the error that ended it
+        except (OSError, serial.SerialException) as e:
+            print(f"{self.name} connection error: {e}")
+        except Exception as e:
+            print(f"{self.name} stopped on error: {type(e).__name__}: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.close()
+
+    def close(self):
+        self.data_port.close()
+        if self.log_file:
+            self.log_file.close()  # keeps its dropped_bytes for reports
+
+    async def read_data(self):
+        while True:
+            in_data = await self.data_port.read()
+            self.bytes_read += len(in_data)
+            await self.data_queue.put(in_data)
+
+    async def handle_data(self):
+        while True:
+            in_data = await self.data_queue.get()
+            index_points = [] if self.log_file and self.log_file.index else None
+            chunk_start = self.message_framer.total_bytes()
+            self.message_framer.add_data(in_data)
+            for frame_format, part in self.message_framer.frames():
+                message = self.frame_schemes[frame_format].parse_message(part)
+                if not message.valid:
+                    continue
+                if index_points is not None:
+                    index_points.append((self.message_framer.frame_offset - chunk_start, message))
+                self.message_count += 1
+                if message.msgtype == b'GPS':
+                    self.last_gps = message
+                if self.on_message:
+                    self.on_message(message)
+            if self.log_file:
+                self.log_file.write(in_data, len(in_data) - self.message_framer.remaining_length(), index_points)
+
+    # connect to the caster and queue its data, reconnecting after NTRIP_RETRY_SECONDS if it fails or disconnects
+    async def run_ntrip(self):
+        ip, port, request, send_gga = self.ntrip
+        while True:
+            writer = None
+            gga_task = None
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), NTRIP_TIMEOUT_SECONDS)
+                writer.write(request)
+                await writer.drain()
+                first_resp = await asyncio.wait_for(reader.read(4096), NTRIP_TIMEOUT_SECONDS)
+                debug_print("ntrip response:\n"+first_resp.decode(errors="replace") + "\n")
+                success, errmsg = check_ntrip_response(first_resp)
+                if not success:
+                    print(f"{self.name} ntrip connect failed: {errmsg or 'unknown error'}")
+                else:
+                    self.ntrip_on = True
+                    debug_print(f"{self.name} ntrip connected")
+                    if send_gga:
+                        gga_task = asyncio.create_task(self.send_gga(writer))
+                    while True:
+                        ntrip_data = await reader.read(NTRIP_MAX_BYTES_PER_WRITE)
+                        if not ntrip_data:
+                            debug_print(f"{self.name} ntrip disconnected")
+                            break
+                        await self.correction_queue.put(ntrip_data)
+            except (OSError, asyncio.TimeoutError) as e:
+                print(f"{self.name} ntrip error: {type(e).__name__}: {e}")
+            finally:
+                self.ntrip_on = False
+                if gga_task:
+                    gga_task.cancel()
+                if writer:
+                    writer.close()
+            await asyncio.sleep(NTRIP_RETRY_SECONDS)
+
+    async def send_gga(self, writer):
+        while True:
+            if self.last_gps:
+                try:
+                    writer.write(build_gga(self.last_gps))
+                    await writer.drain()
+                except (ValueError, AttributeError) as e:  # GPS message without the GGA fields
+                    debug_print(f"{self.name} can't build gga: {e}")
+            await asyncio.sleep(NTRIP_GGA_PERIOD_SECONDS)
+
+    # send corrections to the unit in NTRIP_MAX_BYTES_PER_WRITE chunks, dropping any over the per-interval limit
+    async def write_corrections(self):
+        window_start = time.time()
+        window_bytes = 0
+        while True:
+            ntrip_data = await self.correction_queue.get()
+            current_time = time.time()
+            if current_time - window_start >= NTRIP_READ_INTERVAL_SECONDS:
+                window_start = current_time
+                window_bytes = 0
+            window_bytes += len(ntrip_data)
+            if window_bytes > NTRIP_MAX_BYTES_PER_INTERVAL:
+                self.ntrip_bytes_dropped += len(ntrip_data)
+                debug_print(f"{self.name} NTRIP hit limit of {NTRIP_MAX_BYTES_PER_INTERVAL} bytes in {NTRIP_READ_INTERVAL_SECONDS} seconds")
+                continue
+            for i in range(0, len(ntrip_data), NTRIP_MAX_BYTES_PER_WRITE):
+                await self.data_port.write(ntrip_data[i:i+NTRIP_MAX_BYTES_PER_WRITE])
+            self.ntrip_bytes += len(ntrip_data)
+
+    async def send_odometer(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            speed = await self.odometer_queue.get()
+            await loop.run_in_executor(None, self.send_odometer_function, speed)
+            self.odometer_count += 1
+            await asyncio.sleep(1.0 / ODOMETER_SEND_RATE_HZ)
+
+
+# run several units on one event loop until all of them stop. one unit failing doesn't stop the others
+async def run_engines(engines):
+    results = await asyncio.gather(*(engine.run() for engine in engines), return_exceptions=True)
+    for engine, result in zip(engines, results):
+        if isinstance(result, Exception):
+            print(f"{engine.name} stopped on error: {type(result).__name__}: {result}")
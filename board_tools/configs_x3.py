@@ -16,6 +16,7 @@ MENU_OPTIONS_X3 = [
     "Monitor",
     "Save Configs",
     "Firmware Update",
+    "Plot",  # monitor opened on the plot tab
     "Exit"
 ]
 
@@ -75,3 +76,7 @@ EXPORT_IMU_FIELDS = ["imu_time_ms", "sync_time_ms",
                      "fog_angrate_x_dps", "fog_angrate_y_dps", "fog_angrate_z_dps",
                      "mag_x", "mag_y", "mag_z",
                      "temperature_c"]
+
+#__________monitor configs__________:
+# X3 outputs IMU only: plot its rates, no INS
+PLOT_GROUPS_X3 = [group for group in PLOT_GROUPS if group[1] == b'IMU']
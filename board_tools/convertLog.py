@@ -6,14 +6,16 @@ from tools import *
 import os
 from file_picking import pick_one_file, pick_multiple_files
 import json
+import shutil
+from multiprocessing import Pool
 from user_program_config import *
 
 # default value for missing message fields. all empty string for now but can add special cases here.
 def default_value(msgtype, field_name):
     return ""
 
-# formatted point feature to put in csv
-def position_for_csv(msg):
+# point feature for a position message, as a dict for json
+def position_feature(msg):
     lat, lon, props = 0,0, {}
     if msg.msgtype == b'INS' or msg.msgtype == b'IN':
         lat = msg.lat_deg if hasattr(msg, "lat_deg") else default_value(msg.msgtype, "lat_deg")
@@ -32,8 +34,21 @@ def position_for_csv(msg):
             fillColor = EXPORT_DEFAULT_COLOR
         props = {"radius": EXPORT_GPS_RADIUS, "fillColor": fillColor}
     geo_dict = {"type": "Point", "coordinates": [lon, lat]}
-    feature_dict = {"type": "Feature", "geometry": geo_dict, "properties": props}
-    return "\"" + json.dumps(feature_dict).replace("\"", "\"\"") + "\""
+    return {"type": "Feature", "geometry": geo_dict, "properties": props}
+
+
+# formatted point feature to put in csv
+def position_for_csv(msg):
+    return "\"" + json.dumps(position_feature(msg)).replace("\"", "\"\"") + "\""
+
+
+# position_geojson for every row of an exported table (pandas DataFrame or dict of columns), as json strings.
+# parquet exports don't store this column, so make it from lat/lon when needed, eg for Kepler.gl
+def position_geojson_column(table, msgtype):
+    column_names = [name for name in table.keys() if name in EXPORT_ALL_MESSAGES[msgtype]]
+    column_lists = [list(table[name]) for name in column_names]
+    rows = (Message({**dict(zip(column_names, row)), "msgtype": msgtype}) for row in zip(*column_lists))
+    return [json.dumps(position_feature(m)) for m in rows]
 
 
 # format of some field in the csv:
@@ -46,6 +61,84 @@ def format_field(msgtype, var_name, value):
         return str(value)
 
 
+# write decoded columns from decode_binary_file to the csv for that type, returns number of rows written
+def write_columns_to_csv(out_file, msgtype, columns, show_progress=True):
+    num_rows = len(next(iter(columns.values())))
+    column_strings = []
+    for name in EXPORT_ALL_MESSAGES[msgtype]:
+        if name == "position_geojson":
+            # needs the other fields, so make a Message per row. only INS/GPS have this and they are low rate
+            column_names = list(columns)
+            column_lists = [columns[col].tolist() for col in column_names]
+            rows = (Message({**dict(zip(column_names, row)), "msgtype": msgtype}) for row in zip(*column_lists))
+            column_strings.append([position_for_csv(m) for m in rows])
+        elif name in columns:
+            column_strings.append([format_field(msgtype, name, value) for value in columns[name].tolist()])
+        else:
+            column_strings.append([str(default_value(msgtype, name))] * num_rows)
+
+    for row_num, row in enumerate(zip(*column_strings)):
+        if show_progress and row_num % 1000 == 0:
+            print(".", end="", flush=True)
+        out_file.write("\n"+",".join(row))
+    return num_rows
+
+
+# writes one message type to a parquet file: typed columns, one row group per EXPORT_PARQUET_ROW_GROUP_SIZE rows.
+# missing fields are null instead of "". position_geojson is left out, see position_geojson_column.
+class ParquetMessageWriter:
+    def __init__(self, file_path, msgtype):
+        self.name = file_path
+        self.msgtype = msgtype
+        self.fields = [name for name in EXPORT_ALL_MESSAGES[msgtype] if name != "position_geojson"]
+        self.pending = {name: [] for name in self.fields}
+        self.num_pending = 0
+        self.writer = None  # opened on first write so message types not in the log make no file
+
+    def add_message(self, m):
+        for name in self.fields:
+            self.pending[name].append(getattr(m, name, None))
+        self.num_pending += 1
+        if self.num_pending >= EXPORT_PARQUET_ROW_GROUP_SIZE:
+            self.flush()
+
+    # columns from decode_binary_file: already numpy arrays, so write them directly
+    def add_columns(self, columns):
+        import pyarrow as pa
+        self.flush()
+        num_rows = len(next(iter(columns.values())))
+        arrays = [pa.array(columns[name]) if name in columns else pa.nulls(num_rows, pa.float64()) for name in self.fields]
+        self.write_table(pa.Table.from_arrays(arrays, names=self.fields))
+        return num_rows
+
+    def flush(self):
+        import pyarrow as pa
+        if self.num_pending == 0:
+            return
+        arrays = []
+        for name in self.fields:
+            column = pa.array(self.pending[name])
+            if pa.types.is_null(column.type):
+                column = column.cast(pa.float64())  # field missing from all messages so far: assume numeric
+            arrays.append(column)
+        self.write_table(pa.Table.from_arrays(arrays, names=self.fields))
+        self.pending = {name: [] for name in self.fields}
+        self.num_pending = 0
+
+    def write_table(self, table):
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.name, table.schema)
+        elif table.schema != self.writer.schema:
+            table = table.cast(self.writer.schema)  # eg int column in a later batch of a float column
+        self.writer.write_table(table, row_group_size=EXPORT_PARQUET_ROW_GROUP_SIZE)
+
+    def close(self):
+        self.flush()
+        if self.writer:
+            self.writer.close()
+
+
 def export_logs_detect_format():
     default_dir = os.path.join(os.path.dirname(__file__), "../logs")
     file_paths = pick_multiple_files(initialdir=default_dir, title="Select one or multiple logs to convert")
@@ -53,47 +146,195 @@ def export_logs_detect_format():
         print("cancelled")
         return False  # indicates cancel
 
+    logs_and_formats = []
     for file_path in file_paths:
-        if log_is_ascii(file_path):
-            print(f"\nexporting {file_path} (detected ascii format)")
-            if export_log_by_format(file_path, "ascii"):
-                print(f"\nfinished exporting {file_path}")
-        elif log_is_rtcm(file_path):
-            print(f"\nexporting {file_path} (detected rtcm format)")
-            if export_log_by_format(file_path, "rtcm"):
-                print(f"\nfinished exporting {file_path}")
-        elif log_is_binary(file_path):
-            print(f"\nexporting {file_path} (detected binary format)")
-            if export_log_by_format(file_path, "binary"):
-                print(f"\nfinished exporting {file_path}")
-        else:
-            print(f"\ncould not detect format for file: {file_path}")
+        formats, confidence = sniff_log_format(file_path)
+        if len(formats) == 0:
+            print(f"could not detect format for file: {file_path}")
+            continue
+        print(f"{file_path}: detected {formats[0]} format (confidence {confidence:.2f})")
+        if len(formats) > 1:
+            print(f"\tmixed log, also has {', '.join(formats[1:])} messages: exporting {formats[0]} only")
+        logs_and_formats.append((file_path, formats[0]))
+
+    export_logs_parallel(logs_and_formats)
     return True
 
 
-def export_log_by_format(file_path, format="rtcm"):
-    if format == "ascii":
-        parse_scheme = ReadableScheme()
-    elif format == "rtcm":
-        parse_scheme = RTCM_Scheme()
-    elif format == "binary":
-        parse_scheme = Binary_Scheme()
+# export several logs at once in a process pool. logs over EXPORT_CHUNK_BYTES are split at message boundaries,
+# the parts export in parallel and then get joined in order. logs_and_formats: list of (file_path, format).
+# an error in one log (eg unreadable or corrupted) is shown in its summary line, the other logs still export
+def export_logs_parallel(logs_and_formats, output_file_format=EXPORT_FILE_FORMAT):
+    tasks = []
+    failures = {}  # file index -> error message, for logs that failed before any part was queued
+    for file_index, (file_path, format) in enumerate(logs_and_formats):
+        output_name = export_output_name(file_path)
+        export_path = export_directory(output_name)
+        try:
+            os.makedirs(export_path, exist_ok=True)
+            bounds = log_chunk_bounds(file_path, format)
+        except Exception as e:
+            failures[file_index] = f"{type(e).__name__}: {e}"
+            continue
+        if len(bounds) == 1:
+            tasks.append((file_index, 0, file_path, format, export_path, output_name, output_file_format, 0, None))
+        else:
+            chunk_path = os.path.join(export_path, "parts")
+            os.makedirs(chunk_path, exist_ok=True)
+            for chunk_index, (start, end) in enumerate(bounds):
+                tasks.append((file_index, chunk_index, file_path, format, chunk_path, f"{output_name}_part{chunk_index}",
+                              output_file_format, start, end))
+
+    results = {}  # file index -> {chunk index: (message_counts, errors_count), or an error message string}
+    print(f"\nexporting {len(logs_and_formats)} logs in {len(tasks)} parts")
+    if len(tasks) <= 1 or EXPORT_PROCESSES == 1:
+        task_results = map(export_log_task, tasks)
+        pool = None
+    else:
+        pool = Pool(EXPORT_PROCESSES)
+        task_results = pool.imap_unordered(export_log_task, tasks)
+    try:
+        for done_count, (file_index, chunk_index, chunk_result) in enumerate(task_results, start=1):
+            results.setdefault(file_index, {})[chunk_index] = chunk_result
+            print(f"\r{done_count}/{len(tasks)} parts exported", end="", flush=True)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    print()
+
+    failed_count = 0
+    for file_index, (file_path, format) in enumerate(logs_and_formats):
+        chunk_results = [results[file_index][i] for i in sorted(results.get(file_index, {}))]
+        output_name = export_output_name(file_path)
+        chunk_errors = [result for result in chunk_results if isinstance(result, str)]
+        if file_index in failures or chunk_errors:
+            failed_count += 1
+            chunk_path = os.path.join(export_directory(output_name), "parts")
+            if os.path.isdir(chunk_path):
+                shutil.rmtree(chunk_path)  # parts of a failed log can't be merged
+            print(f"{file_path}: export failed: {failures.get(file_index) or chunk_errors[0]}")
+            continue
+        if len(chunk_results) > 1:
+            merge_export_parts(export_directory(output_name), output_name, len(chunk_results), output_file_format)
+        errors_count = sum(errors for _, errors in chunk_results)
+        num_messages = sum(sum(counts.values()) for counts, _ in chunk_results)
+        print(f"{file_path}: exported {num_messages} messages, {errors_count} failed to parse")
+    if failed_count:
+        print(f"{failed_count} of {len(logs_and_formats)} logs failed to export")
+
+
+# runs in the export pool: export one log or one part of a log. returns indices with the result to put it in order.
+# the result is an error message instead if it failed, so one bad log doesn't stop the others
+def export_log_task(task):
+    file_index, chunk_index, file_path, format, export_path, output_name, output_file_format, start, end = task
+    try:
+        chunk_result = export_log_range(file_path, format, export_path, output_name, output_file_format,
+                                        start, end, show_progress=False)
+    except Exception as e:
+        chunk_result = f"{type(e).__name__}: {e}"
+    return file_index, chunk_index, chunk_result
+
+
+# (start, end) byte ranges to split a log into, each starting on a whole message. end None means end of file
+def log_chunk_bounds(file_path, format):
+    file_size = log_data_size(file_path)
+    frame_formats = {"ascii": [FRAME_ASCII], "rtcm": [FRAME_RTCM], "binary": [FRAME_BINARY]}[format]
+    starts = [0]
+    for offset in range(EXPORT_CHUNK_BYTES, file_size, EXPORT_CHUNK_BYTES):
+        start = next_frame_offset(file_path, offset, frame_formats)
+        if starts[-1] < start < file_size:
+            starts.append(start)
+    ends = starts[1:] + [None]
+    return list(zip(starts, ends))
+
+
+# join the outputs of each part of a split log into one file per message type, then remove the parts
+def merge_export_parts(export_path, output_name, num_parts, output_file_format):
+    chunk_path = os.path.join(export_path, "parts")
+    extension = "parquet" if output_file_format == "parquet" else "csv"
+    for msgtype in EXPORT_ALL_MESSAGES:
+        msgtype_string = msgtype.decode().lower()
+        part_files = [os.path.join(chunk_path, f"{output_name}_part{i}_{msgtype_string}.{extension}") for i in range(num_parts)]
+        part_files = [part_file for part_file in part_files if os.path.exists(part_file)]  # types not in that part are removed
+        if len(part_files) == 0:
+            continue
+        out_file_path = os.path.join(export_path, f"{output_name}_{msgtype_string}.{extension}")
+        if output_file_format == "parquet":
+            import pyarrow.parquet as pq
+            writer = None
+            for part_file in part_files:
+                table = pq.read_table(part_file)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_file_path, table.schema)
+                writer.write_table(table.cast(writer.schema), row_group_size=EXPORT_PARQUET_ROW_GROUP_SIZE)
+            writer.close()
+        else:
+            csv_header = ",".join(EXPORT_ALL_MESSAGES[msgtype])
+            with open(out_file_path, 'w') as out_file:
+                out_file.write(csv_header)
+                for part_file in part_files:
+                    with open(part_file, 'r') as part:
+                        part.read(len(csv_header))  # each part has the header, then "\n"+row for each row
+                        shutil.copyfileobj(part, out_file)
+    shutil.rmtree(chunk_path)
+
+
+# log file name with extension removed
+def export_output_name(file_path):
+    input_filename = os.path.basename(file_path)
+    if "." in input_filename:
+        return input_filename[:input_filename.find(".")]
     else:
+        return input_filename
+
+
+# directory where csv will go, based on log file name
+def export_directory(output_name):
+    return os.path.join(os.path.dirname(__file__), "..", "exports", output_name)
+
+
+# output_file_format: "csv" or "parquet"
+def export_log_by_format(file_path, format="rtcm", output_file_format=EXPORT_FILE_FORMAT):
+    if format not in ["ascii", "rtcm", "binary"]:
         print(f"unknown format {format}, must be ascii, binary or rtcm")
         return
 
-    reader = FileReaderConnection(file_path) #should work for either format
+    if output_file_format not in ["csv", "parquet"]:
+        print(f"unknown output file format {output_file_format}, must be csv or parquet")
+        return
 
     # pick name and location for output files: log file name with extension removed
-    input_filename = os.path.basename(file_path)
-    if "." in input_filename:
-        input_notype = input_filename[:input_filename.find(".")]
+    input_notype = export_output_name(file_path)
+    export_path = export_directory(input_notype)
+    os.makedirs(export_path, exist_ok=True)
+
+    message_counts, errors_count = export_log_range(file_path, format, export_path, input_notype, output_file_format)
+
+    if errors_count == 1:
+        print(f"\n1 message failed to parse")
+    elif errors_count > 0:
+        print(f"\n{errors_count} messages failed to parse")
+
+    return True #indicate success. TODO - check for errors and return error code/False?
+
+
+# export bytes start to end of a log (whole log by default) into files named <output_name>_<type> in export_path.
+# start must be at a message start, see log_chunk_bounds. returns (message count per type, errors count)
+def export_log_range(file_path, format, export_path, output_name, output_file_format=EXPORT_FILE_FORMAT,
+                     start=0, end=None, show_progress=True):
+    if format == "ascii":
+        parse_scheme = ReadableScheme()
+    elif format == "rtcm":
+        parse_scheme = RTCM_Scheme()
     else:
-        input_notype = input_filename
+        parse_scheme = Binary_Scheme()
 
-    # add directory where csv will go, based on log file name
-    export_path = os.path.join(os.path.dirname(__file__), "..", "exports", input_notype)
-    os.makedirs(export_path, exist_ok=True)
+    if format != "binary":
+        # whole messages from the log by length field or end code, so start chars inside messages don't split them
+        frame_formats = [FRAME_ASCII if format == "ascii" else FRAME_RTCM]
+        log_framer = MessageFramer(frame_formats)  # counts the messages it drops for a bad checksum
+        log_frames = frames_from_file(file_path, frame_formats, start=start, end=end, framer=log_framer)
 
     # create log files and put header line in each
     all_outputs = {}
@@ -101,10 +342,13 @@ def export_log_by_format(file_path, format="rtcm"):
 
     for msgtype, fields in EXPORT_ALL_MESSAGES.items():
         msgtype_string = msgtype.decode().lower()
-        csv_file_path = os.path.join(export_path, f"{input_notype}_{msgtype_string}.csv")
-        out_file = open(csv_file_path, 'w')
-        csv_header = ",".join(fields)
-        out_file.write(csv_header)
+        if output_file_format == "parquet":
+            out_file = ParquetMessageWriter(os.path.join(export_path, f"{output_name}_{msgtype_string}.parquet"), msgtype)
+        else:
+            csv_file_path = os.path.join(export_path, f"{output_name}_{msgtype_string}.csv")
+            out_file = open(csv_file_path, 'w')
+            csv_header = ",".join(fields)
+            out_file.write(csv_header)
 
         all_outputs[msgtype] = out_file
         message_counts[msgtype] = 0
@@ -115,107 +359,75 @@ def export_log_by_format(file_path, format="rtcm"):
 
     errors_count = 0
     line_num = 0
-    while True: #until read empty - TODO figure out the loop condition
-
-        #show progress: dot per some number of lines
-        if line_num % 1000 == 0:
-            print(".", end="", flush=True)
-        line_num += 1
-
-        if format == "ascii":
-            m = parse_scheme.read_one_message(reader)
-        elif format == "rtcm":
-            m = parse_scheme.read_message_from_file(reader)
-        elif format == "binary":
-            m = parse_scheme.read_one_message_withlength(reader)
-
-        if m is None: #done reading
-            break
-
-        if m and m.valid and m.msgtype in EXPORT_ALL_MESSAGES:
-            # put whichever data we want based on message type and write to the csv for that type.
-            # get each att rby name so it doesn't get show message.valid, checksum_input, etc
-            # TODO - make a "message fields" structure in message for the fields so its not mixed together
-            out_list = []
-            msgtype = m.msgtype
-            out_file = all_outputs[msgtype]
-
-            for name in EXPORT_ALL_MESSAGES[msgtype]:
-                # do any constructed fields like position_geojson which are not in the message
-                if name == "position_geojson":
-                    out_list.append(position_for_csv(m))
-                else:
-                    # use the existing message field, or default value
-                    if hasattr(m, name):
-                        value = getattr(m, name)
-                        out_list.append(format_field(msgtype, name, value))
+    if format == "binary":
+        # binary logs: decode the whole file at once as columns, much faster than one message at a time
+        decoded, errors_count = decode_binary_file(file_path, start, end)
+        for binary_msgtype, columns in decoded.items():
+            msgtype = BINARY_EQUIVALENT_MESSAGE_TYPES.get(binary_msgtype)
+            if msgtype in EXPORT_ALL_MESSAGES and output_file_format == "parquet":
+                message_counts[msgtype] += all_outputs[msgtype].add_columns(columns)
+            elif msgtype in EXPORT_ALL_MESSAGES:
+                message_counts[msgtype] += write_columns_to_csv(all_outputs[msgtype], msgtype, columns, show_progress)
+    else:
+        while True: #until read empty - TODO figure out the loop condition
+
+            #show progress: dot per some number of lines
+            if show_progress and line_num % 1000 == 0:
+                print(".", end="", flush=True)
+            line_num += 1
+
+            frame = next(log_frames, None)
+            if frame is None: #done reading
+                errors_count += sum(log_framer.checksum_failures.values())
+                break
+            frame_format, frame_data = frame
+            m = parse_scheme.parse_message(frame_data)
+
+            if m and m.valid and m.msgtype in EXPORT_ALL_MESSAGES and output_file_format == "parquet":
+                all_outputs[m.msgtype].add_message(m)
+                message_counts[m.msgtype] += 1
+
+            elif m and m.valid and m.msgtype in EXPORT_ALL_MESSAGES:
+                # put whichever data we want based on message type and write to the csv for that type.
+                # get each att rby name so it doesn't get show message.valid, checksum_input, etc
+                # TODO - make a "message fields" structure in message for the fields so its not mixed together
+                out_list = []
+                msgtype = m.msgtype
+                out_file = all_outputs[msgtype]
+
+                for name in EXPORT_ALL_MESSAGES[msgtype]:
+                    # do any constructed fields like position_geojson which are not in the message
+                    if name == "position_geojson":
+                        out_list.append(position_for_csv(m))
                     else:
-                        out_list.append(str(default_value(m.msgtype, name)))
-            out_line = "\n"+",".join(out_list)
-            out_file.write(out_line)
-            message_counts[msgtype] += 1
-
-        elif m and m.valid:
-            # valid message but not in EXPORT_MESSAGE_TYPES : currently INF is this. do anything for these?
-            pass
-        else:
-            errors_count += 1
-            debug_print(f"\ninvalid message on line {line_num}: type = {m.msgtype if hasattr(m, 'msgtype') else 'None'}, valid = {m.valid}")
-            debug_print(m)
-
-    reader.close()
+                        # use the existing message field, or default value
+                        if hasattr(m, name):
+                            value = getattr(m, name)
+                            out_list.append(format_field(msgtype, name, value))
+                        else:
+                            out_list.append(str(default_value(m.msgtype, name)))
+                out_line = "\n"+",".join(out_list)
+                out_file.write(out_line)
+                message_counts[msgtype] += 1
+
+            elif m and m.valid:
+                # valid message but not in EXPORT_MESSAGE_TYPES : currently INF is this. do anything for these?
+                pass
+            else:
+                errors_count += 1
+                debug_print(f"\ninvalid message on line {line_num}: type = {m.msgtype if hasattr(m, 'msgtype') else 'None'}, valid = {m.valid}")
+                debug_print(m)
 
     for out_file in all_outputs.values():
         out_file.close()
 
     # remove any empty csv, for message types which were not in the log
     for msgtype, count in message_counts.items():
-        if count == 0:
+        if count == 0 and os.path.exists(all_outputs[msgtype].name):
             os.remove(all_outputs[msgtype].name)
 
-    if errors_count == 1:
-        print(f"\n1 message failed to parse")
-    elif errors_count > 0:
-        print(f"\n{errors_count} messages failed to parse")
-
-    return True #indicate success. TODO - check for errors and return error code/False?
-
+    return message_counts, errors_count
 
-def log_is_ascii(log_path):
-    ascii_scheme = ReadableScheme()
-    file_reader = FileReaderConnection(log_path)
-    for i in range(3):
-        m = ascii_scheme.read_one_message(file_reader)
-        if m and hasattr(m, "valid") and m.valid:
-            file_reader.close()
-            return True
-    file_reader.close()
-    return False
-
-
-def log_is_rtcm(log_path):
-    rtcm_scheme = RTCM_Scheme()
-    file_reader = FileReaderConnection(log_path)
-    for i in range(3):
-        #could use rtcm_scheme.read_one_message here but it reads wrong when start char 0xD3 occurs inside the message
-        #read_message_from_file uses pyrtcm read and is more reliable. TODO - make read_one_message work like that?
-        m = rtcm_scheme.read_message_from_file(file_reader)
-        if m and hasattr(m, "valid") and m.valid:
-            file_reader.close()
-            return True
-    file_reader.close()
-    return False
-
-def log_is_binary(log_path):
-    binary_scheme = Binary_Scheme()
-    file_reader = FileReaderConnection(log_path)
-    for i in range(3):
-        m = binary_scheme.read_one_message(file_reader)
-        if m and hasattr(m, "valid") and m.valid:
-            file_reader.close()
-            return True
-    file_reader.close()
-    return False
 
 if __name__ == "__main__":
     export_logs_detect_format()
@@ -32,6 +32,23 @@ def format_field(msgtype, var_name, value):
         return str(value)
 
 
+# write decoded columns from decode_binary_file to the csv for that type
+def write_columns_to_csv(out_file, msgtype, columns):
+    defaults = all_defaults[msgtype]
+    num_rows = len(next(iter(columns.values())))
+    column_strings = []
+    for name in all_show_fields[msgtype]:
+        if name in columns:
+            column_strings.append([format_field(msgtype, name, value) for value in columns[name].tolist()])
+        else:
+            column_strings.append([str(defaults(name))] * num_rows)
+
+    for row_num, row in enumerate(zip(*column_strings)):
+        if row_num % 1000 == 0:
+            print(".", end="", flush=True)
+        out_file.write("\n"+",".join(row))
+
+
 def export_logs_detect_format():
     default_dir = os.path.join(os.path.dirname(__file__), "../logs")
     file_paths = pick_multiple_files(initialdir=default_dir, title="Select one or multiple logs to convert")
@@ -40,20 +57,15 @@ def export_logs_detect_format():
         return False  # indicates cancel
 
     for file_path in file_paths:
-        if log_is_ascii(file_path):
-            print(f"\nexporting {file_path} (detected ascii format)")
-            if export_log_by_format(file_path, "ascii"):
-                print(f"\nfinished exporting {file_path}")
-        elif log_is_rtcm(file_path):
-            print(f"\nexporting {file_path} (detected rtcm format)")
-            if export_log_by_format(file_path, "rtcm"):
-                print(f"\nfinished exporting {file_path}")
-        elif log_is_binary(file_path):
-            print(f"\nexporting {file_path} (detected binary format)")
-            if export_log_by_format(file_path, "binary"):
-                print(f"\nfinished exporting {file_path}")
-        else:
+        formats, confidence = sniff_log_format(file_path)
+        if len(formats) == 0:
             print(f"\ncould not detect format for file: {file_path}")
+            continue
+        print(f"\nexporting {file_path} (detected {formats[0]} format, confidence {confidence:.2f})")
+        if len(formats) > 1:
+            print(f"mixed log, also has {', '.join(formats[1:])} messages: exporting {formats[0]} only")
+        if export_log_by_format(file_path, formats[0]):
+            print(f"\nfinished exporting {file_path}")
     return True
 
 
@@ -75,7 +87,11 @@ def export_log_by_format(file_path, format="rtcm"):
     # elif format == "rtcm":
     #     reader = open(input_path, 'rb')
 
-    reader = FileReaderConnection(file_path) #should work for either format
+    if format != "binary":
+        # whole messages from the log by length field or end code, so start chars inside messages don't split them
+        frame_formats = [FRAME_ASCII if format == "ascii" else FRAME_RTCM]
+        log_framer = MessageFramer(frame_formats)  # counts the messages it drops for a bad checksum
+        log_frames = frames_from_file(file_path, frame_formats, framer=log_framer)
 
     # pick name and location for output files
     input_location = os.path.dirname(file_path)
@@ -108,49 +124,53 @@ def export_log_by_format(file_path, format="rtcm"):
     #print("line: "+line.decode())
     errors_count = 0
     line_num = 0
-    while True: #until read empty - TODO figure out the loop condition
-
-        #show progress: dot per some number of lines
-        if line_num % 1000 == 0:
-            print(".", end="", flush=True)
-        line_num += 1
-
-        if format == "ascii":
-            m = parse_scheme.read_one_message(reader)
-        elif format == "rtcm":
-            m = parse_scheme.read_message_from_file(reader)
-        elif format == "binary":
-            m = parse_scheme.read_one_message_withlength(reader)
-
-        if m is None: #done reading
-            break
-
-        #print(m)
-        if m and m.valid and m.msgtype in EXPORT_MESSAGE_TYPES:
-            # put whichever data we want based on message type and write to the csv for that type.
-            # get each att rby name so it doesn't get show message.valid, checksum_input, etc
-            # TODO - make a "message fields" structure in message for the fields so its not mixed together
-            out_list = []
-            msgtype = m.msgtype
-            defaults = all_defaults[msgtype]
-            out_file = all_outputs[msgtype]
-
-            for name in all_show_fields[msgtype]: # or show_fields[m.msgtype]
-                # use the existing message field, or default value
-                if hasattr(m, name):
-                    value = getattr(m, name)
-                    out_list.append(format_field(msgtype, name, value))
-                else:
-                    out_list.append(str(defaults(name)))
-            out_line = "\n"+",".join(out_list)
-            out_file.write(out_line) # outputs[m.msgtype].write(out_line)
-
-        else:
-            errors_count += 1
-            debug_print(f"\ninvalid message on line {line_num}: type = {m.msgtype if hasattr(m, 'msgtype') else 'None'}, valid = {m.valid}")
-            debug_print(m)
+    if format == "binary":
+        # binary logs: decode the whole file at once as columns, much faster than one message at a time
+        decoded, errors_count = decode_binary_file(file_path)
+        for binary_msgtype, columns in decoded.items():
+            msgtype = BINARY_EQUIVALENT_MESSAGE_TYPES.get(binary_msgtype)
+            if msgtype in EXPORT_MESSAGE_TYPES:
+                write_columns_to_csv(all_outputs[msgtype], msgtype, columns)
+    else:
+        while True: #until read empty - TODO figure out the loop condition
+
+            #show progress: dot per some number of lines
+            if line_num % 1000 == 0:
+                print(".", end="", flush=True)
+            line_num += 1
+
+            frame = next(log_frames, None)
+            if frame is None: #done reading
+                errors_count += sum(log_framer.checksum_failures.values())
+                break
+            frame_format, frame_data = frame
+            m = parse_scheme.parse_message(frame_data)
+
+            #print(m)
+            if m and m.valid and m.msgtype in EXPORT_MESSAGE_TYPES:
+                # put whichever data we want based on message type and write to the csv for that type.
+                # get each att rby name so it doesn't get show message.valid, checksum_input, etc
+                # TODO - make a "message fields" structure in message for the fields so its not mixed together
+                out_list = []
+                msgtype = m.msgtype
+                defaults = all_defaults[msgtype]
+                out_file = all_outputs[msgtype]
+
+                for name in all_show_fields[msgtype]: # or show_fields[m.msgtype]
+                    # use the existing message field, or default value
+                    if hasattr(m, name):
+                        value = getattr(m, name)
+                        out_list.append(format_field(msgtype, name, value))
+                    else:
+                        out_list.append(str(defaults(name)))
+                out_line = "\n"+",".join(out_list)
+                out_file.write(out_line) # outputs[m.msgtype].write(out_line)
+
+            else:
+                errors_count += 1
+                debug_print(f"\ninvalid message on line {line_num}: type = {m.msgtype if hasattr(m, 'msgtype') else 'None'}, valid = {m.valid}")
+                debug_print(m)
 
-    reader.close()
     imu_out.close()
 
     if errors_count == 1:
@@ -161,42 +181,5 @@ def export_log_by_format(file_path, format="rtcm"):
     return True #indicate success. TODO - check for errors and return error code/False?
 
 
-def log_is_ascii(log_path):
-    ascii_scheme = ReadableScheme()
-    file_reader = FileReaderConnection(log_path)
-    for i in range(3):
-        m = ascii_scheme.read_one_message(file_reader)
-        if m and hasattr(m, "valid") and m.valid:
-            file_reader.close()
-            return True
-    file_reader.close()
-    return False
-
-
-def log_is_rtcm(log_path):
-    rtcm_scheme = RTCM_Scheme()
-    file_reader = FileReaderConnection(log_path)
-    for i in range(3):
-        #could use rtcm_scheme.read_one_message here but it reads wrong when start char 0xD3 occurs inside the message
-        #read_message_from_file uses pyrtcm read and is more reliable. TODO - make read_one_message work like that?
-        m = rtcm_scheme.read_message_from_file(file_reader)
-        if m and hasattr(m, "valid") and m.valid:
-            file_reader.close()
-            return True
-    file_reader.close()
-    return False
-
-def log_is_binary(log_path):
-    binary_scheme = Binary_Scheme()
-    file_reader = FileReaderConnection(log_path)
-    for i in range(3):
-        m = binary_scheme.read_one_message(file_reader)
-        if m and hasattr(m, "valid") and m.valid:
-            file_reader.close()
-            return True
-    file_reader.close()
-    return False
-
-
 if __name__ == "__main__":
     export_logs_detect_format()
@@ -81,11 +81,14 @@ def column_of_type(frame, column_names, column_type):
 if __name__ == "__main__":
     root = tk.Tk()
     root.withdraw()
-    in_file_path = askopenfilename(initialdir=None, title="Select csv to plot")
+    in_file_path = askopenfilename(initialdir=None, title="Select csv or parquet to plot")
     root.destroy()
     file_name = os.path.basename(in_file_path)
     print(f"selected  file: {in_file_path}")
-    frame = pd.read_csv(in_file_path)
+    if in_file_path.endswith(".parquet"):
+        frame = pd.read_parquet(in_file_path)
+    else:
+        frame = pd.read_csv(in_file_path)
 
     # make a column called "index" with values 0,1,2 etc. warning - may overwrite a csv column called "index"
     frame.reset_index(inplace=True)
@@ -0,0 +1,37 @@
+#print the io_loop message and drop counters of a running user program, without opening its menus.
+#usage: python io_stats_cli.py [interval_seconds [shared_memory_name]]
+#the name is IO_STATS_NAME unless a second user program was running, then it's printed by that program's Stats menu.
+#each print shows totals, and rates since the last print. stop with ctrl-c.
+
+import sys
+import time
+import pathlib
+
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools import *
+from user_program_config import IO_STATS_CLI_SECONDS
+
+
+def main():
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else IO_STATS_CLI_SECONDS
+    name = sys.argv[2] if len(sys.argv) > 2 else IO_STATS_NAME
+    try:
+        io_stats = IOStats(name, create=False, track=False)
+    except FileNotFoundError:
+        print(f"no io_loop stats named {name}: start the user program first")
+        return
+    previous = None
+    try:
+        while True:
+            print(time.strftime("\n%H:%M:%S"))
+            print(io_stats.summary_table(previous))
+            previous = io_stats.snapshot()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    io_stats.close()
+
+
+if __name__ == "__main__":
+    main()
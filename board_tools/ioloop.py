@@ -10,27 +10,216 @@ import serial
 from multiprocessing import Array, Value, Process, Manager
 import base64
 import socket
-import select
+import selectors
+import threading
+import collections
 
 parent_dir = str(pathlib.Path(__file__).parent)
 sys.path.append(parent_dir+'/src')
 from tools import *
-from user_program_config import debug_print, CONNECT_RETRIES, FLUSH_FREQUENCY, \
+from user_program_config import debug_print, CONNECT_RETRIES, \
     NTRIP_TIMEOUT_SECONDS, NTRIP_RETRY_SECONDS, NTRIP_READ_INTERVAL_SECONDS,\
-    NTRIP_MAX_BYTES_PER_INTERVAL, NTRIP_MAX_BYTES_PER_WRITE
+    NTRIP_MAX_BYTES_PER_INTERVAL, NTRIP_MAX_BYTES_PER_WRITE, IO_LOOP_POLL_SECONDS, LOG_WRITER_QUEUE_BYTES, \
+    LOG_WRITE_BLOCK_BYTES, LOG_WRITE_MAX_DELAY_SECONDS, LOG_FSYNC_SECONDS, LOG_ROTATE_BYTES, LOG_ROTATE_SECONDS, \
+    LOG_INDEX_WHILE_LOGGING, LOG_COMPRESSION
 
-def open_log_file(location, name): #ioloop - goes in that file
+# compression "zstd" or "lz4" adds .zst or .lz4 to the name and compresses as it writes
+def open_log_file(location, name, compression=None): #ioloop - goes in that file
     # location needs to double any slashes \\ - otherwise we risk \b or other special characters
     location = os.path.join(os.path.dirname(__file__), location)  # make it relative to this file
     os.makedirs(location, exist_ok=True)
+    if compression:
+        name += LOG_COMPRESSION_EXTENSIONS[compression]
     full_path = os.path.join(location, name)
     try:
-        return open(full_path, 'wb')
+        return open_log_writer(full_path, compression)
     except Exception as e:
-        print("error trying to open log file: "+location+"/"+name)
+        print("error trying to open log file: "+location+"/"+name+": "+str(e))
         return None
 
 
+# writes the log on a background thread so disk writes and fsync never stall reading the data port.
+# write() only queues the data: if the queue is over LOG_WRITER_QUEUE_BYTES the data is dropped and counted instead.
+# the thread writes whole LOG_WRITE_BLOCK_BYTES blocks at block-aligned file offsets, or whatever there is after
+# LOG_WRITE_MAX_DELAY_SECONDS, and fsyncs every LOG_FSYNC_SECONDS.
+# with rotate_bytes or rotate_seconds it starts a new file name_2, name_3... in log_path(), at a message boundary.
+# with index, each file gets a seek index (tools/log_index.py) from the messages passed to write().
+# with compression ("zstd" or "lz4") the files are compressed on the writer thread, see tools/log_compression.py.
+# rotate_bytes and the index count decompressed bytes then.
+class LogWriter:
+    def __init__(self, name, location=None, rotate_bytes=LOG_ROTATE_BYTES, rotate_seconds=LOG_ROTATE_SECONDS,
+                 index=LOG_INDEX_WHILE_LOGGING, compression=LOG_COMPRESSION):
+        self.name = name
+        self.location = location  # None: log_path() when each file opens, so rotated files follow the date
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.compression = compression
+        self.index = index
+        self.index_builder = None
+        self.part = 1
+        self.file = self.open_next_file()
+        if not self.file:
+            raise OSError(f"could not open log file {name}")
+
+        self.condition = threading.Condition()
+        # (data, stream position where its last whole message ends or None, [(stream position, message)] to index)
+        self.chunks = collections.deque()
+        self.queued_bytes = 0
+        self.accepted_bytes = 0  # stream position: everything accepted by write()
+        self.closing = False
+        self.dropped_bytes = 0
+        self.error = None
+        self.thread = threading.Thread(target=self.write_loop, name="LogWriter", daemon=True)
+        self.thread.start()
+
+    def open_next_file(self):
+        name = self.name
+        if self.part > 1:
+            base, extension = os.path.splitext(self.name)
+            name = f"{base}_{self.part}{extension}"
+        self.file_bytes = 0
+        self.file_start_time = time.time()
+        log_file = open_log_file(self.location or log_path(), name, self.compression)
+        if log_file and self.index:
+            self.index_builder = LogIndexBuilder(log_index_path(log_file.name))
+        return log_file
+
+    # queue data from the data port. message_end is where the last whole message in data ends, if known:
+    # files only rotate at those points. index_points is [(offset in data where a message starts, parsed message)],
+    # the offset negative if it started in earlier data. returns False if the data was dropped.
+    def write(self, data, message_end=None, index_points=None):
+        with self.condition:
+            if self.error or self.closing or self.queued_bytes + len(data) > LOG_WRITER_QUEUE_BYTES:
+                self.dropped_bytes += len(data)
+                return False
+            if message_end is None:
+                message_end = len(data)
+            if index_points and self.index:
+                index_points = [(self.accepted_bytes + offset, message) for offset, message in index_points]
+            else:
+                index_points = None
+            self.chunks.append((data, self.accepted_bytes + message_end if message_end >= 0 else None, index_points))
+            self.queued_bytes += len(data)
+            self.accepted_bytes += len(data)
+            if self.queued_bytes >= LOG_WRITE_BLOCK_BYTES:
+                self.condition.notify()
+        return True
+
+    # write everything queued, close the file and stop the thread
+    def close(self):
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        self.thread.join()
+        if self.dropped_bytes:
+            print(f"log writer dropped {self.dropped_bytes} bytes: disk too slow or full")
+
+    def write_loop(self):
+        pending = bytearray()  # taken from the queue, not written yet
+        pending_position = 0  # stream position of pending[0]
+        boundaries = collections.deque()  # message boundaries in pending, as stream positions
+        index_points = collections.deque()  # (stream position, message) not indexed yet
+        file_position = 0  # stream position of the current file's first byte
+        last_sync_time = time.time()
+        while True:
+            with self.condition:
+                if not self.closing and self.queued_bytes < LOG_WRITE_BLOCK_BYTES:
+                    self.condition.wait(LOG_WRITE_MAX_DELAY_SECONDS)
+                full_block = self.queued_bytes >= LOG_WRITE_BLOCK_BYTES
+                while self.chunks:
+                    data, boundary, points = self.chunks.popleft()
+                    pending += data
+                    if boundary is not None:
+                        boundaries.append(boundary)
+                    if points:
+                        index_points.extend(points)
+                self.queued_bytes = 0
+                closing = self.closing
+            try:
+                # move to the next file at the first message boundary past the size limit, or any once time is up
+                split = self.rotation_split(pending_position, boundaries)
+                while split is not None:
+                    self.file.write(pending[:split])
+                    self.file_bytes += split
+                    del pending[:split]
+                    pending_position += split
+                    self.sync_file()
+                    self.file.close()
+                    self.index_written(index_points, file_position, pending_position)
+                    self.close_index()
+                    file_position = pending_position
+                    self.part += 1
+                    self.file = self.open_next_file()
+                    if not self.file:
+                        raise OSError(f"could not open log file part {self.part}")
+                    last_sync_time = time.time()
+                    split = self.rotation_split(pending_position, boundaries)
+                # whole blocks up to an aligned offset, or everything if it waited long enough
+                if full_block and not closing:
+                    write_length = (self.file_bytes + len(pending)) // LOG_WRITE_BLOCK_BYTES * LOG_WRITE_BLOCK_BYTES - self.file_bytes
+                else:
+                    write_length = len(pending)
+                if write_length > 0:
+                    self.file.write(pending[:write_length])
+                    self.file_bytes += write_length
+                    del pending[:write_length]
+                    pending_position += write_length
+                while boundaries and boundaries[0] <= pending_position:
+                    boundaries.popleft()
+                self.index_written(index_points, file_position, pending_position)
+                if closing or time.time() - last_sync_time >= LOG_FSYNC_SECONDS:
+                    self.sync_file()
+                    last_sync_time = time.time()
+            except OSError as e:
+                print(f"log writer error: {e}")
+                with self.condition:
+                    self.error = e
+                    self.dropped_bytes += len(pending) + self.queued_bytes
+                    self.chunks.clear()
+                    self.queued_bytes = 0
+                closing = True
+            if closing:
+                try:
+                    self.file.close()
+                    self.close_index()
+                except Exception:
+                    pass
+                return
+
+    # bytes of pending to write before rotating, or None if no rotation now. drops boundaries it passes
+    def rotation_split(self, pending_position, boundaries):
+        if self.rotate_seconds and time.time() - self.file_start_time >= self.rotate_seconds:
+            earliest = pending_position
+        elif self.rotate_bytes:
+            earliest = pending_position + max(0, self.rotate_bytes - self.file_bytes)
+        else:
+            return None
+        while boundaries and boundaries[0] < earliest:
+            boundaries.popleft()
+        if not boundaries:
+            return None
+        split = boundaries.popleft() - pending_position
+        if split == 0 and self.file_bytes == 0:
+            return None  # nothing in this file yet
+        return split
+
+    def sync_file(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    # index the messages that start before written_position, now that they're in the file
+    def index_written(self, index_points, file_position, written_position):
+        while index_points and index_points[0][0] < written_position:
+            stream_position, message = index_points.popleft()
+            if self.index_builder:
+                self.index_builder.add_message(max(0, stream_position - file_position), message)
+
+    def close_index(self):
+        if self.index_builder:
+            self.index_builder.close(self.file_bytes)
+            self.index_builder = None
+
+
 def connect_ntrip(num_retries, on, request, ip, port): #ioloop
     errmsg = "unknown error" # if we get to the end without succeeding or known error type
     reader = None
@@ -52,18 +241,9 @@ def connect_ntrip(num_retries, on, request, ip, port): #ioloop
                 first_resp = reader.recv(4096) #TODO - can this block logging due to blocking read?
                 debug_print("ntrip response:\n"+first_resp.decode() + "\n")
                 # check the response codes:
-                success = False
-                if first_resp.find(b"SOURCETABLE 200 OK") >= 0:
-                    errmsg = "caster responds with error: wrong mountpoint (sourcetable)" # error message to show when out of retries
-                elif first_resp.find(b"200 OK") >= 0:
-                    debug_print("caster returns success message")
-                    success = True
-                elif first_resp.find(b"404 Not Found") >= 0:
-                    errmsg = "caster responds with error: wrong mountpoint (not found)"
-                elif first_resp.find(b"400 Bad Request") >= 0:
-                    errmsg ="caster responds with error: wrong mountpoint (bad request)"
-                elif first_resp.find(b"401 Unauthorized") >= 0:
-                    errmsg ="caster responds with error: wrong username/password"
+                success, resp_errmsg = check_ntrip_response(first_resp)
+                if resp_errmsg:
+                    errmsg = resp_errmsg # error message to show when out of retries
                 if success:
                     on.value = 1
                     reader.settimeout(0) #back to non-blocking mode, timeout probably not needed when connected.
@@ -85,6 +265,22 @@ def connect_ntrip(num_retries, on, request, ip, port): #ioloop
     return None, errmsg
 
 
+# check the caster's first response. returns (success, error message or None if unrecognized)
+def check_ntrip_response(first_resp): #ioloop and async_ioloop
+    if first_resp.find(b"SOURCETABLE 200 OK") >= 0:
+        return False, "caster responds with error: wrong mountpoint (sourcetable)"
+    elif first_resp.find(b"200 OK") >= 0:
+        debug_print("caster returns success message")
+        return True, None
+    elif first_resp.find(b"404 Not Found") >= 0:
+        return False, "caster responds with error: wrong mountpoint (not found)"
+    elif first_resp.find(b"400 Bad Request") >= 0:
+        return False, "caster responds with error: wrong mountpoint (bad request)"
+    elif first_resp.find(b"401 Unauthorized") >= 0:
+        return False, "caster responds with error: wrong username/password"
+    return False, None
+
+
 def close_ntrip(on, reader): #ioloop - only used by connect_ntrip currently
     if reader:
         reader.close()
@@ -153,7 +349,7 @@ def build_gga(gps_message): #ioloop
     # build payload. later - could assemble a Message() with the GGA fields and use ReadableScheme to build payload?
     payload = b'GNGGA,'+utc_time+b','+lat+b','+NS+b','+lon+b','+EW+b','+fixtype+b','+numsv+b','+HDOP+b','+alt_msl+b','+\
         altUnit+b','+sep+b','+sepunit+b','+diffAge+b','+diffStation
-    checksum = int_to_ascii(ReadableScheme().compute_checksum(payload))
+    checksum = int_to_ascii(ascii_checksum(payload))
     gga_data = b'$'+payload+b'*'+checksum+b'\r\n'
     #debug_print(gga_data)
     return gga_data
@@ -168,35 +364,125 @@ def log_path():
     day_dir = str(ltime.tm_mday)
     return os.path.join("..", "logs", month_dir, day_dir)
 
+# wakes io_loop from its selector wait when the user program sends a command.
+# a socket pair since Windows can only select on sockets, not pipes.
+class ControlWakeup:
+    def __init__(self):
+        self.reader, self.writer = socket.socketpair()
+        self.reader.setblocking(False)
+        self.writer.setblocking(False)
+
+    def notify(self):
+        try:
+            self.writer.send(b'\0')
+        except OSError:
+            pass  # buffer full: io_loop already has a wakeup waiting
+
+    def drain(self):
+        try:
+            while self.reader.recv(4096):
+                pass
+        except OSError:  # BlockingIOError when empty
+            pass
+
+
+# shared command flag for io_loop, like Value('b'), but setting it nonzero also wakes io_loop
+class ControlFlag:
+    def __init__(self, wakeup, typecode='b', initial=0):
+        self.wakeup = wakeup
+        self.shared = Value(typecode, initial)
+
+    @property
+    def value(self):
+        return self.shared.value
+
+    @value.setter
+    def value(self, new_value):
+        self.shared.value = new_value
+        if new_value:
+            self.wakeup.notify()
+
+
+# keep one registered file descriptor per selector source name, or none if fileno is None.
+# sources holds (connection, fileno) so a new connection that reuses a closed one's fd number still gets registered.
+def update_selector_source(selector, sources, name, connection, fileno):
+    if fileno is None:
+        connection = None
+    registered = sources.get(name)
+    if registered and registered[0] is connection and registered[1] == fileno:
+        return
+    if registered:
+        try:
+            selector.unregister(sources.pop(name)[1])
+        except (KeyError, ValueError, OSError):
+            pass  # already closed
+    if fileno is not None:
+        selector.register(fileno, selectors.EVENT_READ, name)
+        sources[name] = (connection, fileno)
+
+
+# selector source names in io_loop
+CONTROL_SOURCE = "control"
+DATA_SOURCE = "data"
+NTRIP_SOURCE = "ntrip"
+
 def io_loop(exitflag, con_on, con_start, con_stop, con_succeed,
             con_type, com_port, data_port_baud, control_port_baud, udp_ip, udp_port, gps_received,
             log_on, log_start, log_stop, log_name,
             ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
             ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-            last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+            ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
             last_imu_time,
-            shared_serial_number
+            shared_serial_number,
+            latency_stats=None, io_stats=None
     ):
+    # latency_stats: tools LatencyStats to time each message from the port read to parsed, and to timestamp ring
+    # records for the monitor. None to skip all timing
+    # io_stats: tools IOStats to count reads, messages and drops for the Stats menu and io_stats_cli.py, or None
 
     data_connection = None
     ntrip_reader = None
     ntrip_retrying = False
     ntrip_stop_time = 0
     log_file = None
-    flush_counter=0
     #last_valid_gps = None
-    ascii_scheme = ReadableScheme()
-    binary_scheme = Binary_Scheme()
-    rtcm_scheme = RTCM_Scheme()
+    frame_schemes = {FRAME_ASCII: ReadableScheme(), FRAME_RTCM: RTCM_Scheme(), FRAME_BINARY: Binary_Scheme()}
     serialnum = ""
 
     last_ntrip_read_window_time = time.time()
     ntrip_bytes_count = 0
 
-    buffered_partial_message = b''
+    message_framer = MessageFramer()
+
+    # wait for data port, NTRIP or a command instead of polling. the command flags share one wakeup socket.
+    control_flags = [con_stop, log_stop, ntrip_stop, exitflag, con_start, log_start, ntrip_start]
+    selector = selectors.DefaultSelector()
+    selector.register(exitflag.wakeup.reader, selectors.EVENT_READ, CONTROL_SOURCE)
+    selector_sources = {}
 
     while True:
-        time.sleep(1e-3) #slow down loop to reduce cpu use, 1 ms wait should be fine
+        # register what can wake us now, and how long until something is due without any input
+        data_fileno = data_connection.fileno() if (con_on.value and data_connection) else None
+        ntrip_active = ntrip_on.value and con_on.value and data_connection and ntrip_reader and ntrip_reader.fileno() >= 0
+        ntrip_window_left = NTRIP_READ_INTERVAL_SECONDS - (time.time() - last_ntrip_read_window_time)
+        ntrip_limited = ntrip_bytes_count > NTRIP_MAX_BYTES_PER_INTERVAL and ntrip_window_left > 0
+        update_selector_source(selector, selector_sources, DATA_SOURCE, data_connection, data_fileno)
+        update_selector_source(selector, selector_sources, NTRIP_SOURCE, ntrip_reader,
+                               ntrip_reader.fileno() if (ntrip_active and not ntrip_limited) else None)
+        timeout = None  # wait until there is work
+        if any(flag.value for flag in control_flags):
+            timeout = 0  # more commands left from the last wakeup
+        elif con_on.value and data_connection and data_fileno is None:
+            timeout = IO_LOOP_POLL_SECONDS  # can't select this data port
+        else:
+            if ntrip_active and ntrip_limited:
+                timeout = ntrip_window_left
+            if ntrip_retrying:
+                retry_left = max(0, NTRIP_RETRY_SECONDS - (time.time() - ntrip_stop_time))
+                timeout = retry_left if timeout is None else min(timeout, retry_left)
+        ready = {key.data for key, events in selector.select(timeout)}
+        if CONTROL_SOURCE in ready:
+            exitflag.wakeup.drain()
 
         serialnum = shared_serial_number.value.decode()
         #first handle all start/stop signals.
@@ -227,6 +513,7 @@ def io_loop(exitflag, con_on, con_start, con_stop, con_succeed,
                 ntrip_reader.close()
             if log_file:
                 log_file.close()
+            selector.close()
             exit()
         elif con_start.value:
             con_start.value = 0
@@ -234,6 +521,9 @@ def io_loop(exitflag, con_on, con_start, con_stop, con_succeed,
                 # release existing connection:
                 if data_connection:
                     data_connection.close()
+                message_framer.reset()  # don't join partial messages across connections
+                if io_stats:
+                    io_stats.restart_gaps()
                 debug_print("io_loop con start")
                 if con_type.value == b"COM":
                     debug_print("io_loop connect COM")
@@ -249,7 +539,12 @@ def io_loop(exitflag, con_on, con_start, con_stop, con_succeed,
                     data_connection.close()
         elif log_start.value:
             debug_print("io_loop log start")
-            log_file = open_log_file(log_path(), log_name.value.decode())
+            if log_file:
+                log_file.close()
+            try:
+                log_file = LogWriter(log_name.value.decode())
+            except OSError as e:
+                log_file = None  # open_log_file printed the error
             log_start.value = 0
         elif ntrip_start.value:
             debug_print("io_loop ntrip start")
@@ -288,11 +583,9 @@ def io_loop(exitflag, con_on, con_start, con_stop, con_succeed,
                     debug_print(f"ntrip read interval of {time_since_last_read_window :.2f} seconds had {ntrip_bytes_count} bytes")
                     ntrip_bytes_count = 0
 
-                # read NTRIP data if there is any (select.select check)
+                # read NTRIP data if there is any (selector said it's readable)
                 # don't read if we already exceeded the allowed bytes in 1 second -> wait for next cycle
-                # this select can raise ValueError when ntrip turns off, but fileno() >=0 check should prevent it.
-                reads, writes, errors = select.select([ntrip_reader], [], [], 0)
-                if ntrip_reader in reads and (ntrip_bytes_count <= NTRIP_MAX_BYTES_PER_INTERVAL):
+                if NTRIP_SOURCE in ready and (ntrip_bytes_count <= NTRIP_MAX_BYTES_PER_INTERVAL):
                     # use max bytes per interval as the max read size too. so if more than that much data arrives at once, send none.
                     ntrip_data = ntrip_reader.recv(NTRIP_MAX_BYTES_PER_INTERVAL+1) # TODO can this block logging? hopefully not at timeout 0.
                     read_length = len(ntrip_data)
@@ -342,87 +635,82 @@ def io_loop(exitflag, con_on, con_start, con_stop, con_succeed,
             try:
                 #TODO - verify connection state? read_ready fails on COM if disconnected, but no error on UDP lost here
                 read_ready = data_connection.read_ready()
+                if DATA_SOURCE in ready and not read_ready and type(data_connection) is SerialConnection:
+                    # serial port that selects as readable with nothing to read has been unplugged
+                    raise serial.SerialException("data port readable but has no data")
                 if read_ready: # read whether logging or not to keep buffer clear
 
-                    #use readall to make sure it's up to date. could read one or multiple messages.
-                    in_data = data_connection.readall()
-                    #debug_print(f"\nin data: <{in_data}>")
-
-                    data_for_monitor = buffered_partial_message + in_data # combine with any leftover data
-                    # debug_print(f"\ndata for monitor: {data_for_monitor}")
-
-                    #try handling as ascii and rtcm and do whichever works. TODO - make a combined parser?
-                    last_parts_all_formats = []
-
-                    for parse_scheme, start_char in [(ascii_scheme, READABLE_START), (rtcm_scheme, RTCM_PREAMBLE), (binary_scheme, BINARY_PREAMBLE)]:
-                        parts = data_for_monitor.split(start_char) #TODO - do a read_one_message from buffer instead? this will split on start char in message.
-                        #debug_print(f"parts splitting on {start_char}:")
-                        for part in parts:
-                            #debug_print(f"\t{part}")
-                            part = start_char + part
-                            last_msg = parse_scheme.parse_message(part)
-                            #print(f"last_msg: {last_msg}")
-                            if not last_msg.valid:
-                                #debug print invalid?
-                                continue #todo - could try to recombine split messages here.
-                            #debug_print(last_msg)
-                            elif last_msg.msgtype == b'INS':
-                                last_ins_msg.value = part #send valid INS message to monitor
-                                #debug_print(f"\nlast_ins_msg {type(parse_scheme)}:\n{last_msg}")
-                            elif last_msg.msgtype in [b'IMU', b'IM1', b'IMX']:
-                                last_imu_time.value = last_msg.imu_time_ms
-                                last_imu_msg.value = part #send valid IMU message to monitor
-                                #debug_print(f"\nlast_imu_msg {type(parse_scheme)}:\n{last_msg}")
-                            elif last_msg.msgtype == b'HDG':
-                                last_hdg_msg.value = part
-                                #debug_print(f"\nlast_hdg_msg {type(parse_scheme)}:\n{last_msg}")
-                            elif last_msg.msgtype == b'GPS':
-                                #debug_print(f"\nlast_gps_msg {type(parse_scheme)}:\n{last_msg}")
-                                last_gps_msg.value = part # save if needed for ntrip start or delayed sending
-                                gps_received.value = 1 #will allow setting gga on in ntrip
-                                #build and send GGA message if ntrip on
-                                if ntrip_on.value and ntrip_reader and ntrip_gga:
-                                    # build GGA
-                                    gga_message = build_gga(last_msg)
-                                    try:
-                                        ntrip_reader.sendall(gga_message)
-                                    except Exception as e: #ntrip error, not data_connection
-                                        #TODO - handle this as if ntrip disconnected? then close (if open) and retry
-                                        debug_print("error sending gga message")
-                            elif last_msg.msgtype == b'GP2':
-                                #print(f"\nlast_gp2_msg {type(parse_scheme)}:\n{part}")
-                                last_gp2_msg.value = part # save if needed for ntrip start or delayed sending
-                            elif last_msg.msgtype == b'AHRS':
-                                last_ahrs_msg.value = part
-
-                        # if the last part is not a complete message, keep it to finish later.
-                        last_part = parts[-1]
-                        if last_msg.valid:
-                            last_parts_all_formats.append(b'') # empty 'last part' if complete, so it is shortest
-                        else:
-                            #debug_print(f"\ninvalid last part for {start_char}: {last_part}\n")
-                            #print(f"invalid last message: {last_msg}")
-                            last_parts_all_formats.append(last_part)
-
-                    # use the smaller of the invalid last parts which should match the correct format.
-                    # TODO - could this be wrong if # appears in RTCM message? may need other check for right format.
-                    #print(f"last_parts_all_formats: {last_parts_all_formats}")
-                    last_part = min(last_parts_all_formats, key=lambda x: len(x))
-                    #debug_print(f"\nsmaller last part: {last_part}")
-                    buffered_partial_message = last_part
-
-                    if log_on and log_file: #TODO - what about close in mid-write? could pass message and close here. or catch exception
-                        #pass
-                        #debug_print(in_data.decode())
-                        #log_file.write("< " + str(flush_counter) + " >")
-                        log_file.write(in_data)
-                        #periodically flush so we see file size progress
-                        flush_counter += 1
-                        #debug_print("< "+str(flush_counter)+" >")
-                        if flush_counter >= FLUSH_FREQUENCY:
-                            flush_counter = 0
-                            log_file.flush()
-                            os.fsync(log_file.fileno())
+                    #read everything to make sure it's up to date. could read one or multiple messages.
+                    #one chunk from serial, or one per datagram from UDP (memoryviews, valid until the next read)
+                    read_ns = time.perf_counter_ns() if latency_stats else 0
+                    in_chunks = data_connection.read_chunks()
+                    #debug_print(f"\nin data: <{in_chunks}>")
+
+                    # message offsets in in_data for the log index, if the log writer makes one
+                    index_points = [] if log_on and log_file and log_file.index else None
+                    chunk_start = message_framer.total_bytes()
+                    # split into whole messages of any format. partial messages stay in the framer for the next read
+                    for chunk in in_chunks:
+                        message_framer.add_data(chunk)
+                    if io_stats and in_chunks:
+                        io_stats.record_read(sum(len(chunk) for chunk in in_chunks))
+                    for frame_format, part in message_framer.frames():
+                        if latency_stats:
+                            frame_ns = time.perf_counter_ns()
+                        last_msg = frame_schemes[frame_format].parse_message(part)
+                        #print(f"last_msg: {last_msg}")
+                        if io_stats:
+                            io_stats.record_message(last_msg, len(part))
+                        if not last_msg.valid:
+                            #debug print invalid?
+                            continue
+                        if latency_stats:
+                            latency_stats.record_parse(last_msg.msgtype, read_ns, frame_ns, time.perf_counter_ns())
+                        #debug_print(last_msg)
+                        if index_points is not None:
+                            index_points.append((message_framer.frame_offset - chunk_start, last_msg))
+                        if last_msg.msgtype == b'INS':
+                            ins_ring.write(last_msg, read_ns) #send valid INS message to monitor
+                            #debug_print(f"\nlast_ins_msg {frame_format}:\n{last_msg}")
+                        elif last_msg.msgtype in [b'IMU', b'IM1', b'IMX']:
+                            last_imu_time.value = last_msg.imu_time_ms
+                            imu_ring.write(last_msg, read_ns) #send valid IMU message to monitor
+                            #debug_print(f"\nlast_imu_msg {frame_format}:\n{last_msg}")
+                        elif last_msg.msgtype == b'HDG':
+                            hdg_ring.write(last_msg, read_ns)
+                            #debug_print(f"\nlast_hdg_msg {frame_format}:\n{last_msg}")
+                        elif last_msg.msgtype == b'GPS':
+                            #debug_print(f"\nlast_gps_msg {frame_format}:\n{last_msg}")
+                            gps_ring.write(last_msg, read_ns)
+                            gps_received.value = 1 #will allow setting gga on in ntrip
+                            #build and send GGA message if ntrip on
+                            if ntrip_on.value and ntrip_reader and ntrip_gga:
+                                # build GGA
+                                gga_message = build_gga(last_msg)
+                                try:
+                                    ntrip_reader.sendall(gga_message)
+                                except Exception as e: #ntrip error, not data_connection
+                                    #TODO - handle this as if ntrip disconnected? then close (if open) and retry
+                                    debug_print("error sending gga message")
+                        elif last_msg.msgtype == b'GP2':
+                            #print(f"\nlast_gp2_msg {frame_format}:\n{part}")
+                            gp2_ring.write(last_msg, read_ns)
+                        elif last_msg.msgtype == b'AHRS':
+                            ahrs_ring.write(last_msg, read_ns)
+
+                    if io_stats:
+                        io_stats.record_framer(message_framer)
+                        if type(data_connection) is UDPConnection:
+                            io_stats.set_global("udp_datagrams_dropped",
+                                                data_connection.receive_counts()["datagrams_dropped"])
+                        if log_file:
+                            io_stats.set_global("log_bytes_dropped", log_file.dropped_bytes)
+
+                    if log_on and log_file:
+                        in_data = b''.join(in_chunks)  # copy: UDP chunks get reused by the next read
+                        # queued for the writer thread. the framer's leftover is a partial message, so the last
+                        # whole message in this chunk ends before it
+                        log_file.write(in_data, len(in_data) - message_framer.remaining_length(), index_points)
             except (socket.error, socket.herror, socket.gaierror, socket.timeout, serial.SerialException, serial.SerialTimeoutException) as e:
                 # connection errors: indicate connection lost. I only saw the the serial errors happen here.
                 print("connection error: "+str(e)+"\nplease reconnect") #TODO - auto-reconnect after error?
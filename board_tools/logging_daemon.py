@@ -0,0 +1,146 @@
+#headless logging of several units at once: one process, one event loop, one AsyncUnitEngine per unit.
+#usage: python logging_daemon.py units.json
+#units.json is a list of units, each one of:
+#   {"serial_number": "123456"}                                      serial, ports found by IMUBoard.auto_from_sn
+#   {"control_port": "COM6", "data_port": "COM3", "baud": 921600}    serial, ports given
+#   {"udp_ip": "192.168.1.111", "udp_data_port": 1111, "udp_config_port": 2222}
+#optional for any unit: "name", used in reports and in the log name if there is no serial number.
+#each unit logs to its own file in the logs folder. stop with ctrl-c.
+
+import os
+import sys
+import time
+import json
+import pathlib
+import asyncio
+
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools import *
+from async_ioloop import AsyncUnitEngine, AsyncSerialPort, AsyncUDPPort, run_engines
+from log_config import default_log_name
+from user_program_config import DAEMON_REPORT_SECONDS
+
+
+# message counts for one unit, fed by the engine's on_message
+class UnitStats:
+    def __init__(self):
+        self.type_counts = {}
+
+    def on_message(self, message):
+        self.type_counts[message.msgtype] = self.type_counts.get(message.msgtype, 0) + 1
+
+
+# connect to the unit's control port and open its data port. returns (board, data port, serial number) or None
+def connect_unit(unit):
+    if "udp_ip" in unit:
+        board = IMUBoard.from_udp(unit["udp_ip"], data_port=None, control_port=unit.get("udp_config_port"))
+        if not board:
+            return None
+        serial_number = board.retry_get_serial() if unit.get("udp_config_port") else None
+        data_port = AsyncUDPPort(unit["udp_ip"], unit["udp_data_port"])
+    else:
+        if "serial_number" in unit:
+            board = IMUBoard.auto_from_sn(str(unit["serial_number"]))
+        else:
+            board = IMUBoard(data_port=unit["data_port"], control_port=unit["control_port"],
+                             baud=unit.get("baud", DEFAULT_BAUD), try_manual=False)
+        if not board or not getattr(board, "data_port_name", None):
+            return None
+        serial_number = board.retry_get_serial()
+        # the engine opens the data port again on its own
+        data_baud = board.data_connection.connection.baudrate
+        board.data_connection.close()
+        data_port = AsyncSerialPort(board.data_port_name, data_baud)
+    if serial_number:
+        serial_number = serial_number.decode()
+    return board, data_port, serial_number
+
+
+# bytes and messages since the last report for each unit, then the total
+def print_report(engines, stats, last_counts, interval, title=None):
+    total_bytes_rate = total_message_rate = total_dropped = 0
+    lines = []
+    for engine in engines:
+        last_bytes, last_messages = last_counts.get(engine, (0, 0))
+        bytes_rate = (engine.bytes_read - last_bytes) / interval
+        message_rate = (engine.message_count - last_messages) / interval
+        dropped = getattr(engine.data_port, "dropped_bytes", 0) + (engine.log_file.dropped_bytes if engine.log_file else 0)
+        last_counts[engine] = (engine.bytes_read, engine.message_count)
+        total_bytes_rate += bytes_rate
+        total_message_rate += message_rate
+        total_dropped += dropped
+        types = ", ".join(f"{msgtype.decode()}: {count}" for msgtype, count in sorted(stats[engine].type_counts.items()))
+        lines.append(f"{engine.name:<24} {engine.bytes_read / 1e6:10.2f} MB {bytes_rate / 1e3:10.1f} kB/s "
+                     f"{message_rate:10.1f} msg/s  dropped {dropped} B  ({types})")
+    lines.append(f"{'total (' + str(len(engines)) + ' units)':<24} {sum(e.bytes_read for e in engines) / 1e6:10.2f} MB "
+                 f"{total_bytes_rate / 1e3:10.1f} kB/s {total_message_rate:10.1f} msg/s  dropped {total_dropped} B")
+    print("\n" + (title or time.ctime()) + "\n" + "\n".join(lines), flush=True)
+
+
+async def report_loop(engines, stats):
+    last_counts = {}
+    last_time = time.time()
+    while True:
+        await asyncio.sleep(DAEMON_REPORT_SECONDS)
+        current_time = time.time()
+        print_report(engines, stats, last_counts, current_time - last_time)
+        last_time = current_time
+
+
+# connect one unit at a time (serial auto detection opens every port), then log them all together.
+# runs inside the event loop since the engines' queues need it on Python 3.9.
+async def run_daemon(units):
+    boards = []
+    engines = []
+    stats = {}
+    for unit in units:
+        try:
+            connected = connect_unit(unit)
+        except Exception as e:
+            print(f"{unit}: {type(e).__name__}: {e}")
+            connected = None
+        if not connected:
+            print(f"could not connect to unit {unit}, skipping it")
+            continue
+        board, data_port, serial_number = connected
+        name = unit.get("name") or (f"SN {serial_number}" if serial_number else str(data_port))
+        if serial_number:
+            log_name = default_log_name(serial_number)
+        else:
+            log_base, log_extension = os.path.splitext(default_log_name())
+            log_name = log_base + "_" + name.replace(" ", "_").replace(":", "_") + log_extension
+        unit_stats = UnitStats()
+        boards.append(board)
+        engines.append(AsyncUnitEngine(data_port, name=name, log_name=log_name, on_message=unit_stats.on_message))
+        stats[engines[-1]] = unit_stats
+        print(f"{name}: logging to {log_name}")
+    if not engines:
+        return
+
+    start_time = time.time()
+    report_task = asyncio.create_task(report_loop(engines, stats))
+    try:
+        await run_engines(engines)
+    finally:
+        report_task.cancel()
+        run_seconds = max(time.time() - start_time, 1e-9)
+        print_report(engines, stats, {}, run_seconds, title=f"average over the whole run ({run_seconds:.0f} s)")
+        for board in boards:
+            board.release_connections()
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python logging_daemon.py units.json")
+        return
+    with open(sys.argv[1], 'r') as units_file:
+        units = json.load(units_file)
+    try:
+        asyncio.run(run_daemon(units))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#rolling time series plots for the monitor windows (user_program.py and x3_tool.py): one graph per PLOT_GROUPS entry,
+#fed with the decoded messages from each monitor refresh. samples go in a SampleRing per message type, then each
+#draw reduces the window to min / max per pixel column and moves the existing canvas lines, so drawing cost depends
+#on the graph width and not on the message rate.
+
+import sys
+import time
+import pathlib
+import numpy as np
+import PySimpleGUI as sg
+
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools import SampleRing, downsample_min_max
+from user_program_config import PLOT_WINDOW_SECONDS, PLOT_RING_SAMPLES, PLOT_DRAW_MS, PLOT_GRAPH_SIZE, PLOT_MARGIN, \
+    PLOT_LABEL_WIDTH, PLOT_BACKGROUND, PLOT_FONT
+
+
+class MonitorPlots:
+
+    # groups: (title, message type, [(label, fields, color)]) like PLOT_GROUPS
+    def __init__(self, groups, window_seconds=PLOT_WINDOW_SECONDS, capacity=PLOT_RING_SAMPLES):
+        self.groups = groups
+        self.window_ms = window_seconds * 1000
+        # one ring per message type, with every field its plots use
+        ring_fields = {}
+        for title, msgtype, series in groups:
+            fields = ring_fields.setdefault(msgtype, [])
+            for label, series_fields, color in series:
+                fields += [field for field in series_fields if field not in fields]
+        self.rings = {msgtype: SampleRing(fields, capacity) for msgtype, fields in ring_fields.items()}
+        width, height = PLOT_GRAPH_SIZE
+        self.graphs = [sg.Graph(PLOT_GRAPH_SIZE, (0, 0), (width, height), background_color=PLOT_BACKGROUND)
+                       for _ in groups]
+        self.canvas_items = None  # lines and labels of each graph, made on the first draw once the window exists
+        self.last_draw_time = 0
+
+    def tab(self, title, key):
+        return sg.Tab(title, [[graph] for graph in self.graphs], key=key)
+
+    # decoded messages of one type, eg from MessageRing.read_new(). call every refresh so the plots have the
+    # history when their tab opens
+    def add(self, msgtype, messages):
+        ring = self.rings.get(msgtype)
+        if ring is not None and messages:
+            ring.add_messages(messages)
+
+    # redraw every graph, at most once per PLOT_DRAW_MS. call when the plot tab is showing
+    def draw(self):
+        now = time.time()
+        if now - self.last_draw_time < PLOT_DRAW_MS / 1000:
+            return
+        self.last_draw_time = now
+        if self.canvas_items is None:
+            self.canvas_items = [self.create_items(graph, group) for graph, group in zip(self.graphs, self.groups)]
+        for graph, group, items in zip(self.graphs, self.groups, self.canvas_items):
+            self.draw_graph(graph.TKCanvas, group, items)
+
+    # title and series labels on top, value range labels on the left, and one line per series
+    def create_items(self, graph, group):
+        canvas = graph.TKCanvas
+        title, msgtype, series = group
+        title_item = canvas.create_text(PLOT_LABEL_WIDTH, PLOT_MARGIN / 2, text=title, anchor="w", font=PLOT_FONT)
+        label_x = canvas.bbox(title_item)[2] + PLOT_MARGIN
+        for label, fields, color in series:
+            label_item = canvas.create_text(label_x, PLOT_MARGIN / 2, text=label, anchor="w", fill=color, font=PLOT_FONT)
+            label_x = canvas.bbox(label_item)[2] + PLOT_MARGIN / 2
+        high_item = canvas.create_text(PLOT_LABEL_WIDTH - 4, PLOT_MARGIN, text="", anchor="ne", font=PLOT_FONT)
+        low_item = canvas.create_text(PLOT_LABEL_WIDTH - 4, PLOT_GRAPH_SIZE[1], text="", anchor="se", font=PLOT_FONT)
+        lines = [canvas.create_line(0, 0, 0, 0, fill=color, state="hidden") for label, fields, color in series]
+        return high_item, low_item, lines
+
+    def draw_graph(self, canvas, group, items):
+        title, msgtype, series = group
+        high_item, low_item, lines = items
+        ring = self.rings[msgtype]
+        end_time = ring.latest_time()
+        if end_time is None:
+            return
+        start_time = end_time - self.window_ms
+        times, values = ring.since(start_time)
+        columns = np.empty((len(times), len(series)))
+        for index, (label, fields, color) in enumerate(series):
+            field_values = values[:, [ring.fields.index(field) for field in fields]]
+            columns[:, index] = field_values[:, 0] if len(fields) == 1 else np.sqrt((field_values ** 2).sum(axis=1))
+
+        width, height = PLOT_GRAPH_SIZE
+        plot_width = width - PLOT_LABEL_WIDTH
+        plot_height = height - PLOT_MARGIN
+        times, columns = downsample_min_max(times, columns, start_time, end_time, plot_width)
+        finite = columns[np.isfinite(columns)]
+        if len(finite) == 0:
+            for line in lines:
+                canvas.itemconfigure(line, state="hidden")
+            canvas.itemconfigure(high_item, text="")
+            canvas.itemconfigure(low_item, text="")
+            return
+        low, high = finite.min(), finite.max()
+        if high - low < 1e-9:  # flat line: put it in the middle
+            low, high = low - 1, high + 1
+        canvas.itemconfigure(high_item, text="%.4g" % high)
+        canvas.itemconfigure(low_item, text="%.4g" % low)
+
+        # canvas y goes down, from the top of the plot area under the title
+        x = PLOT_LABEL_WIDTH + (times - start_time) * (plot_width / self.window_ms)
+        y = PLOT_MARGIN + (high - columns) * (plot_height / (high - low))
+        for index, line in enumerate(lines):
+            present = np.isfinite(y[:, index])
+            if present.sum() < 2:
+                canvas.itemconfigure(line, state="hidden")
+                continue
+            canvas.coords(line, np.column_stack((x[present], y[present, index])).ravel().tolist())
+            canvas.itemconfigure(line, state="normal")
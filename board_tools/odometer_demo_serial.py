@@ -5,16 +5,20 @@
 
 import serial
 from time import sleep
+import sys
+import pathlib
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools.checksums import ascii_checksum
+from tools.readable_scheme import int_to_ascii
 
 config_port = "COM6" # configuration port for usb connection - use user program to check it.
 con = serial.Serial(config_port, 921600) #default baudrate is 921600
 
 
+#checksum: xor all the bytes together, return as hex string
 def compute_checksum(data):
-    total = 0
-    for num in data: #this treats each byte as an integer
-        total ^= num #xor each byte
-    return format(total, 'x')
+    return int_to_ascii(ascii_checksum(data)).decode()
 
 
 while True:
@@ -8,6 +8,12 @@
 import socket
 from time import sleep
 from random import uniform
+import sys
+import pathlib
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools.checksums import ascii_checksum
+from tools.readable_scheme import int_to_ascii
 
 A1_ip = "192.168.1.111" #"10.1.10.21" #address of your unit on the network - see user configurations.
 
@@ -21,10 +27,7 @@ ODO_RATE_HZ = 100.0 #pick the rate to send odometer messages
 
 #checksum: xor all the bytes together, return as hex string
 def compute_checksum(data):
-    total = 0
-    for num in data: #this treats each byte as an integer
-        total ^= num #xor each byte
-    return format(total, 'x')
+    return int_to_ascii(ascii_checksum(data)).decode()
 
 
 while True:
@@ -14,6 +14,12 @@
 
 import socket
 import select
+import sys
+import pathlib
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools.checksums import ascii_checksum
+from tools.readable_scheme import int_to_ascii
 
 A1_ip = "10.1.10.107" #CHANGE TO: address of your unit on the network - see user configurations.
 data_udp_port = 1111 #CHANGE TO: "udp computer data port" configuration
@@ -31,10 +37,7 @@ MAX_READ = 1024 #for output data reads
 
 #our message checksum: xor all the bytes together, return as hex string
 def compute_checksum(data):
-    total = 0
-    for num in data: #this counts each byte of the data
-        total ^= num #xor each byte
-    return format(total, 'x')
+    return int_to_ascii(ascii_checksum(data)).decode()
 
 
 counter = 0 #CHANGE TO: you can remove this after putting proper checks for rtcm and odometer ready
@@ -0,0 +1,213 @@
+#parser throughput benchmarks on synthetic data: every output message type in each wire format, mixed streams,
+#the X3 binary + ASCII stream, and the io_loop parse path (MessageFramer, then the scheme for each frame).
+#for each one: messages per second, bytes per second, and memory allocated per parsed message.
+#usage: python parse_benchmark.py [results.json [filter]]    run all benchmarks, or those with filter in the name
+#                                                            (eg io_loop or IMU), save results as JSON
+#       python parse_benchmark.py compare old.json new.json   compare two saved runs, eg from two commits
+
+import gc
+import sys
+import json
+import time
+import pathlib
+import platform
+import subprocess
+import tracemalloc
+
+parent_dir = str(pathlib.Path(__file__).parent)
+sys.path.append(parent_dir+'/src')
+from tools import *
+from tools.binary_and_ascii_scheme import Binary_and_ASCII_Scheme
+from user_program_config import BENCHMARK_MESSAGES, BENCHMARK_REPEATS, BENCHMARK_CHUNK_BYTES
+
+SCHEMES = {FRAME_ASCII: ReadableScheme, FRAME_BINARY: Binary_Scheme, FRAME_RTCM: RTCM_Scheme}
+
+
+def chunked(data, chunk_size=BENCHMARK_CHUNK_BYTES):
+    return [data[i: i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+# each benchmark is a run(kept) function returning the number of valid messages. kept: list to keep the messages in
+
+# one scheme's parse_message on whole frames
+def scheme_benchmark(scheme_class, frames):
+    def run(kept=None):
+        scheme = scheme_class()
+        valid = 0
+        for frame in frames:
+            message = scheme.parse_message(frame)
+            if message.valid:
+                valid += 1
+            if kept is not None:
+                kept.append(message)
+        return valid
+    return run
+
+
+# X3 data port: Binary_and_ASCII_Scheme's state machine on each chunk, then parse each message it finds
+def x3_scheme_benchmark(chunks):
+    def run(kept=None):
+        scheme = Binary_and_ASCII_Scheme()
+        valid = 0
+        for chunk in chunks:
+            for message_type, message_data in scheme.process_bytes(chunk):
+                message = scheme.parse_typed_message(message_type, message_data)
+                if message.valid:
+                    valid += 1
+                if kept is not None:
+                    kept.append(message)
+        return valid
+    return run
+
+
+# the io_loop read path: frame each chunk, parse each frame with the scheme for its format
+def io_loop_benchmark(chunks):
+    def run(kept=None):
+        frame_schemes = {frame_format: scheme_class() for frame_format, scheme_class in SCHEMES.items()}
+        framer = MessageFramer()
+        valid = 0
+        for chunk in chunks:
+            framer.add_data(chunk)
+            for frame_format, part in framer.frames():
+                message = frame_schemes[frame_format].parse_message(part)
+                if message.valid:
+                    valid += 1
+                if kept is not None:
+                    kept.append(message)
+        return valid
+    return run
+
+
+# name -> (run function, message count, byte count)
+def all_benchmarks(message_count=BENCHMARK_MESSAGES):
+    benchmarks = {}
+    for wire_format, scheme_class in SCHEMES.items():
+        for name in SYNTHETIC_MESSAGE_NAMES[wire_format] + ["mixed"]:
+            frames = synthetic_stream(wire_format, message_count, None if name == "mixed" else name)
+            benchmarks[f"{scheme_class.__name__}/{name}"] = (scheme_benchmark(scheme_class, frames), len(frames),
+                                                            sum(len(frame) for frame in frames))
+    x3_data = b''.join(synthetic_stream("X3", message_count))
+    benchmarks["Binary_and_ASCII_Scheme/X3 mixed"] = (x3_scheme_benchmark(chunked(x3_data)), message_count, len(x3_data))
+    for wire_format in [FRAME_ASCII, FRAME_BINARY, FRAME_RTCM, "X3"]:
+        data = b''.join(synthetic_stream(wire_format, message_count))
+        benchmarks[f"io_loop/{wire_format} mixed"] = (io_loop_benchmark(chunked(data)), message_count, len(data))
+    return benchmarks
+
+
+# fastest of BENCHMARK_REPEATS runs, then one run under tracemalloc keeping every message (allocated per message)
+# and one without (peak working memory, like io_loop which drops each message after using it)
+def measure(run, message_count, byte_count, repeats=BENCHMARK_REPEATS):
+    best_seconds = None
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        valid = run()
+        seconds = time.perf_counter() - start
+        best_seconds = seconds if best_seconds is None else min(best_seconds, seconds)
+
+    gc.collect()
+    tracemalloc.start()
+    run()
+    peak_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    kept = []
+    tracemalloc.start()
+    run(kept)
+    kept_bytes = tracemalloc.get_traced_memory()[0]
+    kept_blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    tracemalloc.stop()
+    del kept
+
+    return {
+        "messages": message_count,
+        "valid_messages": valid,
+        "bytes": byte_count,
+        "seconds": best_seconds,
+        "messages_per_second": message_count / best_seconds,
+        "bytes_per_second": byte_count / best_seconds,
+        "us_per_message": best_seconds / message_count * 1e6,
+        "allocated_bytes_per_message": kept_bytes / message_count,
+        "allocated_blocks_per_message": kept_blocks / message_count,
+        "peak_working_bytes": peak_bytes,
+    }
+
+
+# short commit hash and whether the tree has changes, or None outside a git checkout
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        changes = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=parent_dir,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(changes)
+
+
+def run_benchmarks(output_path=None, name_filter=None):
+    commit, changed = git_commit()
+    results = {}
+    print(f"{'benchmark':<40} {'msg/s':>10} {'MB/s':>8} {'us/msg':>8} {'B/msg':>8} {'blocks':>7} {'peak kB':>8}")
+    for name, (run, message_count, byte_count) in all_benchmarks().items():
+        if name_filter and name_filter not in name:
+            continue
+        result = measure(run, message_count, byte_count)
+        results[name] = result
+        print(f"{name:<40} {result['messages_per_second']:10.0f} {result['bytes_per_second'] / 1e6:8.2f} "
+              f"{result['us_per_message']:8.2f} {result['allocated_bytes_per_message']:8.0f} "
+              f"{result['allocated_blocks_per_message']:7.1f} {result['peak_working_bytes'] / 1e3:8.1f}", flush=True)
+        if result["valid_messages"] != message_count:
+            print(f"    only {result['valid_messages']} of {message_count} messages were valid")
+
+    run_info = {
+        "commit": commit,
+        "uncommitted_changes": changed,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "messages": BENCHMARK_MESSAGES,
+        "repeats": BENCHMARK_REPEATS,
+        "chunk_bytes": BENCHMARK_CHUNK_BYTES,
+        "results": results,
+    }
+    if not output_path:
+        output_path = f"parse_benchmark_{commit or 'results'}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output_path, 'w') as output_file:
+        json.dump(run_info, output_file, indent=2)
+    print(f"saved results to {output_path}")
+
+
+# throughput and allocation change of each benchmark in both runs
+def compare_results(old_path, new_path):
+    with open(old_path, 'r') as old_file:
+        old_run = json.load(old_file)
+    with open(new_path, 'r') as new_file:
+        new_run = json.load(new_file)
+    print(f"old: {old_run.get('commit')} {old_run.get('time')}    new: {new_run.get('commit')} {new_run.get('time')}")
+    if old_run.get("platform") != new_run.get("platform") or old_run.get("python") != new_run.get("python"):
+        print("runs are from different machines or Python versions")
+    print(f"{'benchmark':<40} {'old msg/s':>10} {'new msg/s':>10} {'change':>8} {'old B/msg':>10} {'new B/msg':>10}")
+    for name, new in new_run["results"].items():
+        old = old_run["results"].get(name)
+        if old is None:
+            print(f"{name:<40} {'':>10} {new['messages_per_second']:10.0f} {'new':>8}")
+            continue
+        change = new["messages_per_second"] / old["messages_per_second"] - 1
+        print(f"{name:<40} {old['messages_per_second']:10.0f} {new['messages_per_second']:10.0f} {change:+8.1%} "
+              f"{old['allocated_bytes_per_message']:10.0f} {new['allocated_bytes_per_message']:10.0f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        if len(sys.argv) < 4:
+            print("usage: python parse_benchmark.py compare old.json new.json")
+            return
+        compare_results(sys.argv[2], sys.argv[3])
+    else:
+        run_benchmarks(sys.argv[1] if len(sys.argv) > 1 else None, sys.argv[2] if len(sys.argv) > 2 else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,17 @@ try:  # importing from inside the package
     from readable_scheme import ReadableScheme, int_to_ascii, ascii_to_int
     from rtcm_scheme import RTCM_Scheme
     from binary_scheme import Binary_Scheme
+    from binary_batch_decoder import decode_binary_data, decode_binary_file
+    from message_ring import MessageRing, create_monitor_rings, release_monitor_rings
+    from latency_stats import LatencyStats
+    from io_stats import IOStats
+    from sample_ring import SampleRing, downsample_min_max
+    from log_sniffer import sniff_log_format
+    from checksums import ascii_checksum, binary_checksum, crc24q, ascii_checksums_pass, binary_checksums_pass, rtcm_checksums_pass
+    from message_framer import MessageFramer, frames_from_file, next_frame_offset, FRAME_ASCII, FRAME_RTCM, FRAME_BINARY
+    from log_compression import open_log_reader, open_log_writer, log_data_size, compression_for_path, CompressedLogReader, CompressedLogWriter
+    from log_index import LogIndexBuilder, log_index_path, build_log_index, read_log_index, read_log_messages
+    from synthetic_messages import synthetic_stream, synthetic_message, SYNTHETIC_MESSAGE_NAMES
     from board import IMUBoard
     from connection import SerialConnection, FileReaderConnection, FileWriterConnection, UDPConnection
 except ModuleNotFoundError:  # importing from outside of the package
@@ -14,5 +25,16 @@ except ModuleNotFoundError:  # importing from outside of the package
     from tools.readable_scheme import ReadableScheme, int_to_ascii, ascii_to_int
     from tools.rtcm_scheme import RTCM_Scheme
     from tools.binary_scheme import Binary_Scheme
+    from tools.binary_batch_decoder import decode_binary_data, decode_binary_file
+    from tools.message_ring import MessageRing, create_monitor_rings, release_monitor_rings
+    from tools.latency_stats import LatencyStats
+    from tools.io_stats import IOStats
+    from tools.sample_ring import SampleRing, downsample_min_max
+    from tools.log_sniffer import sniff_log_format
+    from tools.checksums import ascii_checksum, binary_checksum, crc24q, ascii_checksums_pass, binary_checksums_pass, rtcm_checksums_pass
+    from tools.message_framer import MessageFramer, frames_from_file, next_frame_offset, FRAME_ASCII, FRAME_RTCM, FRAME_BINARY
+    from tools.log_compression import open_log_reader, open_log_writer, log_data_size, compression_for_path, CompressedLogReader, CompressedLogWriter
+    from tools.log_index import LogIndexBuilder, log_index_path, build_log_index, read_log_index, read_log_messages
+    from tools.synthetic_messages import synthetic_stream, synthetic_message, SYNTHETIC_MESSAGE_NAMES
     from tools.board import IMUBoard
     from tools.connection import SerialConnection, FileReaderConnection, FileWriterConnection, UDPConnection
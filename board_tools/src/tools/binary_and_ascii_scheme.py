@@ -16,6 +16,8 @@ except ModuleNotFoundError:  # importing from outside the package
     from tools.binary_scheme import *
 
 from enum import Enum
+from collections import deque
+import re
 
 states = Enum("states", [
     "start",
@@ -35,6 +37,10 @@ states = Enum("states", [
 
 READ_LIMIT_BYTES = 1000  # need a limit in case of wrong baud or wrong device. must be longer than longest message.
 
+# characters which end or interrupt the ASCII body state, see ascii_body_handler
+ASCII_BODY_SPECIAL_CHARS = re.compile(b"[" + re.escape(READABLE_CHECKSUM_SEPARATOR) + re.escape(BINARY_PREAMBLE[0:1])
+                                      + re.escape(READABLE_START) + b"]")
+
 
 class Binary_and_ASCII_Scheme(Scheme):
 
@@ -44,19 +50,43 @@ class Binary_and_ASCII_Scheme(Scheme):
         self.binary_scheme = Binary_Scheme()
         self.binary_length_counter = 0
         self.expected_body_length = 0
-        self.message_data = b""
+        self.message_data = bytearray()
         self.returned_message_type = None
+        self.pending_messages = deque()  # complete (type, data) from earlier reads, returned before reading again
+        self.state_handlers = {
+            states.start: self.start_handler,
+            states.ascii_preamble_1: self.ascii_preamble_1_handler,
+            states.ascii_preamble_2: self.ascii_preamble_2_handler,
+            states.ascii_body: self.ascii_body_handler,
+            states.ascii_cs1: self.ascii_cs1_handler,
+            states.ascii_cs2: self.ascii_cs2_handler,
+            states.binary_preamble: self.binary_preamble_handler,
+            states.binary_type: self.binary_type_handler,
+            states.binary_length: self.binary_length_handler,
+            states.binary_body: self.binary_body_handler,
+        }
 
     # send config messages in ASCII.
     def write_one_message(self, message, connection):
         self.ascii_scheme.write_one_message(message, connection)
 
     def read_one_message(self, connection):
-        message_type, message_data = self.mixed_reader(connection)
-
-        if not message_data:
+        if not self.pending_messages:
+            self.pending_messages.extend(self.mixed_reader(connection))
+        if not self.pending_messages:
             return None
-
+        message_type, message_data = self.pending_messages.popleft()
+        return self.parse_typed_message(message_type, message_data)
+
+    # all complete messages from one read, as a list of parsed messages. empty list if none
+    def read_messages(self, connection):
+        if not self.pending_messages:
+            self.pending_messages.extend(self.mixed_reader(connection))
+        parsed = [self.parse_typed_message(message_type, message_data) for message_type, message_data in self.pending_messages]
+        self.pending_messages.clear()
+        return parsed
+
+    def parse_typed_message(self, message_type, message_data):
         parsed_msg = Message()
         if message_type == "ASCII":
             self.ascii_scheme.set_fields_general(parsed_msg, message_data)
@@ -64,58 +94,77 @@ class Binary_and_ASCII_Scheme(Scheme):
             self.binary_scheme.set_fields_general(parsed_msg, message_data)
         return parsed_msg
 
-    # read one character at a time using state machine
+    # drop any partial or unread messages, eg after connection.reset_input_buffer
+    def reset(self):
+        self.state = states.start
+        self.message_data = bytearray()
+        self.pending_messages.clear()
+
+    # read whatever is available and run it through the state machine, returns list of (type, data)
     # on either start character, start reading message by the matching message format
     # on binary message: go until the specified length (unless too big) since C5, #, * could occur in binary data
     # on ASCII message: go until the *cs. or end early on C5, # which should not happen in message.
-
+    # keeps reading until at least one message is complete, the read times out, or READ_LIMIT_BYTES without a message.
     def mixed_reader(self, connection):
-        self.message_data = b""
-        self.returned_message_type = None
-        for i in range(READ_LIMIT_BYTES):
-            # trying approach 1: read one character at a time here, no reading inside the state handlers
-            next_char = connection.read(1)  # TODO - time out if next char doesn't read? -> return None or b""
-            if next_char is None or len(next_char) == 0:
-                # print("next_char is None")
-                return None, None
-
-            self.message_data += next_char   # do this here or inside handlers?
-            # or approach 2: read inside the handlers: can do multiple reads for binary preamble, checksum, message body
-
-            # do function for each state: make this a dictionary or something?
-            if self.state == states.start:
-                func = self.start_handler
-            elif self.state == states.ascii_preamble_1:
-                func = self.ascii_preamble_1_handler
-            elif self.state == states.ascii_preamble_2:
-                func = self.ascii_preamble_2_handler
+        bytes_read = 0
+        while bytes_read < READ_LIMIT_BYTES:
+            in_data = self.read_available(connection)
+            if not in_data:
+                return []
+            bytes_read += len(in_data)
+            messages = self.process_bytes(in_data)
+            if messages:
+                return messages
+        # reached read limit
+        return []
+
+    # one blocking read(1) so the connection timeout still applies, then everything else already waiting
+    def read_available(self, connection):
+        first_char = connection.read(1)
+        if not first_char:
+            return None
+        rest = connection.readall()
+        return first_char + rest if rest else first_char
+
+    # state machine over a whole buffer. partial message at the end is kept in self.state and self.message_data
+    def process_bytes(self, data):
+        messages = []
+        data_len = len(data)
+        i = 0
+        while i < data_len:
+            if self.state == states.binary_body:
+                # slice the rest of the body and checksum at once instead of one handler call per byte
+                take = min(self.expected_body_length - self.binary_length_counter, data_len - i)
+                self.message_data += data[i: i + take]
+                i += take
+                self.binary_length_counter += take
+                if self.binary_length_counter < self.expected_body_length:
+                    break  # need more data
+                self.returned_message_type = "Binary"
+                next_state, done = states.start, True
             elif self.state == states.ascii_body:
-                func = self.ascii_body_handler
-            elif self.state == states.ascii_cs1:
-                func = self.ascii_cs1_handler
-            elif self.state == states.ascii_cs2:
-                func = self.ascii_cs2_handler
-            elif self.state == states.binary_preamble:
-                func = self.binary_preamble_handler
-            elif self.state == states.binary_type:
-                func = self.binary_type_handler
-            elif self.state == states.binary_length:
-                func = self.binary_length_handler
-            elif self.state == states.binary_body:
-                func = self.binary_body_handler
+                # copy up to the next character that changes state, then handle that character
+                match = ASCII_BODY_SPECIAL_CHARS.search(data, i)
+                if match is None:
+                    self.message_data += data[i:]
+                    break
+                self.message_data += data[i: match.start()]
+                i = match.start()
+                next_char = data[i: i + 1]
+                i += 1
+                self.message_data += next_char
+                next_state, done = self.ascii_body_handler(next_char)
             else:
-                raise Exception(f"unexpected state: {self.state}")
-
-            next_state, done = func(next_char)  # if reading in mixed_reader
-            #print(next_char, func, next_state, done)
-
-            self.state = next_state  # set this in handlers instead of returning it?
+                next_char = data[i: i + 1]
+                i += 1
+                self.message_data += next_char
+                next_state, done = self.state_handlers[self.state](next_char)
 
+            self.state = next_state
             if done:
-                return self.returned_message_type, self.message_data
-            #print(f"mixed_reader iteration {i}: char is <{next_char}>")
-        # reached read limit
-        return None, None
+                messages.append((self.returned_message_type, bytes(self.message_data)))
+                self.message_data = bytearray()
+        return messages
 
     # methods for each state update:
 
@@ -127,7 +176,7 @@ class Binary_and_ASCII_Scheme(Scheme):
         elif next_char == READABLE_START:
             next_state = states.ascii_preamble_1
         else:
-            self.message_data = b""
+            self.message_data = bytearray()
             next_state = states.start
 
         return next_state, False
@@ -136,7 +185,7 @@ class Binary_and_ASCII_Scheme(Scheme):
         if next_char == OUR_TALKER[0:1]:  # have to index like this or it becomes an int.
             next_state = states.ascii_preamble_2
         else:
-            self.message_data = b""
+            self.message_data = bytearray()
             next_state = states.start
         return next_state, False
 
@@ -144,7 +193,7 @@ class Binary_and_ASCII_Scheme(Scheme):
         if next_char == OUR_TALKER[1:2]:  # have to index like this or it becomes an int.
             next_state = states.ascii_body
         else:
-            self.message_data = b""
+            self.message_data = bytearray()
             next_state = states.start
         return next_state, False
 
@@ -154,7 +203,7 @@ class Binary_and_ASCII_Scheme(Scheme):
         # ASCII start (#) after C5 -> start on ascii message?
         # not continuing checksum: go back to start.
         else:
-            self.message_data = b""
+            self.message_data = bytearray()
             next_state = states.start
         return next_state, False
 
@@ -186,13 +235,13 @@ class Binary_and_ASCII_Scheme(Scheme):
         if next_char == READABLE_CHECKSUM_SEPARATOR:
             # reached checksum of ASCII message
             next_state = states.ascii_cs1
-        elif next_char == BINARY_PREAMBLE[0]:
-            # early exit to new binary message.
-            self.message_data = b""
+        elif next_char == BINARY_PREAMBLE[0:1]:  # have to index like this or it becomes an int.
+            # early exit to new binary message: keep the C5 so the binary parser sees the whole preamble
+            self.message_data = bytearray(next_char)
             next_state = states.binary_preamble
         elif next_char == READABLE_START:
             # early exit to new ASCII message.
-            self.message_data = b""
+            self.message_data = bytearray()
             next_state = states.ascii_body
         else:
             # continue reading the ascii body
@@ -0,0 +1,195 @@
+import mmap
+import numpy as np
+try:  # importing from inside the package
+    from class_configs.binary_scheme_config import *
+    from class_configs.readable_scheme_config import HEADING_FLAGS
+    from log_compression import compression_for_path, open_log_reader
+    from checksums import binary_rows_checksums_pass
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.binary_scheme_config import *
+    from tools.class_configs.readable_scheme_config import HEADING_FLAGS
+    from tools.log_compression import compression_for_path, open_log_reader
+    from tools.checksums import binary_rows_checksums_pass
+
+# batch decoder for whole binary logs: frame the file once, then decode each message type with numpy.
+# gives the same values as Binary_Scheme.set_fields_general, but as one array per field instead of one Message each.
+
+# frames decoded per numpy block, limits memory use on very large logs
+BATCH_DECODE_BLOCK_FRAMES = 65536
+
+BINARY_HEADER_LENGTH = len(BINARY_PREAMBLE) + BINARY_TYPE_LENGTH + BINARY_LENGTH_LENGTH
+
+
+# numpy structured dtype for a BINARY_FORMAT_* list. packed, same layout as the struct codes.
+def binary_format_dtype(format_list):
+    endian_code = "<" if BINARY_ENDIAN == "little" else ">"
+    dtype_fields = []
+    for item in format_list:
+        name, format_name = item[0], item[1]
+        format_code = NUMBER_TYPES.get(format_name, format_name)
+        dtype_fields.append((name, endian_code + format_code))
+    return np.dtype(dtype_fields)
+
+
+# scale per field, 1 if the format has no scale
+def binary_format_scales(format_list):
+    return {item[0]: (item[2] if len(item) == 3 else 1) for item in format_list}
+
+
+BINARY_MESSAGE_DTYPES = {msgtype: binary_format_dtype(fmt) for msgtype, fmt in BINARY_MESSAGE_TYPES.items()}
+BINARY_MESSAGE_SCALES = {msgtype: binary_format_scales(fmt) for msgtype, fmt in BINARY_MESSAGE_TYPES.items()}
+
+
+# find message start positions in the whole buffer.
+# returns frame start indices (at preamble) and count of bad frames skipped
+def frame_binary_data(data):
+    data_len = len(data)
+    if data_len < BINARY_HEADER_LENGTH:
+        return np.zeros(0, dtype=np.int64), 0
+
+    preamble = np.frombuffer(BINARY_PREAMBLE, dtype=np.uint8)
+    candidates = np.flatnonzero((data[:-1] == preamble[0]) & (data[1:] == preamble[1]))
+    candidates = candidates[candidates + BINARY_HEADER_LENGTH <= data_len]  # need type and length bytes
+
+    msgtypes = data[candidates + len(BINARY_PREAMBLE)]
+    lengths = data[candidates + len(BINARY_PREAMBLE) + BINARY_TYPE_LENGTH].astype(np.int64)
+    ends = candidates + BINARY_HEADER_LENGTH + lengths + BINARY_CRC_LEN
+    known = np.isin(msgtypes, list(BINARY_EQUIVALENT_MESSAGE_TYPES))
+    complete = ends <= data_len
+
+    # next candidate after a whole message, or after the type byte of an unknown type like the stream reader does
+    next_after_message = np.searchsorted(candidates, ends).tolist()
+    next_after_unknown = np.searchsorted(candidates, candidates + len(BINARY_PREAMBLE) + BINARY_TYPE_LENGTH).tolist()
+    known = known.tolist()
+    complete = complete.tolist()
+
+    # the walk has to be sequential since each message decides where the next one starts,
+    # but it only does one step per message.
+    frame_indices = []
+    skipped = 0
+    k = 0
+    num_candidates = len(candidates)
+    while k < num_candidates:
+        if known[k]:
+            if not complete[k]:
+                break  # truncated message at end of file
+            frame_indices.append(k)
+            k = next_after_message[k]
+        else:
+            skipped += 1
+            k = next_after_unknown[k]
+    return candidates[frame_indices], skipped
+
+
+# decode all messages in a bytes-like buffer.
+# returns ({binary_msgtype: {field_name: array}}, errors_count). arrays are in message order within each type.
+def decode_binary_data(data):
+    data = np.frombuffer(data, dtype=np.uint8)
+    starts, errors_count = frame_binary_data(data)
+    if len(starts) == 0:
+        return {}, errors_count
+
+    body_start = starts + len(BINARY_PREAMBLE)
+    msgtypes = data[body_start].astype(np.int64)
+    lengths = data[body_start + BINARY_TYPE_LENGTH].astype(np.int64)
+
+    # group by type and length together, so each group is one 2d block of bytes
+    records_by_type = {}
+    group_keys = msgtypes * 256 + lengths
+    for group_key in np.unique(group_keys):
+        msgtype, payload_length = divmod(int(group_key), 256)
+        group_indices = np.flatnonzero(group_keys == group_key)
+        row_length = BINARY_TYPE_LENGTH + BINARY_LENGTH_LENGTH + payload_length + BINARY_CRC_LEN
+        msg_dtype = BINARY_MESSAGE_DTYPES.get(msgtype)
+        if msg_dtype is None or payload_length < msg_dtype.itemsize:
+            errors_count += len(group_indices)  # no format, or too short to unpack
+            continue
+
+        payload_ind = BINARY_TYPE_LENGTH + BINARY_LENGTH_LENGTH
+        windows = np.lib.stride_tricks.sliding_window_view(data, row_length)
+        for block_start in range(0, len(group_indices), BATCH_DECODE_BLOCK_FRAMES):
+            block_indices = group_indices[block_start: block_start + BATCH_DECODE_BLOCK_FRAMES]
+            rows = windows[body_start[block_indices]]
+            passed = binary_rows_checksums_pass(rows)
+            errors_count += int(len(passed) - np.count_nonzero(passed))
+            payloads = np.ascontiguousarray(rows[passed, payload_ind: payload_ind + msg_dtype.itemsize])
+            records = payloads.view(msg_dtype).reshape(-1)
+            records_by_type.setdefault(msgtype, []).append((block_indices[passed], records))
+
+    decoded = {}
+    for msgtype, parts in records_by_type.items():
+        # groups of different lengths are decoded separately, put back in file order
+        order = np.concatenate([indices for indices, _ in parts])
+        records = np.concatenate([recs for _, recs in parts])[np.argsort(order, kind="stable")]
+        decoded[msgtype] = decode_records(msgtype, records)
+    return decoded, errors_count
+
+
+# decode a whole log file, or bytes start to end of it, through mmap so it is not read into memory all at once.
+# compressed logs can't be mapped: the range is decompressed into memory, so split big ones (see log_chunk_bounds)
+def decode_binary_file(file_path, start=0, end=None):
+    if compression_for_path(file_path):
+        with open_log_reader(file_path) as log_file:
+            log_file.seek(start)
+            data = log_file.read() if end is None else log_file.read(end - start)
+        return decode_binary_data(np.frombuffer(data, dtype=np.uint8))
+    with open(file_path, "rb") as log_file:
+        try:
+            mapped = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file can't be mapped
+            return {}, 0
+        data = None
+        try:
+            data = np.frombuffer(mapped, dtype=np.uint8)[start:end]
+            return decode_binary_data(data)
+        finally:
+            del data  # release the buffer so the map can close
+            mapped.close()
+
+
+# structured records to columns, with the same scaling and derived fields as Binary_Scheme.set_fields_general
+def decode_records(msgtype, records):
+    columns = {}
+    for name, scale in BINARY_MESSAGE_SCALES[msgtype].items():
+        values = records[name]
+        columns[name] = values * scale if scale != 1 else values.copy()
+
+    # Binary GPS/GP2: 4 bit carrsoln, 4 bit fix type
+    if "carrsoln_and_fix" in columns:
+        columns["carrier_solution_status"] = columns["carrsoln_and_fix"] // 16
+        columns["gnss_fix_type"] = columns["carrsoln_and_fix"] % 16
+
+    # carrier solution >= 8 means GPS off. separate into two columns.
+    if "ins_solution_status_and_gps_used" in columns:
+        status_and_gps = columns["ins_solution_status_and_gps_used"]
+        gps_off = (status_and_gps >= 8) & (status_and_gps < 255)
+        columns["ins_solution_status"] = np.where(gps_off, status_and_gps - 8, status_and_gps)
+        columns["gps_used"] = ~gps_off
+
+    # imu time ns to ms conversion: keep both
+    for time_name in ["imu_time", "odometer_time", "sync_time"]:
+        if time_name + "_ns" in columns:
+            columns[time_name + "_ms"] = columns[time_name + "_ns"] / 1e6
+
+    # MEMS range conversions: 5 bits accel range, 11 bits rate range
+    if BINARY_EQUIVALENT_MESSAGE_TYPES.get(msgtype) in [b'IMU', b'IMX'] and "mems_ranges" in columns:
+        mems_ranges = columns["mems_ranges"].astype(np.int64)
+        columns["accel_range"] = mems_ranges // pow(2, 11)
+        columns["rate_range"] = mems_ranges - (columns["accel_range"] * pow(2, 11))
+        for accel_name in ["accel_x_g", "accel_y_g", "accel_z_g"]:
+            columns[accel_name] = columns["accel_range"] * columns[accel_name]
+        for rate_name in ["angrate_x_dps", "angrate_y_dps", "angrate_z_dps",
+                          "fog_angrate_x_dps", "fog_angrate_y_dps", "fog_angrate_z_dps"]:
+            if rate_name in columns:
+                columns[rate_name] = columns["rate_range"] * columns[rate_name]
+
+    # HDG flags, same bits as extract_flags_HDG
+    if msgtype == BINARY_MSGTYPE_HDG and "flags" in columns:
+        flags = columns["flags"].astype(np.int64)
+        for position, flag_name in HEADING_FLAGS.items():
+            columns[flag_name] = (flags >> position) & 1
+        columns["carrSoln"] = 2 * columns["carrSoln_bit2"] + columns["carrSoln_bit1"]
+
+    # X3 siphog status bits stay packed in status_info: Binary_Scheme splits them into dicts per message,
+    # which don't fit in columns.
+    return columns
@@ -1,21 +1,27 @@
 from ctypes import *
 import os
 import struct
-from bitstring import Bits
-from pyrtcm import RTCMReader, crc2bytes, calc_crc24q
 try:  # importing from inside the package
     #from pyrtcm import RTCMReader, RTCMParseError
     #from pyrtcm.rtcmtypes_core import ERR_RAISE, ERR_LOG, ERR_IGNORE
     from class_configs.binary_scheme_config import * #TODO make config file with fomats
     from readable_scheme import extract_flags_HDG, SIPHOG_STATUS_BIT_POSITIONS, nth_bit
-    from message_scheme import Scheme, Message
+    from message_scheme import Scheme, Message, compile_scaled_format
+    from message_records import BINARY_RECORD_CLASSES
+    from checksums import binary_checksum
 except ModuleNotFoundError:  # importing from outside the package
     from tools.class_configs.binary_scheme_config import *
     from tools.readable_scheme import extract_flags_HDG, SIPHOG_STATUS_BIT_POSITIONS, nth_bit
-    from tools.message_scheme import Scheme, Message
+    from tools.message_scheme import Scheme, Message, compile_scaled_format
+    from tools.message_records import BINARY_RECORD_CLASSES
+    from tools.checksums import binary_checksum
 
 #decoder for our custom binary messages, shorter than RTCM format
 
+# struct and scales for each message type, compiled once here instead of on every message
+BINARY_MESSAGE_CODECS = {msgtype: compile_scaled_format(msg_format, BINARY_ENDIAN, NUMBER_TYPES)
+                         for msgtype, msg_format in BINARY_MESSAGE_TYPES.items()}
+
 class Binary_Scheme(Scheme):
 
     # simple version by getting data between preambles. TODO - use state machine and check the length
@@ -27,29 +33,30 @@ class Binary_Scheme(Scheme):
         # TODO - sometimes preamble ends in C5 or 50 byte, so this causes about 2/256 checksum fails.
 
         if read_data:
-            parsed_msg = Message()
+            parsed_msg = self.new_message(read_data)
             self.set_fields_general(parsed_msg, read_data)
             return parsed_msg
 
+    # record for the type byte, after the preamble if there is one
+    def new_message(self, data):
+        type_index = len(BINARY_PREAMBLE) if data[:len(BINARY_PREAMBLE)] == BINARY_PREAMBLE else 0
+        if len(data) <= type_index:
+            return Message()
+        return BINARY_RECORD_CLASSES.get(data[type_index], Message)()
+
     # try using length field -> do actual state machine or just go through all steps in one function call?
-    # TODO - reading fixed number of characters may not work on UDP connection -> add a buffer?
     def read_one_message_withlength(self, connection):
         m = Message()
         m.valid = False  # set_fields_general will set this true if it parses correctly.
 
         # read until preamble, keep going until preamble found or length limit
         find_preamble_tries = 200
-        buf = b''
-        found_preamble = False
-        for i in range(find_preamble_tries):
-            next_char = connection.read(1)
-            if next_char in [b'', None]:
-                return None  # happens at end of file or closed port -> let calling function handle it.
-            buf += next_char
-            if buf.endswith(BINARY_PREAMBLE):
-                found_preamble = True
-                break
-        if not found_preamble:
+        buf = connection.read_until(BINARY_PREAMBLE, find_preamble_tries)
+        if not buf:
+            return None  # happens at end of file or closed port -> let calling function handle it.
+        if buf[-len(BINARY_PREAMBLE):] != BINARY_PREAMBLE:
+            if len(buf) < find_preamble_tries:
+                return None  # stopped early without preamble: end of file or closed port
             return m  # empty message , so it reads as invalid message instead of port closed
 
         # get type, reset if not a known type.
@@ -233,8 +240,7 @@ class Binary_Scheme(Scheme):
         if msgtype not in BINARY_MESSAGE_TYPES:
             return
 
-        msg_format = BINARY_MESSAGE_TYPES[msgtype]
-        self.set_fields_from_list_scaled(message, msg_format, payload)
+        self.set_fields_from_codec(message, BINARY_MESSAGE_CODECS[msgtype], payload)
 
         # any parsing special cases go here
         # HDG: extra flags to extract
@@ -271,65 +277,24 @@ class Binary_Scheme(Scheme):
 
     #version with optional scale factor as 3rd number of tuple in format_list
     def set_fields_from_list_scaled(self, message, format_list, data):
-        try:
-            #print(f'Payload length: {message.payload_length}')
-            data_offset = 0
-            for item in format_list:
-                if len(item) == 3:
-                    name, format_name, scale = item
-                elif len(item) == 2:
-                    name, format_name = item
-                    scale = 1
-                else:
-                    #print(f"wrong length in format: {item}")
-                    continue
-                format_str = "<" if BINARY_ENDIAN == "little" else ">"
-                format_code = NUMBER_TYPES.get(format_name, format_name)  # lookup name -> code. if not found, name itself is the code
-                format_str += format_code
-                chunk_size = struct.calcsize(format_str)
-                data_chunk = data[data_offset:data_offset+chunk_size]
-                #message.setattr()
-                #value = struct.unpack_from(format_str, data, offset=data_offset)[0]
-                value = struct.unpack(format_str, data_chunk)[0]
-                data_offset += chunk_size #struct.calcsize(format_str)
-                #scale the value if numerical, put in the message.
-                # todo: should it put the un-scaled value in the message too? group the values as a dictionary?
-
-                if type(value) in [int, float]:
-                    scaled_value = scale * value
-                else:
-                    scaled_value = value
-
-                # setattr(message, name, value)
-                #setattr(message, name+"_scaled", scaled_value)
-                setattr(message, name, scaled_value) #scaled only
-
-                # print(f"\nfor item {item}:")
-                # print(f"format_str = {format_str}")
-                # print(f"chunk_size = {chunk_size}")
-                # print(f"data_chunk = {data_chunk}")
-                # print(f"value = {value}")
-                # print(f"scaled value = {scaled_value}")
+        self.set_fields_from_codec(message, compile_scaled_format(format_list, BINARY_ENDIAN, NUMBER_TYPES), data)
 
+    # decode with a format from compile_scaled_format: one unpack for the whole payload, then scale each value
+    def set_fields_from_codec(self, message, codec, data):
+        field_struct, names, scales = codec
+        try:
+            values = field_struct.unpack_from(data)
         except Exception as e:
             print("error in set_fields_from_list")
             print(e)
             message.valid = False
             message.error = "Length(unpack)"
+            return
+        for name, value, scale in zip(names, values, scales):
+            setattr(message, name, scale * value) #scaled only
 
     def checksum_passes(self, message):
         #print(f"checksum passes: message = {message}")
         computed_checksum = binary_checksum(message.checksum_input)
         #print(f"computed checksum: {computed_checksum}")
         return computed_checksum == message.checksum
-
-
-#checksum for binary format, same as ublox and Siphog. takes bytes, returns bytes
-def binary_checksum(input_data):
-    checksum_a = 0
-    checksum_b = 0
-    for msg_char in input_data:  # loops over bytes as ints.
-        checksum_a = checksum_a + msg_char  # do %256 here?
-        checksum_b = checksum_b + checksum_a  # do %256 here?
-    # turn them back into bytes types, append
-    return (checksum_a % 256).to_bytes(1, BINARY_ENDIAN) + (checksum_b % 256).to_bytes(1, BINARY_ENDIAN)  # needs checking
\ No newline at end of file
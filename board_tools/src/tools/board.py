@@ -318,6 +318,7 @@ class IMUBoard:
     def clear_connection(self, connection, scheme, wait_time_seconds):
         # temporarily set timeout to zero, and read data until read is empty
         connection.reset_input_buffer()
+        scheme.reset()
         old_timeout = connection.get_timeout()
         connection.set_timeout(0)
 
@@ -612,11 +613,13 @@ class IMUBoard:
             self.control_connection.set_baud(control_baud)
             self.control_baud = control_baud
             self.control_connection.reset_input_buffer()
+            self.control_scheme.reset()
             if self.check_control_port():
                 data_baud = self.get_data_baud_flash()
                 self.data_baud = data_baud
                 self.data_connection.set_baud(data_baud)
                 self.data_connection.reset_input_buffer()
+                self.data_scheme.reset()
                 return control_baud, data_baud
         return None
 
@@ -735,7 +738,7 @@ class IMUBoard:
         # When UDP is used it returns empty messages. This while loop is used to ensure there is a message
         # before exiting
         attempt_count = 0
-        while message == None or message.__dict__ == {}:
+        while message == None or message.fields() == {}:
             if hasattr(self, "msg_format") and self.msg_format == b"4" and hasattr(self.data_connection, "sock"):
                 #   When UDP and RTCM is use we can only get message this way
                 message = self.data_scheme.read_one_message(self.data_connection.sock)
@@ -0,0 +1,151 @@
+import struct
+from itertools import accumulate
+import numpy as np
+try:  # importing from inside the package
+    from class_configs.readable_scheme_config import READABLE_START, READABLE_CHECKSUM_SEPARATOR, READABLE_CHECKSUM_LENGTH
+    from class_configs.binary_scheme_config import BINARY_PREAMBLE, BINARY_ENDIAN, BINARY_CRC_LEN
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.readable_scheme_config import READABLE_START, READABLE_CHECKSUM_SEPARATOR, \
+        READABLE_CHECKSUM_LENGTH
+    from tools.class_configs.binary_scheme_config import BINARY_PREAMBLE, BINARY_ENDIAN, BINARY_CRC_LEN
+
+# checksums of the three wire formats: XOR for ASCII, Fletcher-16 for binary, CRC-24Q for RTCM.
+# one frame at a time for the schemes and the framer, or a batch of whole frames at once with numpy
+# (ascii_checksums_pass, binary_checksums_pass, rtcm_checksums_pass) for logs and other bulk data.
+
+# below this many bytes a plain loop XORs faster than the big int folding in ascii_checksum
+ASCII_CHECKSUM_FOLD_MIN_BYTES = 64
+
+
+# XOR of all bytes as an int, eg of the data between # and * in an ASCII message
+def ascii_checksum(data):
+    if len(data) < ASCII_CHECKSUM_FOLD_MIN_BYTES:
+        total = 0
+        for num in data:
+            total ^= num
+        return total
+    # as one big int, XOR the top half onto the bottom half until one byte is left
+    folded = int.from_bytes(data, "little")
+    width = 4 << (len(data) - 1).bit_length()
+    while width >= 8:
+        folded ^= folded >> width
+        width >>= 1
+    return folded & 0xFF
+
+
+# Fletcher-16 like ublox and Siphog: sum of bytes and sum of the running sums, each mod 256. takes bytes, returns bytes
+def binary_checksum(input_data):
+    checksum_a = sum(input_data) % 256
+    checksum_b = sum(accumulate(input_data)) % 256
+    return checksum_a.to_bytes(1, BINARY_ENDIAN) + checksum_b.to_bytes(1, BINARY_ENDIAN)
+
+
+RTCM_CRC24Q_POLY = 0x1864CFB
+
+
+# CRC-24Q table: one lookup per byte instead of 8 shift/xor steps per byte like pyrtcm calc_crc24q
+def crc24q_table():
+    table = []
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= RTCM_CRC24Q_POLY
+        table.append(crc & 0xFFFFFF)
+    return tuple(table)
+
+
+RTCM_CRC24Q_TABLE = crc24q_table()
+# two bytes per lookup: the CRC of each 16 bit big endian word, from the one byte table
+RTCM_CRC24Q_WORD_TABLE = tuple(((RTCM_CRC24Q_TABLE[word >> 8] << 8) & 0xFFFFFF)
+                               ^ RTCM_CRC24Q_TABLE[(RTCM_CRC24Q_TABLE[word >> 8] >> 16) ^ (word & 0xFF)]
+                               for word in range(65536))
+
+
+# CRC-24Q of data[start:end], without copying the slice. crc argument continues from a previous part.
+# same result as pyrtcm calc_crc24q: 0 if the range includes its own CRC and is valid.
+def crc24q(data, start=0, end=None, crc=0):
+    if end is None:
+        end = len(data)
+    word_table = RTCM_CRC24Q_WORD_TABLE
+    for word in struct.unpack_from(">%dH" % ((end - start) >> 1), data, start):
+        crc = ((crc << 16) & 0xFFFFFF) ^ word_table[((crc >> 8) ^ word) & 0xFFFF]
+    if (end - start) & 1:
+        crc = ((crc << 8) & 0xFFFFFF) ^ RTCM_CRC24Q_TABLE[(crc >> 16) ^ data[end - 1]]
+    return crc
+
+
+# batch checks: frames of the same length are stacked into one 2d array of bytes, one row per frame, so each step
+# of a checksum runs on every frame in one numpy operation.
+
+# value of each byte as a hex digit, upper or lower case. 256 if it's not one, so it never matches a checksum
+def hex_digit_values():
+    values = np.full(256, 256, dtype=np.int32)
+    for value, digit in enumerate(b"0123456789ABCDEF"):
+        values[digit] = value
+        values[ord(chr(digit).lower())] = value
+    return values
+
+
+HEX_DIGIT_VALUES = hex_digit_values()
+RTCM_CRC24Q_TABLE_ARRAY = np.array(RTCM_CRC24Q_TABLE, dtype=np.uint32)
+
+
+# frame indices grouped by key(frame), each group as a 2d uint8 array
+def stacked_groups(frames, key):
+    groups = {}
+    for index, frame in enumerate(frames):
+        groups.setdefault(key(frame), []).append(index)
+    for group_key, indices in groups.items():
+        data = b''.join(frames[i] for i in indices)
+        rows = np.frombuffer(data, dtype=np.uint8).reshape(len(indices), len(frames[indices[0]]))
+        yield group_key, indices, rows
+
+
+# Fletcher-16 on a block of same length frames, each row is type + length + payload + checksum
+def binary_rows_checksums_pass(rows):
+    checksum_input = rows[:, :-BINARY_CRC_LEN]
+    checksum_a = checksum_input.sum(axis=1, dtype=np.uint32) % 256
+    checksum_b = checksum_input.cumsum(axis=1, dtype=np.uint32).sum(axis=1, dtype=np.uint64) % 256
+    return (checksum_a == rows[:, -2]) & (checksum_b == rows[:, -1])
+
+
+# CRC-24Q of each row, one column at a time. 0 for rows that end in their own valid CRC
+def crc24q_rows(rows, crc=0):
+    crc = np.full(len(rows), crc, dtype=np.uint32)
+    for column in rows.T:
+        crc = ((crc << 8) & 0xFFFFFF) ^ RTCM_CRC24Q_TABLE_ARRAY[(crc >> 16) ^ column]
+    return crc
+
+
+# whole ASCII frames (# to the end code, like MessageFramer gives), returns a bool array in frame order
+def ascii_checksums_pass(frames):
+    passed = np.zeros(len(frames), dtype=bool)
+    separator_length = len(READABLE_CHECKSUM_SEPARATOR)
+    for (length, sep_index), indices, rows in stacked_groups(
+            frames, lambda frame: (len(frame), frame.rfind(READABLE_CHECKSUM_SEPARATOR))):
+        checksum_start = sep_index + separator_length
+        if sep_index < len(READABLE_START) or checksum_start + READABLE_CHECKSUM_LENGTH > length:
+            continue
+        computed = np.bitwise_xor.reduce(rows[:, len(READABLE_START): sep_index], axis=1).astype(np.int32)
+        expected = HEX_DIGIT_VALUES[rows[:, checksum_start]] * 16 + HEX_DIGIT_VALUES[rows[:, checksum_start + 1]]
+        passed[indices] = computed == expected
+    return passed
+
+
+# whole binary frames starting at the preamble, returns a bool array in frame order
+def binary_checksums_pass(frames):
+    passed = np.zeros(len(frames), dtype=bool)
+    for length, indices, rows in stacked_groups(frames, len):
+        if length >= len(BINARY_PREAMBLE) + BINARY_CRC_LEN:
+            passed[indices] = binary_rows_checksums_pass(rows[:, len(BINARY_PREAMBLE):])
+    return passed
+
+
+# whole RTCM frames including their CRC, returns a bool array in frame order
+def rtcm_checksums_pass(frames):
+    passed = np.zeros(len(frames), dtype=bool)
+    for length, indices, rows in stacked_groups(frames, len):
+        passed[indices] = crc24q_rows(rows) == 0
+    return passed
@@ -1,4 +1,10 @@
 from .board_config import *
 from .readable_scheme_config import *
 from .rtcm_scheme_config import *
-from .binary_scheme_config import *
\ No newline at end of file
+from .binary_scheme_config import *
+from .message_ring_config import *
+from .log_index_config import *
+from .log_compression_config import *
+from .synthetic_messages_config import *
+from .latency_stats_config import *
+from .io_stats_config import *
@@ -17,3 +17,9 @@ LOG_FILETYPE = ".txt"
 UDP_LOCAL_DATA_PORT = 1
 UDP_LOCAL_CONFIG_PORT = 2
 UDP_LOCAL_ODOMETER_PORT = 3
+UDP_MAX_DATAGRAM_BYTES = 65535  # largest possible UDP datagram: always leave this much room to receive into
+UDP_BUFFER_BYTES = 1 << 20  # UDPConnection reassembly buffer: datagrams that arrive when it's full are dropped
+UDP_SOCKET_RECEIVE_BYTES = 1 << 20  # ask the OS for this much socket receive buffer, to ride out slow reads
+UDP_BATCH_DATAGRAMS = 64  # most datagrams received in one recvmmsg call, or one read_chunks call elsewhere
+UDP_BATCH_SLOT_BYTES = 9000  # buffer for each of those datagrams: bigger ones are cut off and counted as dropped
+FILE_READ_CHUNK_BYTES = 1 << 16  # FileReaderConnection reads log files this much at a time
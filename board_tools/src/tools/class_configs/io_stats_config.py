@@ -0,0 +1,34 @@
+# io_loop throughput and drop counters, shared through IOStats for the monitor and io_stats_cli.py
+
+IO_STATS_NAME = "anello_io_stats"  # shared memory name, so a separate process can find it
+
+# a row of counters for each of these message types, then one for any other type ("other")
+IO_STATS_MESSAGE_TYPES = [b'IMU', b'IM1', b'INS', b'GPS', b'GP2', b'HDG', b'AHRS']
+IO_STATS_OTHER_TYPE = b'other'
+# message types the unit outputs at the odr config rate: the user program sets their expected_period_us from it
+IO_STATS_ODR_MESSAGE_TYPES = [b'IMU', b'IM1']
+
+# counters in each message type row
+IO_STATS_TYPE_COUNTERS = [
+    "received",  # messages framed. IOStats.summary adds the framer checksum fails and unknown types
+    "valid",
+    "checksum_fail",  # ASCII checksum fails, found when parsing. IOStats.summary adds the framer checksum fails
+    "framer_checksum_fail",  # binary / RTCM checksum fails: dropped by the framer, so never parsed
+    "unknown_type",  # framed but not a known message type. IOStats.summary adds the framer unknown types
+    "framer_unknown_type",  # binary headers with an unknown type byte: dropped by the framer, always in "other"
+    "invalid",  # other parse errors
+    "bytes",  # bytes of all framed messages
+    "gaps",  # messages missing between two valid ones: imu_time_ms steps bigger than the expected period
+    "expected_period_us",  # set by the user program from the unit's odr, 0 if unknown: no gap counting
+]
+
+# counters for the whole data stream
+IO_STATS_GLOBAL_COUNTERS = [
+    "reads",  # data port reads that returned data
+    "bytes_read",
+    "skipped_bytes",  # bytes outside any frame: noise, partial or corrupted messages
+    "read_high_water_bytes",  # most bytes from one read. for serial ports this is the in_waiting high-water mark
+    "udp_datagrams_dropped",  # UDP datagrams lost in the connection's buffers
+    "log_bytes_dropped",  # log data the log writer dropped because the disk was too slow
+    "updated_unix_ms",  # time of the last update from io_loop
+]
@@ -0,0 +1,27 @@
+# latency histograms for the io_loop -> monitor pipeline: one per message type and stage.
+
+# message type of each message -> histogram it goes in. IM1 and IMX go in the IMU ring too, other types in "other"
+LATENCY_MESSAGE_TYPES = {
+    b'IMU': "IMU",
+    b'IM1': "IMU",
+    b'IMX': "IMU",
+    b'INS': "INS",
+    b'GPS': "GPS",
+    b'GP2': "GP2",
+    b'HDG': "HDG",
+    b'AHRS': "AHRS",
+}
+LATENCY_OTHER_TYPE = "other"
+
+# each stage is the time from the previous timestamp to this one. io_loop records frame and parse,
+# the monitor records the rest. total is from the port read to the display update.
+LATENCY_STAGES = [
+    "frame",  # data read from the port -> framer has the whole message
+    "parse",  # -> scheme has parsed it
+    "handoff",  # written to the monitor ring -> monitor reads it
+    "display",  # -> monitor has updated the window
+    "total",  # data read from the port -> monitor has updated the window
+]
+
+LATENCY_SUB_BUCKET_BITS = 2  # 4 buckets per doubling of latency: p50 / p99 are within about 20%
+LATENCY_MAX_BITS = 36  # latencies from 1 ns to 2^36 ns (about 69 s), longer ones go in the last bucket
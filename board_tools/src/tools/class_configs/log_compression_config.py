@@ -0,0 +1,14 @@
+# compressed logs: <log name>.zst or <log name>.lz4, a series of independently compressed frames so a reader can
+# start at any frame. the last frame is a seek table in the zstd seekable format (a skippable frame, which zstd and
+# lz4 decoders both pass over): for each frame its compressed and decompressed size, then the frame count.
+# offsets in a compressed log (log index, export parts) are offsets into the decompressed data.
+
+LOG_COMPRESSION_EXTENSIONS = {"zstd": ".zst", "lz4": ".lz4"}
+LOG_COMPRESSION_PACKAGES = {"zstd": "zstandard", "lz4": "lz4"}
+LOG_COMPRESSION_LEVELS = {"zstd": 3, "lz4": 0}  # fast levels: logging runs on small machines like a Raspberry Pi
+LOG_COMPRESSED_FRAME_BYTES = 1024 * 1024  # decompressed bytes per frame. flush() also ends a frame
+
+LOG_SEEK_TABLE_SKIPPABLE_MAGIC = 0x184D2A5E
+LOG_SEEK_TABLE_MAGIC = 0x8F92EAB1
+LOG_SEEK_TABLE_FOOTER_LENGTH = 9  # frame count u32, descriptor u8, magic u32
+LOG_SEEK_TABLE_ENTRY_LENGTH = 8  # compressed size u32, decompressed size u32: no checksums
@@ -0,0 +1,9 @@
+# sidecar seek index for log files: <log name>.idx next to the log.
+# JSON lines: a header, then one entry per segment of about LOG_INDEX_INTERVAL_BYTES of log.
+# each entry has the byte offset where the segment starts, the min and max imu_time_ms and gps_time_ns of its
+# messages, and the message types in it.
+
+LOG_INDEX_EXTENSION = ".idx"
+LOG_INDEX_VERSION = 1
+LOG_INDEX_INTERVAL_BYTES = 64 * 1024
+LOG_INDEX_TIME_FIELDS = ("imu_time_ms", "gps_time_ns")
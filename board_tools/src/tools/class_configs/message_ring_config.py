@@ -0,0 +1,51 @@
+from .readable_scheme_config import FORMAT_GPS, FORMAT_HDG, FORMAT_AHRS, HEADING_FLAGS
+
+# decoded record layouts for the io_loop -> monitor ring buffers: (field name, float or int) in record order.
+# names match the parsed Message attributes for every format (ASCII, binary, RTCM), including the derived ones.
+# up to 64 fields per record, one presence bit each.
+
+MESSAGE_RING_CAPACITY = 1024  # records per ring: about 5 seconds of 200 Hz IMU between monitor refreshes
+
+MESSAGE_RING_IMU_FIELDS = [
+    ("imu_time_ms", float),
+    ("sync_time_ms", float),
+    ("accel_x_g", float),
+    ("accel_y_g", float),
+    ("accel_z_g", float),
+    ("angrate_x_dps", float),
+    ("angrate_y_dps", float),
+    ("angrate_z_dps", float),
+    ("fog_angrate_x_dps", float),
+    ("fog_angrate_y_dps", float),
+    ("fog_angrate_z_dps", float),
+    ("odometer_speed_mps", float),
+    ("odometer_time_ms", float),
+    ("mag_x", float),
+    ("mag_y", float),
+    ("mag_z", float),
+    ("temperature_c", float),
+]
+
+MESSAGE_RING_INS_FIELDS = [
+    ("imu_time_ms", float),
+    ("gps_time_ns", int),
+    ("ins_solution_status", int),
+    ("gps_used", int),
+    ("lat_deg", float),
+    ("lon_deg", float),
+    ("alt_m", float),
+    ("velocity_north_mps", float),
+    ("velocity_east_mps", float),
+    ("velocity_down_mps", float),
+    ("roll_deg", float),
+    ("pitch_deg", float),
+    ("heading_deg", float),
+    ("zupt_flag", int),
+]
+
+MESSAGE_RING_GPS_FIELDS = FORMAT_GPS
+
+# heading flags are also split into one field per bit, plus the combined carrSoln
+MESSAGE_RING_HDG_FIELDS = FORMAT_HDG + [(flag_name, int) for flag_name in HEADING_FLAGS.values()] + [("carrSoln", int)]
+
+MESSAGE_RING_AHRS_FIELDS = FORMAT_AHRS
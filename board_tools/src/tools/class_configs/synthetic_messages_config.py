@@ -0,0 +1,70 @@
+from .readable_scheme_config import FORMAT_IMU_NO_SYNC, FORMAT_IMU_WITH_SYNC, FORMAT_IMU_3FOG, FORMAT_IMU_X3_NO_STATUS, \
+    FORMAT_IMU_X3_WITH_STATUS, FORMAT_IM1, FORMAT_INS, FORMAT_INS_EXTRA_COMMA, FORMAT_GPS, FORMAT_GP2, FORMAT_HDG, FORMAT_AHRS
+from .binary_scheme_config import BINARY_MSGTYPE_IMU, BINARY_MSGTYPE_GPS, BINARY_MSGTYPE_GP2, BINARY_MSGTYPE_HDG, \
+    BINARY_MSGTYPE_INS, BINARY_MSGTYPE_X3_IMU, BINARY_MSGTYPE_AHRS
+from .rtcm_scheme_config import RTCM_MSGTYPE_IMU, RTCM_MSGTYPE_GPS, RTCM_MSGTYPE_HEADING, RTCM_MSGTYPE_INS, \
+    RTCM_MSGTYPE_IM1, RTCM_MSGTYPE_INFO, RTCM_MSGTYPE_AHRS, RTCM_IMU_PAYLOAD_FIELDS_WITH_SYNC, \
+    RTCM_IMU_PAYLOAD_FIELDS_NO_SYNC, RTCM_IM1_PAYLOAD_FIELDS, RTCM_INS_PAYLOAD_FIELDS, RTCM_GPS_PAYLOAD_FIELDS, \
+    RTCM_DUAL_ANT_HEAD_FIELDS, RTCM_INFO_PAYLOAD_FIELDS, RTCM_AHRS_PAYLOAD_FIELDS
+
+# synthetic output messages for benchmarks and tests: every output message type in each wire format, with made up
+# values that parse as valid. names are the format names without FORMAT_ / BINARY_MSGTYPE_ / RTCM_MSGTYPE_.
+
+# ASCII: name -> (msgtype, format)
+SYNTHETIC_ASCII_MESSAGES = {
+    "IMU_NO_SYNC": (b'IMU', FORMAT_IMU_NO_SYNC),
+    "IMU": (b'IMU', FORMAT_IMU_WITH_SYNC),
+    "IMU_3FOG": (b'IMU', FORMAT_IMU_3FOG),
+    "IMU_X3_NO_STATUS": (b'IMU', FORMAT_IMU_X3_NO_STATUS),
+    "IMU_X3_WITH_STATUS": (b'IMU', FORMAT_IMU_X3_WITH_STATUS),
+    "IM1": (b'IM1', FORMAT_IM1),
+    "INS": (b'INS', FORMAT_INS),
+    "INS_EXTRA_COMMA": (b'INS', FORMAT_INS_EXTRA_COMMA),
+    "GPS": (b'GPS', FORMAT_GPS),
+    "GP2": (b'GP2', FORMAT_GP2),
+    "HDG": (b'HDG', FORMAT_HDG),
+    "AHRS": (b'AHRS', FORMAT_AHRS),
+}
+
+# binary: name -> type byte. formats are in BINARY_MESSAGE_TYPES
+SYNTHETIC_BINARY_MESSAGES = {
+    "IMU": BINARY_MSGTYPE_IMU,
+    "X3_IMU": BINARY_MSGTYPE_X3_IMU,
+    "INS": BINARY_MSGTYPE_INS,
+    "GPS": BINARY_MSGTYPE_GPS,
+    "GP2": BINARY_MSGTYPE_GP2,
+    "HDG": BINARY_MSGTYPE_HDG,
+    "AHRS": BINARY_MSGTYPE_AHRS,
+}
+
+# RTCM: name -> (4 bit message type, payload format, fixed field values). GP2 is GPS from the second antenna
+SYNTHETIC_RTCM_MESSAGES = {
+    "IMU": (RTCM_MSGTYPE_IMU, RTCM_IMU_PAYLOAD_FIELDS_WITH_SYNC, {}),
+    "IMU_NO_SYNC": (RTCM_MSGTYPE_IMU, RTCM_IMU_PAYLOAD_FIELDS_NO_SYNC, {}),
+    "IM1": (RTCM_MSGTYPE_IM1, RTCM_IM1_PAYLOAD_FIELDS, {}),
+    "INS": (RTCM_MSGTYPE_INS, RTCM_INS_PAYLOAD_FIELDS, {}),
+    "GPS": (RTCM_MSGTYPE_GPS, RTCM_GPS_PAYLOAD_FIELDS, {"antenna_id": 0}),
+    "GP2": (RTCM_MSGTYPE_GPS, RTCM_GPS_PAYLOAD_FIELDS, {"antenna_id": 1}),
+    "HDG": (RTCM_MSGTYPE_HEADING, RTCM_DUAL_ANT_HEAD_FIELDS, {}),
+    "INFO": (RTCM_MSGTYPE_INFO, RTCM_INFO_PAYLOAD_FIELDS, {}),
+    "AHRS": (RTCM_MSGTYPE_AHRS, RTCM_AHRS_PAYLOAD_FIELDS, {}),
+}
+
+# fields that need realistic values to parse like a unit's output
+SYNTHETIC_FIXED_VALUES = {
+    "mems_ranges": (8 << 11) + 450,  # 8 g, 450 dps
+    "fog_range": 0,
+}
+SYNTHETIC_GPS_TIME_OFFSET_NS = 1_360_000_000_000_000_000  # gps_time_ns is imu time plus this
+
+# mixed streams like a unit's data port: (wire format, name, rate in Hz). rates divide into whole milliseconds.
+# "X3" is the mixed binary and ASCII stream Binary_and_ASCII_Scheme reads.
+SYNTHETIC_STREAM_MIXES = {
+    "ASCII": [("ASCII", "IMU", 200), ("ASCII", "INS", 100), ("ASCII", "GPS", 5), ("ASCII", "GP2", 5), ("ASCII", "HDG", 5)],
+    "Binary": [("Binary", "IMU", 200), ("Binary", "INS", 100), ("Binary", "GPS", 5), ("Binary", "GP2", 5),
+               ("Binary", "HDG", 5)],
+    "RTCM": [("RTCM", "IMU", 200), ("RTCM", "INS", 100), ("RTCM", "GPS", 5), ("RTCM", "GP2", 5), ("RTCM", "HDG", 5)],
+    "X3": [("Binary", "X3_IMU", 200), ("ASCII", "IMU_X3_WITH_STATUS", 100), ("Binary", "INS", 100),
+           ("Binary", "GPS", 5), ("Binary", "HDG", 5), ("ASCII", "AHRS", 5)],
+}
+SYNTHETIC_SINGLE_TYPE_RATE_HZ = 200  # message rate for streams of one message type
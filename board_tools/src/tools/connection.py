@@ -2,13 +2,19 @@ import serial
 from abc import ABC
 try:  # importing from inside the package
 	from class_configs.board_config import *
+	from log_compression import compression_for_path, open_log_reader
+	from datagram_receiver import DatagramReceiver
 except ModuleNotFoundError:  # importing from outside the package
 	from tools.class_configs.board_config import *
+	from tools.log_compression import compression_for_path, open_log_reader
+	from tools.datagram_receiver import DatagramReceiver
 
 from builtins import input
 import socket
 import sys
 import select
+import time
+import mmap
 
 
 READ_SIZE = 1024 # excessively large to get whole buffer
@@ -28,9 +34,18 @@ class Connection(ABC):
 	def read_until(self, expected='\n', size=None):
 		raise Exception("base or dummy Connection has no read_until")
 
+	# all available data as a list of bytes-like chunks, valid until the next read. one chunk from readall here
+	def read_chunks(self):
+		data = self.readall()
+		return [data] if data else []
+
 	def read_ready(self):
 		pass
 
+	# file descriptor for select/selectors, or None if this connection can't be selected on
+	def fileno(self):
+		return None
+
 	#read a single message. optional start and end char arguments
 	def read_one_message(self, start_char=None, end_char=None):
 		raise Exception("base or dummy Connection has no read_one_message")
@@ -108,6 +123,13 @@ class SerialConnection(Connection):
 			#TODO - should it return/print some error depending on what exception type? SerialException if disconnected
 			return False
 
+	# pyserial has no fileno on Windows: None there, so io_loop polls instead
+	def fileno(self):
+		try:
+			return self.connection.fileno()
+		except Exception as e:
+			return None
+
 	def read_one_message(self, start_char=None, end_char=None):
 		before = self.read_until(start_char)
 		#TODO: handle whatever came before start code?
@@ -146,68 +168,180 @@ class SerialConnection(Connection):
 		return self.connection.timeout
 
 
+# UDP connection with a reassembly buffer: datagrams are received into one preallocated bytearray, and read(size),
+# read_until and read_one_message are served from it like a serial port's input buffer, so reads can span datagrams
+# or take part of one. reads wait for more datagrams up to the timeout, readall never waits.
 class UDPConnection(Connection):
-	def __init__(self, remote_ip, remote_port, local_port, timeout=0):
+	def __init__(self, remote_ip, remote_port, local_port, timeout=TIMEOUT_REGULAR):
 		self.remote_ip = remote_ip
 		self.remote_port = remote_port
 		self.local_port = local_port
 		self.sock = None
 		self.addr = (remote_ip, remote_port)
 		family_addr = socket.AF_INET
+		self.timeout = timeout
+
+		# received data not read yet is buffer[start:end]
+		self.buffer = bytearray(UDP_BUFFER_BYTES)
+		self.view = memoryview(self.buffer)
+		self.start = 0
+		self.end = 0
+		self.discard_view = memoryview(bytearray(UDP_MAX_DATAGRAM_BYTES))  # receive here to drop a datagram
+
+		# counters since opening
+		self.datagrams_received = 0
+		self.bytes_received = 0
+		self.datagrams_dropped = 0  # arrived while the buffer was full
+		self.bytes_dropped = 0
 
 		#try:
 		# allow this to except and catch it at higher level
 		self.sock = socket.socket(family_addr, socket.SOCK_DGRAM)
+		try:
+			self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_SOCKET_RECEIVE_BYTES)
+		except OSError:
+			pass  # keep the OS default size
 		self.sock.bind(('', self.local_port))
-		self.sock.setblocking(False)
-		self.sock.settimeout(0) #needs to be 0 so readall gets only the available data, otherwise could read forever
+		self.sock.setblocking(False) # always non-blocking: reads wait with select instead, up to self.timeout
+		self.datagram_receiver = DatagramReceiver(self.sock)  # for read_chunks
 		# except socket.error:
 		# 	print('Failed to create socket')
 
-	def read(self, size=1):
-		try:
-			self.set_timeout(0)
-			reply, addr = self.sock.recvfrom(size) # buffsize < message length will error
-			return reply
-		except Exception as e: #would be BlockingIOError when no data and timeout 0
-			return None
-		# need internal buffer to read smaller amounts?
+	# move all waiting datagrams from the socket into the buffer. returns number of bytes received
+	def receive(self):
+		received = 0
+		while True:
+			if len(self.buffer) - self.end < UDP_MAX_DATAGRAM_BYTES:
+				self.compact()
+			full = len(self.buffer) - self.end < UDP_MAX_DATAGRAM_BYTES
+			try:
+				size, addr = self.sock.recvfrom_into(self.discard_view if full else self.view[self.end:])
+			except OSError:  # BlockingIOError when no data, or errors like connection refused from the remote
+				return received
+			if full:
+				self.datagrams_dropped += 1
+				self.bytes_dropped += size
+			else:
+				self.end += size
+				received += size
+				self.datagrams_received += 1
+				self.bytes_received += size
+
+	# move the unread data to the front of the buffer
+	def compact(self):
+		if self.start > 0:
+			unread = self.end - self.start
+			self.buffer[:unread] = self.buffer[self.start: self.end]
+			self.start = 0
+			self.end = unread
+
+	# remove <size> bytes from the front of the buffer and return them
+	def take(self, size):
+		data = bytes(self.view[self.start: self.start + size])
+		self.start += len(data)
+		if self.start == self.end:
+			self.start = self.end = 0
+		return data
+
+	# end time for a read starting now, or None for no timeout
+	def deadline(self):
+		return None if self.timeout is None else time.monotonic() + self.timeout
 
-	# reads only one message up to length READ_SIZE
+	# wait for more data until deadline, receive it. False if none came in time
+	def wait_and_receive(self, deadline):
+		while True:
+			remaining = None if deadline is None else deadline - time.monotonic()
+			if remaining is not None and remaining <= 0:
+				return False
+			if select.select([self.sock], [], [], remaining)[0] and self.receive():
+				return True
+
+	def buffered(self):
+		return self.end - self.start
+
+	# read <size> bytes, or less if the timeout runs out first
+	def read(self, size=1):
+		self.receive()
+		if self.buffered() < size and self.timeout != 0:
+			deadline = self.deadline()
+			while self.buffered() < size and self.wait_and_receive(deadline):
+				pass
+		return self.take(min(size, self.buffered()))
+
+	# reads whatever is buffered, up to a whole buffer if start and end chars are not given
 	def read_one_message(self, start_char=None, end_char=None):
-		return self.read(READ_SIZE) #don't need the start and end char args for this
+		if start_char is None or end_char is None:
+			return self.readall()
+		before = self.read_until(start_char)
+		#TODO: handle whatever came before start code?
+		return self.read_until(end_char)
 
 	def readall(self):
-		all_data = b''
-		last_msg_data = self.read_one_message()
-		while last_msg_data:
-			all_data += last_msg_data
-			last_msg_data = self.read_one_message()
-		return all_data
-
+		self.receive()
+		return self.take(self.buffered())
+
+	# waiting datagrams as memoryviews, up to UDP_BATCH_DATAGRAMS per call: many per system call on Linux, and not
+	# copied into the buffer. they are only valid until the next read_chunks. anything buffered comes first
+	def read_chunks(self):
+		chunks = [memoryview(self.take(self.buffered()))] if self.buffered() else []
+		return chunks + self.datagram_receiver.receive()
+
+	# datagram and byte counts from both the buffered reads and read_chunks
+	def receive_counts(self):
+		receiver = self.datagram_receiver
+		return {
+			"datagrams_received": self.datagrams_received + receiver.datagrams_received,
+			"bytes_received": self.bytes_received + receiver.bytes_received,
+			"datagrams_dropped": self.datagrams_dropped + receiver.datagrams_truncated,
+			"bytes_dropped": self.bytes_dropped + receiver.bytes_truncated,
+		}
+
+	# read until <expected> or until <size> bytes if not None, or whatever came before the timeout. like Serial.read_until
 	def read_until(self, expected='\n', size=None):
-		# either need a sock read_until method, or loop reading one at a time until expected reached
-		return self.read(READ_SIZE) #temporary fix, should implement actual read_until
-		#pass
+		if type(expected) is str:
+			expected = expected.encode()
+		if size is not None:
+			size = max(size, 1)
+		self.receive()
+		searched = 0  # bytes after start already searched for expected
+		deadline = None
+		while True:
+			limit = self.buffered() if size is None else min(self.buffered(), size)
+			found = self.buffer.find(expected, self.start + searched, self.start + limit)
+			if found >= 0:
+				return self.take(found + len(expected) - self.start)
+			if limit == size:
+				return self.take(size)
+			searched = max(0, limit - len(expected) + 1)
+			if self.timeout == 0:
+				return self.take(limit)
+			if deadline is None:
+				deadline = self.deadline()
+			if not self.wait_and_receive(deadline):
+				return self.take(self.buffered() if size is None else min(self.buffered(), size))
 
 	def read_ready(self):
+		if self.buffered():
+			return True
 		reads, writes, errors = select.select([self.sock], [], [], 0)
 		return reads != []
 
+	def fileno(self):
+		fd = self.sock.fileno()
+		return fd if fd >= 0 else None  # -1 after close
+
 	def write(self, data):
 		self.sock.sendto(data, self.addr)
 
 	def reset_input_buffer(self):
-		#no built in reset, so read the whole buffer
-		temp_timeout = self.sock.gettimeout()
-		self.sock.settimeout(0)
+		#no built in reset, so read the whole socket buffer
+		self.start = self.end = 0
 		while True:
 			try:
-				self.sock.recv(1024)
-			except Exception as e:
+				self.sock.recv_into(self.discard_view)
+			except OSError as e:
 				#print(str(type(e))+": "+str(e))
 				break
-		self.sock.settimeout(temp_timeout)
 
 	def open(self):
 		pass
@@ -216,7 +350,8 @@ class UDPConnection(Connection):
 		self.sock.close()
 
 	def __str__(self):
-		return type(self).__name__ +": "+str(self.__dict__)
+		return type(self).__name__ +": "+str({key: value for key, value in self.__dict__.items()
+											   if key not in ("buffer", "view", "discard_view", "datagram_receiver")})
 
 	# def set_port(self, port):
 	# 	pass
@@ -225,46 +360,80 @@ class UDPConnection(Connection):
 	# 	pass
 	#
 	def set_timeout(self, timeout):
-		self.sock.settimeout(timeout)
+		self.timeout = timeout
 
 	def get_timeout(self):
-		return self.sock.gettimeout()
+		return self.timeout
 
 # fake a serial connection to read byte data from a file
 # does not use an actual or virtual com port, just writes/reads file.
+# uncompressed logs are mapped with mmap: read_until finds delimiters with mmap.find and returns memoryview slices
+# of the file, so nothing is copied. .zst / .lz4 logs can't be mapped, so they are decompressed as they are read,
+# FILE_READ_CHUNK_BYTES at a time into a buffer, and read_until finds delimiters in that buffer and returns bytes.
 class FileReaderConnection(Connection):
 	# TODO check if it's ok for init to have different arguments. should it emulate timeout behavior?
 	def __init__(self, filename):
 		# open the file to read bytes
 		self.filename = filename
-		self.reader = open(filename, 'rb')
+		self.reader = open_log_reader(filename)
+		self.buffer = bytearray()  # compressed logs: read from the file but not returned yet
+		self.mapped = None
+		if not compression_for_path(filename):
+			try:
+				self.mapped = mmap.mmap(self.reader.fileno(), 0, access=mmap.ACCESS_READ)
+			except ValueError:  # empty file can't be mapped: read it like a compressed one
+				pass
+		if self.mapped is not None:
+			self.view = memoryview(self.mapped)
+			self.position = 0
+			self.size = len(self.mapped)
+
+	# add the next chunk of the file to the buffer. False at end of file
+	def fill_buffer(self):
+		data = self.reader.read(FILE_READ_CHUNK_BYTES)
+		self.buffer += data
+		return len(data) > 0
+
+	# take the first <size> bytes of the buffer. deleting from the front of a bytearray doesn't copy the rest
+	def take(self, size):
+		out = bytes(self.buffer[:size])
+		del self.buffer[:size]
+		return out
 
-	# read <size> bytes from the file
+	# read <size> bytes from the file. returns bytes, not a slice, since callers like pyrtcm add the results together
 	def read(self, size=1):
-		return self.reader.read(size)
-
-	# read until <expected> or until <size> bytes if not None
-	def read_until(self, expected='\n', size_limit=2048):
-		out = b''
-		if size_limit is None:
-			while(True):
-				data = self.reader.read(1)
-				out += data
-				if data == b'':  # end of file - return b'' from then on, as if connection is timing out
-					return out
-				if out[-len(expected):] == expected:
-					break
-		else:
-			if size_limit < 1:
-				size_limit = 1  # match behavior of Serial.read_until
-			for i in range(size_limit):
-				data = self.reader.read(1)
-				out += data
-				if data == b'':
-					return out
-				if out[-len(expected):] == expected:
-					break
-		return out
+		if self.mapped is not None:
+			start = self.position
+			self.position = min(start + size, self.size)
+			return self.mapped[start: self.position]
+		while len(self.buffer) < size and self.fill_buffer():
+			pass
+		return self.take(size)
+
+	# read until <expected> or until <size_limit> bytes if not None. returns what was read before end of file:
+	# a memoryview slice of the file if it's mapped, else bytes
+	def read_until(self, expected=b'\n', size_limit=2048):
+		if type(expected) is str:
+			expected = expected.encode()
+		if size_limit is not None:
+			size_limit = max(size_limit, 1)  # match behavior of Serial.read_until
+		if self.mapped is not None:
+			start = self.position
+			end = self.size if size_limit is None else min(self.size, start + size_limit)
+			found = self.mapped.find(expected, start, end)
+			self.position = end if found < 0 else found + len(expected)
+			return self.view[start: self.position]
+		search_start = 0
+		while True:
+			found = self.buffer.find(expected, search_start, size_limit)
+			if found >= 0:
+				return self.take(found + len(expected))
+			if size_limit is not None and len(self.buffer) >= size_limit:
+				return self.take(size_limit)
+			# expected could start in the part already searched and end in the next chunk
+			search_start = max(len(self.buffer) - len(expected) + 1, 0)
+			if not self.fill_buffer():  # end of file - return b'' from then on, as if connection is timing out
+				return self.take(len(self.buffer))
 
 	def read_one_message(self, start_char=None, end_char=None):
 		before = self.read_until(start_char)
@@ -273,6 +442,12 @@ class FileReaderConnection(Connection):
 		return data
 
 	def close(self):
+		if self.mapped is not None:
+			self.view.release()
+			try:
+				self.mapped.close()
+			except BufferError:
+				pass  # slices from read_until still in use: mapping gets freed when they are
 		self.reader.close()
 
 
@@ -0,0 +1,122 @@
+import sys
+import errno
+import ctypes
+import socket
+try:  # importing from inside the package
+    from class_configs.board_config import UDP_BATCH_DATAGRAMS, UDP_BATCH_SLOT_BYTES
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.board_config import UDP_BATCH_DATAGRAMS, UDP_BATCH_SLOT_BYTES
+
+# receive many UDP datagrams per call into a reusable pool of buffers, one slot per datagram.
+# on Linux one recvmmsg system call gets all of them, through ctypes. elsewhere (or if libc has no recvmmsg)
+# recv_into fills the slots one datagram at a time. either way receive() returns memoryviews of the slots,
+# which are only valid until the next receive().
+
+MSG_DONTWAIT = int(getattr(socket, "MSG_DONTWAIT", 0x40))  # plain ints: socket's are enums, slow to &
+MSG_TRUNC = int(getattr(socket, "MSG_TRUNC", 0x20))
+WSAEMSGSIZE = 10040
+
+
+class IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class MsgHdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(IOVec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t), ("msg_flags", ctypes.c_int)]
+
+
+class MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+# libc recvmmsg function, or None if this platform doesn't have it
+def load_recvmmsg():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        recvmmsg = ctypes.CDLL(None, use_errno=True).recvmmsg
+    except (OSError, AttributeError):
+        return None
+    recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(MMsgHdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    recvmmsg.restype = ctypes.c_int
+    return recvmmsg
+
+
+RECVMMSG = load_recvmmsg()
+
+
+class DatagramReceiver:
+    def __init__(self, sock, slots=UDP_BATCH_DATAGRAMS, slot_bytes=UDP_BATCH_SLOT_BYTES, use_recvmmsg=True):
+        self.sock = sock
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.pool = bytearray(slots * slot_bytes)
+        self.pool_view = memoryview(self.pool)
+        self.slot_views = [self.pool_view[i * slot_bytes: (i + 1) * slot_bytes] for i in range(slots)]
+        self.recvmmsg = RECVMMSG if use_recvmmsg else None
+        if self.recvmmsg:
+            # one message header per slot, each with one iovec pointing at its slot. the kernel fills in msg_len
+            pool_address = ctypes.addressof((ctypes.c_char * len(self.pool)).from_buffer(self.pool))
+            self.iovecs = (IOVec * slots)(*[IOVec(pool_address + i * slot_bytes, slot_bytes) for i in range(slots)])
+            self.headers = (MMsgHdr * slots)()
+            for i in range(slots):
+                self.headers[i].msg_hdr.msg_iov = ctypes.pointer(self.iovecs[i])
+                self.headers[i].msg_hdr.msg_iovlen = 1
+            # msg_len and msg_flags of every header through one flat uint32 view, faster than ctypes field access
+            header_words = memoryview(self.headers).cast('B').cast('I')
+            words_per_header = ctypes.sizeof(MMsgHdr) // 4
+            self.lengths = header_words[MMsgHdr.msg_len.offset // 4::words_per_header]
+            self.flags = header_words[(MMsgHdr.msg_hdr.offset + MsgHdr.msg_flags.offset) // 4::words_per_header]
+        self.datagrams_received = 0
+        self.bytes_received = 0
+        # datagrams too big for a slot, cut off and not returned
+        self.datagrams_truncated = 0
+        self.bytes_truncated = 0
+
+    # waiting datagrams, up to one per slot, as memoryviews into the pool. empty list if there are none
+    def receive(self):
+        views = self.receive_recvmmsg() if self.recvmmsg else self.receive_each()
+        self.datagrams_received += len(views)
+        for view in views:
+            self.bytes_received += len(view)
+        return views
+
+    def receive_recvmmsg(self):
+        count = self.recvmmsg(self.sock.fileno(), self.headers, self.slots, MSG_DONTWAIT, None)
+        if count < 0:
+            error = ctypes.get_errno()
+            if error in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR, errno.ECONNREFUSED):  # no data, or a refused send
+                return []
+            raise OSError(error, "recvmmsg failed")
+        lengths = self.lengths[:count].tolist()
+        if not any(flags & MSG_TRUNC for flags in self.flags[:count].tolist()):
+            return [slot_view[:length] for slot_view, length in zip(self.slot_views, lengths)]
+        views = []
+        for slot_view, length, flags in zip(self.slot_views, lengths, self.flags[:count].tolist()):
+            if flags & MSG_TRUNC:
+                self.datagrams_truncated += 1
+                self.bytes_truncated += length
+            else:
+                views.append(slot_view[:length])
+        return views
+
+    # without recvmmsg: recv_into each slot until the socket is empty or the slots are full
+    def receive_each(self):
+        views = []
+        for slot_view in self.slot_views:
+            try:
+                size = self.sock.recv_into(slot_view)
+            except OSError as e:
+                if getattr(e, "winerror", None) == WSAEMSGSIZE:  # windows: too big for the slot, cut off
+                    self.datagrams_truncated += 1
+                    self.bytes_truncated += self.slot_bytes
+                    continue
+                break  # BlockingIOError when empty, or errors like connection refused from the remote
+            if size == self.slot_bytes:  # elsewhere a full slot may be a cut off datagram: drop it to be safe
+                self.datagrams_truncated += 1
+                self.bytes_truncated += size
+            else:
+                views.append(slot_view[:size])
+        return views
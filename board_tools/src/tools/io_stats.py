@@ -0,0 +1,195 @@
+import json
+import time
+from multiprocessing import shared_memory, resource_tracker
+try:  # importing from inside the package
+    from class_configs.io_stats_config import *
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.io_stats_config import *
+
+# shared memory counters for the io_loop read path: per message type (received, valid, checksum fails, unknown type,
+# bytes, gaps) and for the whole stream (reads, read high-water, skipped and dropped bytes). io_loop is the only
+# writer except for expected_period_us, so there are no locks. the monitor, the Stats menu and io_stats_cli.py read
+# them by name while io_loop runs: snapshot() twice to get rates.
+
+IO_STATS_TYPE_NAMES = IO_STATS_MESSAGE_TYPES + [IO_STATS_OTHER_TYPE]
+IO_STATS_TYPE_INDEX = {name: index for index, name in enumerate(IO_STATS_TYPE_COUNTERS)}
+IO_STATS_GLOBAL_INDEX = {name: index for index, name in enumerate(IO_STATS_GLOBAL_COUNTERS)}
+
+
+class IOStats:
+
+    # create new counters, or attach to existing ones by name (create=False) from another process.
+    # creating with a name that is taken (another user program running) uses a new generated name instead.
+    # track=False for a separate program attaching, so its exit doesn't remove the counters (resource_tracker)
+    def __init__(self, name=IO_STATS_NAME, create=True, track=True):
+        self.row_words = len(IO_STATS_TYPE_COUNTERS)
+        self.global_start = len(IO_STATS_TYPE_NAMES) * self.row_words
+        size = (self.global_start + len(IO_STATS_GLOBAL_COUNTERS)) * 8
+        if create:
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.shm.buf[:size] = bytes(size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            if not track:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.words = self.shm.buf[:size].cast("Q")
+        # first word of each message type's row
+        self.row_starts = {name: index * self.row_words for index, name in enumerate(IO_STATS_TYPE_NAMES)}
+        self.other_start = self.row_starts[IO_STATS_OTHER_TYPE]
+        self.last_times_ms = {}  # io_loop only: imu_time_ms of the last valid message of each type, for gaps
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # attach by name after pickling, so it can be a Process arg with spawn (Windows, Mac) too
+    def __reduce__(self):
+        return self.__class__, (self.shm.name, False)
+
+    # io_loop: one data port read of byte_count bytes
+    def record_read(self, byte_count):
+        words = self.words
+        start = self.global_start
+        words[start + IO_STATS_GLOBAL_INDEX["reads"]] += 1
+        words[start + IO_STATS_GLOBAL_INDEX["bytes_read"]] += byte_count
+        high_water = start + IO_STATS_GLOBAL_INDEX["read_high_water_bytes"]
+        if byte_count > words[high_water]:
+            words[high_water] = byte_count
+        words[start + IO_STATS_GLOBAL_INDEX["updated_unix_ms"]] = int(time.time() * 1000)
+
+    # io_loop: new connection, so the next message times don't follow on from the last ones
+    def restart_gaps(self):
+        self.last_times_ms.clear()
+
+    # io_loop: one framed message of byte_count bytes, after parsing it, valid or not
+    def record_message(self, message, byte_count):
+        msgtype = getattr(message, "msgtype", None)
+        start = self.row_starts.get(msgtype, self.other_start)
+        words = self.words
+        words[start + IO_STATS_TYPE_INDEX["received"]] += 1
+        words[start + IO_STATS_TYPE_INDEX["bytes"]] += byte_count
+        if message.valid:
+            words[start + IO_STATS_TYPE_INDEX["valid"]] += 1
+            period_us = words[start + IO_STATS_TYPE_INDEX["expected_period_us"]]
+            time_ms = getattr(message, "imu_time_ms", None)
+            if period_us and time_ms is not None:
+                last_time_ms = self.last_times_ms.get(start)
+                self.last_times_ms[start] = time_ms
+                if last_time_ms is not None and time_ms > last_time_ms:
+                    missing = round((time_ms - last_time_ms) * 1000 / period_us) - 1
+                    if missing > 0:
+                        words[start + IO_STATS_TYPE_INDEX["gaps"]] += missing
+            return
+        error = getattr(message, "error", None) or ""
+        if error == "Checksum Fail":
+            words[start + IO_STATS_TYPE_INDEX["checksum_fail"]] += 1
+        elif msgtype is None or error == "Msgtype" or error.startswith("Unknown msgtype") \
+                or start == self.other_start:
+            words[start + IO_STATS_TYPE_INDEX["unknown_type"]] += 1
+        else:
+            words[start + IO_STATS_TYPE_INDEX["invalid"]] += 1
+
+    # io_loop: totals the MessageFramer keeps itself, skipped bytes, binary / RTCM checksum fails and unknown
+    # binary types
+    def record_framer(self, framer):
+        words = self.words
+        words[self.global_start + IO_STATS_GLOBAL_INDEX["skipped_bytes"]] = framer.skipped_bytes
+        words[self.other_start + IO_STATS_TYPE_INDEX["framer_unknown_type"]] = framer.unknown_types
+        if framer.checksum_failures:
+            failures = {}  # unlisted types all go in "other"
+            for msgtype, count in framer.checksum_failures.items():
+                start = self.row_starts.get(msgtype, self.other_start)
+                failures[start] = failures.get(start, 0) + count
+            for start, count in failures.items():
+                words[start + IO_STATS_TYPE_INDEX["framer_checksum_fail"]] = count
+
+    # set one of IO_STATS_GLOBAL_COUNTERS, eg a total the connection or log writer counts
+    def set_global(self, counter, value):
+        self.words[self.global_start + IO_STATS_GLOBAL_INDEX[counter]] = value
+
+    # user program: output period of a message type in microseconds, to count gaps. 0 to stop counting them
+    def set_expected_period_us(self, msgtype, period_us):
+        self.words[self.row_starts.get(msgtype, self.other_start) + IO_STATS_TYPE_INDEX["expected_period_us"]] = \
+            int(period_us)
+
+    # copy of every counter: {"time", "global": {counter: value}, "types": {type name: {counter: value}}}
+    def snapshot(self):
+        words = self.words.tolist()
+        types = {}
+        for msgtype, start in self.row_starts.items():
+            types[msgtype.decode()] = dict(zip(IO_STATS_TYPE_COUNTERS, words[start: start + self.row_words]))
+        return {
+            "time": time.time(),
+            "global": dict(zip(IO_STATS_GLOBAL_COUNTERS, words[self.global_start:])),
+            "types": types,
+        }
+
+    # snapshot with the framer checksum fails added to received and checksum_fail, the framer unknown types to
+    # received and unknown_type, and rates per second since previous (an earlier snapshot) if given.
+    # types with nothing received are left out
+    def summary(self, previous=None):
+        current = self.snapshot()
+        seconds = current["time"] - previous["time"] if previous else 0
+        types = {}
+        for type_name, counters in current["types"].items():
+            counters = dict(counters)
+            counters["received"] += counters["framer_checksum_fail"]
+            counters["checksum_fail"] += counters["framer_checksum_fail"]
+            counters["received"] += counters["framer_unknown_type"]
+            counters["unknown_type"] += counters["framer_unknown_type"]
+            if counters["received"] == 0:
+                continue
+            if seconds > 0:
+                before = previous["types"][type_name]
+                counters["valid_per_second"] = (counters["valid"] - before["valid"]) / seconds
+                counters["bytes_per_second"] = (counters["bytes"] - before["bytes"]) / seconds
+            types[type_name] = counters
+        stream = dict(current["global"])
+        if seconds > 0:
+            stream["bytes_read_per_second"] = (stream["bytes_read"] - previous["global"]["bytes_read"]) / seconds
+        return {"time": current["time"], "global": stream, "types": types}
+
+    # summary as a text table, one row per message type then the stream totals
+    def summary_table(self, previous=None):
+        summary = self.summary(previous)
+        rates = previous is not None
+        header = f"{'type':<6} {'received':>10} {'valid':>10} {'cs fail':>8} {'unknown':>8} {'invalid':>8} {'gaps':>8}"
+        lines = [header + (f" {'msg/s':>8} {'kB/s':>8}" if rates else f" {'kB':>10}")]
+        for type_name, counters in summary["types"].items():
+            line = f"{type_name:<6} {counters['received']:>10} {counters['valid']:>10} {counters['checksum_fail']:>8} " \
+                   f"{counters['unknown_type']:>8} {counters['invalid']:>8} {counters['gaps']:>8}"
+            if rates:
+                line += f" {counters.get('valid_per_second', 0):8.1f} {counters.get('bytes_per_second', 0) / 1e3:8.2f}"
+            else:
+                line += f" {counters['bytes'] / 1e3:10.1f}"
+            lines.append(line)
+        stream = summary["global"]
+        lines.append(f"reads {stream['reads']}, bytes read {stream['bytes_read']}"
+                     + (f" ({stream.get('bytes_read_per_second', 0) / 1e3:.2f} kB/s)" if rates else "")
+                     + f", largest read {stream['read_high_water_bytes']} bytes")
+        lines.append(f"skipped bytes {stream['skipped_bytes']}, UDP datagrams dropped {stream['udp_datagrams_dropped']}"
+                     f", log bytes dropped {stream['log_bytes_dropped']}")
+        if stream["updated_unix_ms"]:
+            lines.append(f"last read {summary['time'] - stream['updated_unix_ms'] / 1000:.1f} seconds ago")
+        return "\n".join(lines)
+
+    def save_json(self, path):
+        with open(path, 'w') as output_file:
+            json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "io_stats": self.summary()}, output_file, indent=2)
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+
+    # the words view has to go before SharedMemory can close, eg when io_loop exits without closing
+    def __del__(self):
+        words = getattr(self, "words", None)
+        if words is not None:
+            words.release()
+
+    # creating process only, after every process is done with it
+    def unlink(self):
+        self.shm.unlink()
@@ -0,0 +1,152 @@
+import json
+import time
+from multiprocessing import shared_memory
+try:  # importing from inside the package
+    from class_configs.latency_stats_config import *
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.latency_stats_config import *
+
+# shared memory latency histograms for the io_loop -> monitor pipeline, one per message type and stage
+# (LATENCY_STAGES). io_loop records the stages it times and the monitor the rest, so each histogram has one writer
+# and there are no locks. each one is a count, total and max, then counts in log spaced buckets: fixed size no
+# matter how long it runs. p50 / p99 come from the buckets, max is exact.
+# timestamps are time.perf_counter_ns(), which is the same clock in every process on one machine.
+
+LATENCY_TYPE_NAMES = list(dict.fromkeys(LATENCY_MESSAGE_TYPES.values())) + [LATENCY_OTHER_TYPE]
+LATENCY_SUB_BUCKETS = 1 << LATENCY_SUB_BUCKET_BITS
+LATENCY_BUCKETS = (LATENCY_MAX_BITS - LATENCY_SUB_BUCKET_BITS + 1) * LATENCY_SUB_BUCKETS
+HISTOGRAM_HEADER_WORDS = 3  # count, total ns, max ns
+
+
+# bucket for a latency in ns: values below LATENCY_SUB_BUCKETS get their own bucket, above that each doubling is
+# split into LATENCY_SUB_BUCKETS by the bits after the top one
+def latency_bucket(ns):
+    bits = ns.bit_length()
+    if bits <= LATENCY_SUB_BUCKET_BITS:
+        return ns
+    bucket = ((bits - LATENCY_SUB_BUCKET_BITS) << LATENCY_SUB_BUCKET_BITS) \
+        + (ns >> (bits - LATENCY_SUB_BUCKET_BITS - 1)) - LATENCY_SUB_BUCKETS
+    return min(bucket, LATENCY_BUCKETS - 1)
+
+
+# smallest latency in ns that goes in this bucket
+def bucket_start_ns(bucket):
+    if bucket < LATENCY_SUB_BUCKETS:
+        return bucket
+    octave, sub_bucket = divmod(bucket, LATENCY_SUB_BUCKETS)
+    return (LATENCY_SUB_BUCKETS + sub_bucket) << (octave - 1)
+
+
+class LatencyStats:
+
+    # create new histograms, or attach to existing ones by name (create=False) from another process
+    def __init__(self, name=None, create=True):
+        self.histogram_words = HISTOGRAM_HEADER_WORDS + LATENCY_BUCKETS
+        size = len(LATENCY_TYPE_NAMES) * len(LATENCY_STAGES) * self.histogram_words * 8
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        if create:
+            self.shm.buf[:size] = bytes(size)
+        self.words = self.shm.buf[:size].cast("Q")
+        # first word of each histogram by (message type, stage)
+        self.starts = {}
+        for type_index, type_name in enumerate(LATENCY_TYPE_NAMES):
+            for stage_index, stage in enumerate(LATENCY_STAGES):
+                self.starts[type_name, stage] = (type_index * len(LATENCY_STAGES) + stage_index) * self.histogram_words
+        for msgtype, type_name in LATENCY_MESSAGE_TYPES.items():
+            for stage in LATENCY_STAGES:
+                self.starts[msgtype, stage] = self.starts[type_name, stage]
+
+    # attach by name after pickling, so it can be a Process arg with spawn (Windows, Mac) too
+    def __reduce__(self):
+        return self.__class__, (self.shm.name, False)
+
+    # add one latency in ns for a message type (bytes like b'IMU', or a type name) and stage
+    def record(self, msgtype, stage, ns):
+        start = self.starts.get((msgtype, stage))
+        if start is None:
+            start = self.starts[LATENCY_OTHER_TYPE, stage]
+        ns = max(ns, 0)
+        words = self.words
+        words[start] += 1
+        words[start + 1] += ns
+        if ns > words[start + 2]:
+            words[start + 2] = ns
+        words[start + HISTOGRAM_HEADER_WORDS + latency_bucket(ns)] += 1
+
+    # io_loop: port read -> framed -> parsed, for one message
+    def record_parse(self, msgtype, read_ns, frame_ns, parse_ns):
+        self.record(msgtype, "frame", frame_ns - read_ns)
+        self.record(msgtype, "parse", parse_ns - frame_ns)
+
+    # monitor: messages read from a MessageRing at refresh_ns and shown by display_ns.
+    # only messages that io_loop timed have ring_write_ns and latency_read_ns
+    def record_display(self, messages, refresh_ns, display_ns):
+        for message in messages:
+            write_ns = getattr(message, "ring_write_ns", None)
+            if write_ns is None:
+                continue
+            self.record(message.msgtype, "handoff", refresh_ns - write_ns)
+            self.record(message.msgtype, "display", display_ns - refresh_ns)
+            self.record(message.msgtype, "total", display_ns - message.latency_read_ns)
+
+    # latency in ns that fraction of the recorded ones are at or below, to within a bucket
+    def percentile_ns(self, start, fraction):
+        count = self.words[start]
+        if count == 0:
+            return None
+        target = fraction * count
+        seen = 0
+        max_ns = self.words[start + 2]
+        buckets = self.words[start + HISTOGRAM_HEADER_WORDS: start + self.histogram_words]
+        for bucket, bucket_count in enumerate(buckets):
+            seen += bucket_count
+            if seen >= target:
+                # middle of the bucket, but never past the largest one recorded
+                return min((bucket_start_ns(bucket) + bucket_start_ns(bucket + 1)) / 2, max_ns)
+        return max_ns
+
+    # {type name: {stage: {count, mean_us, p50_us, p99_us, max_us}}} for every histogram with data
+    def summary(self):
+        results = {}
+        for type_name in LATENCY_TYPE_NAMES:
+            for stage in LATENCY_STAGES:
+                start = self.starts[type_name, stage]
+                count, total_ns, max_ns = self.words[start: start + HISTOGRAM_HEADER_WORDS]
+                if count == 0:
+                    continue
+                results.setdefault(type_name, {})[stage] = {
+                    "count": count,
+                    "mean_us": total_ns / count / 1e3,
+                    "p50_us": self.percentile_ns(start, 0.5) / 1e3,
+                    "p99_us": self.percentile_ns(start, 0.99) / 1e3,
+                    "max_us": max_ns / 1e3,
+                }
+        return results
+
+    # summary as a text table, one row per message type and stage
+    def summary_table(self):
+        lines = [f"{'type':<6} {'stage':<8} {'count':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+        for type_name, stages in self.summary().items():
+            for stage, stats in stages.items():
+                lines.append(f"{type_name:<6} {stage:<8} {stats['count']:>9} {stats['p50_us'] / 1e3:9.3f} "
+                             f"{stats['p99_us'] / 1e3:9.3f} {stats['max_us'] / 1e3:9.3f}")
+        return "\n".join(lines)
+
+    def save_json(self, path):
+        with open(path, 'w') as output_file:
+            json.dump({"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "stages": LATENCY_STAGES,
+                       "latency": self.summary()}, output_file, indent=2)
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+
+    # the words view has to go before SharedMemory can close, eg when io_loop exits without closing
+    def __del__(self):
+        words = getattr(self, "words", None)
+        if words is not None:
+            words.release()
+
+    # creating process only, after every process is done with it
+    def unlink(self):
+        self.shm.unlink()
@@ -0,0 +1,242 @@
+import os
+import io
+import bisect
+import struct
+try:  # importing from inside the package
+    from class_configs.log_compression_config import *
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.log_compression_config import *
+
+# zstd / lz4 compressed logs: CompressedLogWriter writes them, open_log_reader reads any log as a stream of the
+# decompressed data, with no temp file. zstandard and lz4 are only imported when a compressed log is used.
+
+SKIP_READ_SIZE = 1024 * 1024
+
+
+# "zstd", "lz4", or None for an uncompressed log
+def compression_for_path(path):
+    for method, extension in LOG_COMPRESSION_EXTENSIONS.items():
+        if str(path).lower().endswith(extension):
+            return method
+    return None
+
+
+def compression_module(method):
+    try:
+        if method == "zstd":
+            import zstandard
+            return zstandard
+        elif method == "lz4":
+            import lz4.frame
+            return lz4.frame
+    except ModuleNotFoundError as e:
+        raise ModuleNotFoundError(f"{method} compressed logs need the {LOG_COMPRESSION_PACKAGES[method]} package: "
+                                  f"pip install {LOG_COMPRESSION_PACKAGES[method]}") from e
+    raise ValueError(f"unknown log compression {method}, must be one of {', '.join(LOG_COMPRESSION_EXTENSIONS)}")
+
+
+# the seek table as a skippable frame: (compressed size, decompressed size) of each frame, then the footer
+def build_seek_table(frame_sizes):
+    entries = b''.join(struct.pack("<II", compressed, decompressed) for compressed, decompressed in frame_sizes)
+    footer = struct.pack("<IBI", len(frame_sizes), 0, LOG_SEEK_TABLE_MAGIC)
+    return struct.pack("<II", LOG_SEEK_TABLE_SKIPPABLE_MAGIC, len(entries) + len(footer)) + entries + footer
+
+
+# (compressed offsets, decompressed offsets) of each frame start, each with the end of the last frame appended.
+# None if the file has no seek table, eg the logger is still writing it or stopped without closing it
+def read_seek_table(raw):
+    file_size = raw.seek(0, io.SEEK_END)
+    if file_size < LOG_SEEK_TABLE_FOOTER_LENGTH:
+        return None
+    raw.seek(file_size - LOG_SEEK_TABLE_FOOTER_LENGTH)
+    frame_count, descriptor, magic = struct.unpack("<IBI", raw.read(LOG_SEEK_TABLE_FOOTER_LENGTH))
+    table_length = 8 + frame_count * LOG_SEEK_TABLE_ENTRY_LENGTH + LOG_SEEK_TABLE_FOOTER_LENGTH
+    if magic != LOG_SEEK_TABLE_MAGIC or descriptor != 0 or table_length > file_size:
+        return None
+    raw.seek(file_size - table_length)
+    table = raw.read(table_length - LOG_SEEK_TABLE_FOOTER_LENGTH)
+    skippable_magic, frame_size = struct.unpack_from("<II", table)
+    if skippable_magic != LOG_SEEK_TABLE_SKIPPABLE_MAGIC or frame_size != table_length - 8:
+        return None
+    compressed_offsets = [0]
+    decompressed_offsets = [0]
+    for compressed, decompressed in struct.iter_unpack("<II", table[8:]):
+        compressed_offsets.append(compressed_offsets[-1] + compressed)
+        decompressed_offsets.append(decompressed_offsets[-1] + decompressed)
+    return compressed_offsets, decompressed_offsets
+
+
+# file-like writer for LogWriter: buffers up to frame_bytes, then compresses them as one frame.
+# flush() ends the frame early so an fsync keeps everything written so far. close() adds the seek table.
+class CompressedLogWriter:
+    def __init__(self, path, method, level=None, frame_bytes=LOG_COMPRESSED_FRAME_BYTES):
+        self.module = compression_module(method)
+        self.method = method
+        self.level = LOG_COMPRESSION_LEVELS[method] if level is None else level
+        self.frame_bytes = frame_bytes
+        self.name = path
+        self.raw = open(path, 'wb')
+        if method == "zstd":
+            self.compressor = self.module.ZstdCompressor(level=self.level, write_content_size=True)
+        self.pending = bytearray()
+        self.frame_sizes = []
+
+    def write(self, data):
+        self.pending += data
+        if len(self.pending) >= self.frame_bytes:
+            self.end_frame()
+        return len(data)
+
+    def end_frame(self):
+        if not self.pending:
+            return
+        if self.method == "zstd":
+            frame = self.compressor.compress(self.pending)
+        else:
+            frame = self.module.compress(bytes(self.pending), compression_level=self.level)
+        self.raw.write(frame)
+        self.frame_sizes.append((len(frame), len(self.pending)))
+        self.pending = bytearray()
+
+    def flush(self):
+        self.end_frame()
+        self.raw.flush()
+
+    def fileno(self):
+        return self.raw.fileno()
+
+    def close(self):
+        if self.raw.closed:
+            return
+        self.end_frame()
+        self.raw.write(build_seek_table(self.frame_sizes))
+        self.raw.close()
+
+
+# read-only stream of a compressed log's decompressed data. seek() restarts at the frame holding the offset when
+# there is a seek table, otherwise it decompresses from the start (or from here, going forward) up to the offset.
+class CompressedLogReader(io.RawIOBase):
+    def __init__(self, path):
+        self.name = path
+        self.method = compression_for_path(path)
+        self.module = compression_module(self.method)
+        self.raw = open(path, 'rb')
+        self.seek_table = read_seek_table(self.raw)
+        self.stream = None
+        self.position = 0
+        self.start_stream(0)
+
+    def start_stream(self, frame_index):
+        if self.stream:
+            self.stream.close()
+        compressed_offset = self.seek_table[0][frame_index] if self.seek_table else 0
+        self.raw.seek(compressed_offset)
+        if self.method == "zstd":
+            self.stream = self.module.ZstdDecompressor().stream_reader(self.raw, read_across_frames=True, closefd=False)
+        else:
+            self.stream = self.module.LZ4FrameFile(self.raw, 'rb')
+        self.position = self.seek_table[1][frame_index] if self.seek_table else 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    # up to size bytes of decompressed data, b'' at the end. a log cut off mid frame (logger stopped without closing)
+    # ends where its data does: zstd returns what it has, lz4 raises EOFError, which ends the data here the same way.
+    # lz4 reads one block per call, so the EOFError only loses the unfinished block and not data read before it
+    def read_stream(self, size):
+        try:
+            if self.method == "lz4":
+                return self.stream.read1(size)
+            return self.stream.read(size)
+        except EOFError:
+            return b''
+
+    # like a file, returns size bytes unless the log ends first: the decompressors can return less at frame ends
+    def read(self, size=-1):
+        if size is None or size < 0:
+            chunks = []
+            while True:
+                chunk = self.read_stream(SKIP_READ_SIZE)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            data = b''.join(chunks)
+        else:
+            data = self.read_stream(size)
+            while 0 < len(data) < size:
+                more = self.read_stream(size - len(data))
+                if not more:
+                    break
+                data += more
+        self.position += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size()
+        offset = max(0, offset)
+        if self.seek_table:
+            frame_index = min(bisect.bisect_right(self.seek_table[1], offset) - 1, len(self.seek_table[1]) - 1)
+            # restart at the frame unless offset is ahead in the frame already being read
+            if not self.seek_table[1][frame_index] <= self.position <= offset:
+                self.start_stream(frame_index)
+        elif offset < self.position:
+            self.start_stream(0)
+        while self.position < offset:
+            if not self.read(min(SKIP_READ_SIZE, offset - self.position)):
+                break  # past the end
+        return self.position
+
+    # decompressed size: from the seek table, or by decompressing everything without one
+    def size(self):
+        if self.seek_table:
+            return self.seek_table[1][-1]
+        position = self.position
+        self.start_stream(0)
+        while self.read(SKIP_READ_SIZE):
+            pass
+        size = self.position
+        self.seek(position)
+        return size
+
+    def close(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        self.raw.close()
+        super().close()
+
+
+# open any log for reading as bytes: compressed logs by extension, decompressing as they are read
+def open_log_reader(path):
+    if compression_for_path(path):
+        return CompressedLogReader(path)
+    return open(path, 'rb')
+
+
+# open a new log for writing, compressed if compression is "zstd" or "lz4". path should have its extension
+def open_log_writer(path, compression=None):
+    if compression:
+        return CompressedLogWriter(path, compression)
+    return open(path, 'wb')
+
+
+# size of a log's data, decompressed for compressed logs
+def log_data_size(path):
+    if not compression_for_path(path):
+        return os.path.getsize(path)
+    with CompressedLogReader(path) as reader:
+        return reader.size()
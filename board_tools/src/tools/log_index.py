@@ -0,0 +1,193 @@
+import os
+import json
+try:  # importing from inside the package
+    from class_configs.log_index_config import *
+    from message_framer import MessageFramer, FRAME_ASCII, FRAME_RTCM, FRAME_BINARY, ASCII_MAX_FRAME_LENGTH
+    from readable_scheme import ReadableScheme
+    from rtcm_scheme import RTCM_Scheme
+    from binary_scheme import Binary_Scheme
+    from log_compression import open_log_reader, log_data_size
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.log_index_config import *
+    from tools.message_framer import MessageFramer, FRAME_ASCII, FRAME_RTCM, FRAME_BINARY, ASCII_MAX_FRAME_LENGTH
+    from tools.readable_scheme import ReadableScheme
+    from tools.rtcm_scheme import RTCM_Scheme
+    from tools.binary_scheme import Binary_Scheme
+    from tools.log_compression import open_log_reader, log_data_size
+
+# sidecar seek index for logs, so a time window or some message types can be read without parsing the whole log.
+# written while logging (LogWriter in ioloop.py) or afterwards by build_log_index. read_log_messages uses it to seek
+# straight to the segments that can have matching messages, then filters those messages exactly.
+
+INDEX_READ_CHUNK_SIZE = 65536
+# a message can start up to one frame length before the offset of the segment it's indexed in (eg split across two
+# reads while logging), so reading a segment starts this much earlier. ASCII frames are the longest.
+INDEX_SEGMENT_LEAD_BYTES = ASCII_MAX_FRAME_LENGTH
+
+
+def log_index_path(log_path):
+    return log_path + LOG_INDEX_EXTENSION
+
+
+# writes the index one message at a time, in log order. close() records how much of the log is indexed.
+class LogIndexBuilder:
+    def __init__(self, index_path, interval_bytes=LOG_INDEX_INTERVAL_BYTES):
+        self.file = open(index_path, 'w')
+        self.interval_bytes = interval_bytes
+        self.entry = None
+        self.file.write(json.dumps({"log_index_version": LOG_INDEX_VERSION, "interval_bytes": interval_bytes}) + "\n")
+
+    # a valid parsed message starting at byte offset in the log
+    def add_message(self, offset, message):
+        entry = self.entry
+        if entry is None or offset >= entry["offset"] + self.interval_bytes:
+            self.write_entry()
+            entry = self.entry = {"offset": offset, "types": []}
+            for field in LOG_INDEX_TIME_FIELDS:
+                entry[field] = None
+        for field in LOG_INDEX_TIME_FIELDS:
+            value = getattr(message, field, None)
+            if value is None:
+                continue
+            time_range = entry[field]
+            if time_range is None:
+                entry[field] = [value, value]
+            elif value < time_range[0]:
+                time_range[0] = value
+            elif value > time_range[1]:
+                time_range[1] = value
+        msgtype = message.msgtype.decode()
+        if msgtype not in entry["types"]:
+            entry["types"].append(msgtype)
+
+    def write_entry(self):
+        if self.entry:
+            self.file.write(json.dumps(self.entry) + "\n")
+            self.file.flush()  # so a log still being written has a usable index
+
+    # log_size: bytes of log covered. a log longer than that, or an index without this line, has an unindexed tail
+    def close(self, log_size):
+        self.write_entry()
+        self.entry = None
+        self.file.write(json.dumps({"indexed_bytes": log_size}) + "\n")
+        self.file.close()
+
+
+# index a finished log in one pass. returns the index path
+def build_log_index(log_path, interval_bytes=LOG_INDEX_INTERVAL_BYTES):
+    schemes = {FRAME_ASCII: ReadableScheme(), FRAME_RTCM: RTCM_Scheme(), FRAME_BINARY: Binary_Scheme()}
+    index_path = log_index_path(log_path)
+    builder = LogIndexBuilder(index_path, interval_bytes)
+    framer = MessageFramer()
+    with open_log_reader(log_path) as reader:
+        while True:
+            chunk = reader.read(INDEX_READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            framer.add_data(chunk)
+            for frame_format, frame in framer.frames():
+                message = schemes[frame_format].parse_message(frame)
+                if message.valid:
+                    builder.add_message(framer.frame_offset, message)
+    builder.close(framer.total_bytes())
+    return index_path
+
+
+# returns (segment entries in log order, bytes indexed or None if the index wasn't closed)
+def read_log_index(index_path):
+    entries = []
+    indexed_bytes = None
+    with open(index_path, 'r') as index_file:
+        header = json.loads(index_file.readline())
+        if header.get("log_index_version") != LOG_INDEX_VERSION:
+            raise ValueError(f"unsupported log index version in {index_path}: {header.get('log_index_version')}")
+        for line in index_file:
+            record = json.loads(line)
+            if "indexed_bytes" in record:
+                indexed_bytes = record["indexed_bytes"]
+            else:
+                entries.append(record)
+    return entries, indexed_bytes
+
+
+def entry_matches(entry, start_time, end_time, time_field, msgtypes):
+    if msgtypes is not None and not any(msgtype in msgtypes for msgtype in entry["types"]):
+        return False
+    if start_time is None and end_time is None:
+        return True
+    time_range = entry.get(time_field)
+    if time_range is None:
+        return False
+    return (start_time is None or time_range[1] >= start_time) and (end_time is None or time_range[0] <= end_time)
+
+
+# byte ranges [start, end) of the log that can have matching messages, merged where they touch
+def matching_log_ranges(entries, indexed_bytes, log_size, start_time=None, end_time=None,
+                        time_field="imu_time_ms", msgtypes=None):
+    ranges = []
+    for i, entry in enumerate(entries):
+        if not entry_matches(entry, start_time, end_time, time_field, msgtypes):
+            continue
+        start = max(0, entry["offset"] - INDEX_SEGMENT_LEAD_BYTES)
+        end = entries[i + 1]["offset"] if i + 1 < len(entries) else (indexed_bytes or log_size)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    # log written after the index was closed, or still being written: can't skip that part
+    unindexed_start = indexed_bytes if indexed_bytes is not None else (entries[-1]["offset"] if entries else 0)
+    if log_size > unindexed_start:
+        start = max(0, unindexed_start - INDEX_SEGMENT_LEAD_BYTES)
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = log_size
+        else:
+            ranges.append([start, log_size])
+    return ranges
+
+
+# (format, frame bytes, offset) for frames starting in [start, end) of an open log
+def frames_in_range(reader, start, end):
+    framer = MessageFramer()
+    framer.buffer_offset = start
+    reader.seek(start)
+    while True:
+        chunk = reader.read(INDEX_READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        framer.add_data(chunk)
+        for frame_format, frame in framer.frames():
+            if framer.frame_offset >= end:
+                return
+            yield frame_format, frame, framer.frame_offset
+
+
+# parsed messages of a log in log order, only those with time_field in [start_time, end_time] and msgtype in msgtypes
+# (eg [b'IMU', b'INS']) when given. uses the log's index to skip everything else, building it first if there is none.
+def read_log_messages(log_path, start_time=None, end_time=None, time_field="imu_time_ms", msgtypes=None, build_index=True):
+    if msgtypes is not None:
+        msgtypes = set(msgtype.decode() if type(msgtype) is bytes else msgtype for msgtype in msgtypes)
+    index_path = log_index_path(log_path)
+    log_size = log_data_size(log_path)
+    if not os.path.exists(index_path) and build_index:
+        build_log_index(log_path)
+    if os.path.exists(index_path):
+        entries, indexed_bytes = read_log_index(index_path)
+        ranges = matching_log_ranges(entries, indexed_bytes, log_size, start_time, end_time, time_field, msgtypes)
+    else:
+        ranges = [[0, log_size]]
+
+    schemes = {FRAME_ASCII: ReadableScheme(), FRAME_RTCM: RTCM_Scheme(), FRAME_BINARY: Binary_Scheme()}
+    with open_log_reader(log_path) as reader:
+        for start, end in ranges:
+            for frame_format, frame, offset in frames_in_range(reader, start, end):
+                message = schemes[frame_format].parse_message(frame)
+                if not message.valid:
+                    continue
+                if msgtypes is not None and message.msgtype.decode() not in msgtypes:
+                    continue
+                if start_time is not None or end_time is not None:
+                    value = getattr(message, time_field, None)
+                    if value is None or (start_time is not None and value < start_time) \
+                            or (end_time is not None and value > end_time):
+                        continue
+                yield message
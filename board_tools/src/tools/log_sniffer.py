@@ -0,0 +1,50 @@
+try:  # importing from inside the package
+    from message_framer import MessageFramer, FRAME_ASCII, FRAME_RTCM, FRAME_BINARY
+    from log_compression import open_log_reader
+    from checksums import ascii_checksums_pass
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.message_framer import MessageFramer, FRAME_ASCII, FRAME_RTCM, FRAME_BINARY
+    from tools.log_compression import open_log_reader
+    from tools.checksums import ascii_checksums_pass
+
+# detect the format of a log file from one read of its start.
+# frames the prefix for all formats at once: RTCM and binary frames already pass their CRC/checksum in the framer,
+# ASCII frames are also checked here. each format's score is the share of prefix bytes in its valid frames.
+
+SNIFF_PREFIX_BYTES = 65536
+SNIFF_MIN_FRAMES = 3  # fewer valid frames than this is not enough to call it that format
+SNIFF_MIN_SHARE = 0.05  # a second format has to cover this much of the prefix to count as a mixed log
+
+# format names used by convertLog
+SNIFF_FORMAT_NAMES = {FRAME_ASCII: "ascii", FRAME_RTCM: "rtcm", FRAME_BINARY: "binary"}
+
+
+# returns (formats, confidence): formats is a list of "ascii", "rtcm", "binary", biggest share first, empty if unknown.
+# more than one format means a mixed log. confidence is the share of the prefix in valid frames, 0 to 1.
+def sniff_log_format(file_path, prefix_bytes=SNIFF_PREFIX_BYTES):
+    with open_log_reader(file_path) as reader:
+        prefix = reader.read(prefix_bytes)
+    if not prefix:
+        return [], 0.0
+
+    framer = MessageFramer()
+    framer.add_data(prefix)
+    frames = {frame_format: [] for frame_format in SNIFF_FORMAT_NAMES}
+    for frame_format, frame in framer.frames():
+        frames[frame_format].append(frame)
+    # all ASCII checksums in one batch. the framer already checked the others
+    frames[FRAME_ASCII] = [frame for frame, passed in zip(frames[FRAME_ASCII], ascii_checksums_pass(frames[FRAME_ASCII]))
+                           if passed]
+    frame_counts = {frame_format: len(frames[frame_format]) for frame_format in SNIFF_FORMAT_NAMES}
+    frame_bytes = {frame_format: sum(len(frame) for frame in frames[frame_format]) for frame_format in SNIFF_FORMAT_NAMES}
+
+    # an incomplete message at the end of the prefix is not evidence against the format
+    checked_bytes = len(prefix) - len(framer.remaining())
+    if checked_bytes <= 0:
+        return [], 0.0
+    shares = {frame_format: frame_bytes[frame_format] / checked_bytes for frame_format in SNIFF_FORMAT_NAMES}
+    detected = [frame_format for frame_format in SNIFF_FORMAT_NAMES
+                if frame_counts[frame_format] >= SNIFF_MIN_FRAMES and shares[frame_format] >= SNIFF_MIN_SHARE]
+    detected.sort(key=lambda frame_format: shares[frame_format], reverse=True)
+    confidence = min(1.0, sum((shares[frame_format] for frame_format in detected), 0.0))
+    return [SNIFF_FORMAT_NAMES[frame_format] for frame_format in detected], confidence
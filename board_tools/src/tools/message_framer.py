@@ -0,0 +1,217 @@
+import re
+try:  # importing from inside the package
+    from class_configs.readable_scheme_config import READABLE_START, READABLE_END, OUR_TALKER
+    from class_configs.rtcm_scheme_config import RTCM_PREAMBLE, RTCM_CRC_LEN, ANELLO_IDENTIFIER, EQUIVALENT_MESSAGE_TYPES
+    from class_configs.binary_scheme_config import *
+    from checksums import binary_checksum, crc24q
+    from log_compression import open_log_reader
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.readable_scheme_config import READABLE_START, READABLE_END, OUR_TALKER
+    from tools.class_configs.rtcm_scheme_config import RTCM_PREAMBLE, RTCM_CRC_LEN, ANELLO_IDENTIFIER, \
+        EQUIVALENT_MESSAGE_TYPES
+    from tools.class_configs.binary_scheme_config import *
+    from tools.checksums import binary_checksum, crc24q
+    from tools.log_compression import open_log_reader
+
+# incremental framer for mixed ASCII / RTCM / binary streams.
+# add_data takes any size chunks, frames() yields (format, bytes) for each whole message found so far.
+# binary and RTCM frames use the length field and must pass their checksum, ASCII goes from #AP to the end code.
+# incomplete data stays buffered until the next add_data.
+
+FRAME_ASCII = "ASCII"
+FRAME_RTCM = "RTCM"
+FRAME_BINARY = "Binary"
+ALL_FRAME_FORMATS = (FRAME_ASCII, FRAME_RTCM, FRAME_BINARY)
+
+ASCII_MAX_FRAME_LENGTH = 1000  # longer than longest ASCII message, same as READ_LIMIT_BYTES in Binary_and_ASCII_Scheme
+RTCM_HEADER_LENGTH = 3  # preamble, 6 bit reserved + 10 bit length
+BINARY_HEADER_LENGTH = len(BINARY_PREAMBLE) + BINARY_TYPE_LENGTH + BINARY_LENGTH_LENGTH
+FRAMER_COMPACT_SIZE = 65536  # drop consumed bytes from the front of the buffer once this many are used
+FILE_CHUNK_SIZE = 1 << 20
+
+START_BYTES = {FRAME_ASCII: READABLE_START, FRAME_RTCM: RTCM_PREAMBLE, FRAME_BINARY: BINARY_PREAMBLE[0:1]}
+
+# results of trying to frame at one start byte
+INCOMPLETE = "incomplete"
+NOT_A_FRAME = "not a frame"
+
+
+class MessageFramer:
+
+    def __init__(self, formats=ALL_FRAME_FORMATS):
+        self.formats = formats
+        self.buffer = bytearray()
+        self.position = 0  # start of unconsumed data in buffer
+        self.buffer_offset = 0  # stream position of buffer[0]: counts every byte added, including dropped ones
+        self.frame_offset = 0  # stream position where the last frame from frames() starts
+        self.skipped_bytes = 0  # bytes outside any frame, eg partial message at start of stream or checksum fail
+        # binary / RTCM messages that failed their checksum, by the message type in their header: only counted
+        # right after another frame, since a start byte inside other data usually fails the checksum too
+        self.checksum_failures = {}
+        self.unknown_types = 0  # binary headers with a type byte that isn't a message type, counted the same way
+        # stream position where the last frame from frames() ends, or where a counted checksum fail's length says it
+        # ends, so a run of failed messages is all counted
+        self.frame_end_offset = None
+        self.start_pattern = re.compile(b"[" + b"".join(re.escape(START_BYTES[f]) for f in formats) + b"]")
+        self.frame_functions = {FRAME_ASCII: self.frame_ascii, FRAME_RTCM: self.frame_rtcm, FRAME_BINARY: self.frame_binary}
+
+    def add_data(self, data):
+        if data:
+            self.buffer += data
+
+    # yield (format, frame bytes) for every complete message in the buffer
+    def frames(self):
+        while True:
+            match = self.start_pattern.search(self.buffer, self.position)
+            if match is None:
+                self.skipped_bytes += len(self.buffer) - self.position
+                self.position = len(self.buffer)
+                break
+            start = match.start()
+            self.skipped_bytes += start - self.position
+            self.position = start
+
+            result = None
+            start_byte = self.buffer[start: start + 1]
+            for frame_format in self.formats:
+                if START_BYTES[frame_format] == start_byte:
+                    result = self.frame_functions[frame_format](start)
+                    break
+
+            if result == INCOMPLETE:
+                break  # wait for more data
+            elif result == NOT_A_FRAME:
+                self.skipped_bytes += 1
+                self.position = start + 1
+            else:
+                frame_format, end = result
+                self.position = end
+                self.frame_offset = self.buffer_offset + start
+                self.frame_end_offset = self.buffer_offset + end
+                yield frame_format, bytes(self.buffer[start: end])
+        self.compact()
+
+    # unconsumed data: the start of an incomplete message, if any
+    def remaining(self):
+        return bytes(self.buffer[self.position:])
+
+    def remaining_length(self):
+        return len(self.buffer) - self.position
+
+    # stream position after everything added so far
+    def total_bytes(self):
+        return self.buffer_offset + len(self.buffer)
+
+    def reset(self):
+        self.buffer_offset += len(self.buffer)
+        self.buffer = bytearray()
+        self.position = 0
+        self.frame_end_offset = None  # new stream: its first frame doesn't follow the old one
+
+    def compact(self):
+        if self.position >= FRAMER_COMPACT_SIZE or self.position == len(self.buffer):
+            del self.buffer[:self.position]
+            self.buffer_offset += self.position
+            self.position = 0
+
+    # ASCII: #AP...*cs\r\n . a new # before the end code means the message was cut off, so restart there.
+    def frame_ascii(self, start):
+        buf = self.buffer
+        available = len(buf) - start
+        talker_end = start + len(READABLE_START) + len(OUR_TALKER)
+        if available < talker_end - start:
+            return INCOMPLETE if OUR_TALKER.startswith(buf[start + 1:]) else NOT_A_FRAME
+        if buf[start + len(READABLE_START): talker_end] != OUR_TALKER:
+            return NOT_A_FRAME
+        search_end = start + ASCII_MAX_FRAME_LENGTH
+        end_code_index = buf.find(READABLE_END, talker_end, search_end)
+        next_start = buf.find(READABLE_START, talker_end, search_end if end_code_index < 0 else end_code_index)
+        if next_start >= 0:
+            return NOT_A_FRAME
+        if end_code_index < 0:
+            return INCOMPLETE if available < ASCII_MAX_FRAME_LENGTH else NOT_A_FRAME
+        return FRAME_ASCII, end_code_index + len(READABLE_END)
+
+    # RTCM: D3, 6 reserved bits + 10 bit length, message data, 3 byte CRC24Q over everything before it
+    def frame_rtcm(self, start):
+        buf = self.buffer
+        if len(buf) - start < RTCM_HEADER_LENGTH:
+            return INCOMPLETE
+        if buf[start + 1] & 0xFC:  # reserved bits are 0
+            return NOT_A_FRAME
+        rtcm_length = ((buf[start + 1] & 0x03) << 8) | buf[start + 2]
+        end = start + RTCM_HEADER_LENGTH + rtcm_length + RTCM_CRC_LEN
+        if end > len(buf):
+            return INCOMPLETE
+        if crc24q(buf, start, end) != 0:  # crc over data including its own crc is 0
+            if self.buffer_offset + start == self.frame_end_offset and rtcm_length >= 2:
+                type_and_subtype = (buf[start + RTCM_HEADER_LENGTH] << 8) | buf[start + RTCM_HEADER_LENGTH + 1]
+                msgtype = EQUIVALENT_MESSAGE_TYPES.get(type_and_subtype & 0xF, b'Unknown') \
+                    if type_and_subtype >> 4 == ANELLO_IDENTIFIER else b'Unknown'
+                self.checksum_failures[msgtype] = self.checksum_failures.get(msgtype, 0) + 1
+                self.frame_end_offset = self.buffer_offset + end
+            return NOT_A_FRAME
+        return FRAME_RTCM, end
+
+    # binary: C5 50, type, length, payload, 2 byte checksum over type, length and payload
+    def frame_binary(self, start):
+        buf = self.buffer
+        available = len(buf) - start
+        if available < 2:
+            return INCOMPLETE
+        if buf[start: start + len(BINARY_PREAMBLE)] != BINARY_PREAMBLE:
+            return NOT_A_FRAME
+        if available < BINARY_HEADER_LENGTH:
+            return INCOMPLETE
+        type_index = start + len(BINARY_PREAMBLE)
+        if buf[type_index] not in BINARY_EQUIVALENT_MESSAGE_TYPES:
+            if self.buffer_offset + start == self.frame_end_offset:
+                self.unknown_types += 1
+            return NOT_A_FRAME
+        checksum_index = start + BINARY_HEADER_LENGTH + buf[type_index + BINARY_TYPE_LENGTH]
+        end = checksum_index + BINARY_CRC_LEN
+        if end > len(buf):
+            return INCOMPLETE
+        if binary_checksum(buf[type_index: checksum_index]) != buf[checksum_index: end]:
+            if self.buffer_offset + start == self.frame_end_offset:
+                msgtype = BINARY_EQUIVALENT_MESSAGE_TYPES[buf[type_index]]
+                self.checksum_failures[msgtype] = self.checksum_failures.get(msgtype, 0) + 1
+                self.frame_end_offset = self.buffer_offset + end
+            return NOT_A_FRAME
+        return FRAME_BINARY, end
+
+
+# frame a whole log file, or bytes start to end of it, reading in chunks so large logs don't need to fit in memory.
+# compressed logs are decompressed as they are read, start and end are offsets in the decompressed data.
+# start should be where a message starts, like the start of the log or a next_frame_offset.
+# pass a MessageFramer to read its totals afterwards: checksum_failures counts messages dropped for a bad checksum
+def frames_from_file(file_path, formats=ALL_FRAME_FORMATS, chunk_size=FILE_CHUNK_SIZE, start=0, end=None, framer=None):
+    if framer is None:
+        framer = MessageFramer(formats)
+    framer.frame_end_offset = framer.total_bytes()  # so a bad checksum on the first message is counted too
+    with open_log_reader(file_path) as reader:
+        reader.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            chunk = reader.read(chunk_size if remaining is None else min(chunk_size, remaining))
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            framer.add_data(chunk)
+            yield from framer.frames()
+
+
+# file offset of the first whole message at or after offset, or the file size if there are none.
+# use to split a log into parts which each start on a message.
+def next_frame_offset(file_path, offset, formats=ALL_FRAME_FORMATS, chunk_size=65536):
+    framer = MessageFramer(formats)
+    with open_log_reader(file_path) as reader:
+        reader.seek(offset)
+        while True:
+            chunk = reader.read(chunk_size)
+            if not chunk:
+                return offset + framer.skipped_bytes + len(framer.remaining())
+            framer.add_data(chunk)
+            for frame in framer.frames():
+                return offset + framer.skipped_bytes  # everything before the first frame was skipped
@@ -0,0 +1,89 @@
+try:  # importing from inside the package
+    from message_scheme import Message
+    from class_configs.readable_scheme_config import *
+    from class_configs.binary_scheme_config import *
+    from class_configs.rtcm_scheme_config import *
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.message_scheme import Message
+    from tools.class_configs.readable_scheme_config import *
+    from tools.class_configs.binary_scheme_config import *
+    from tools.class_configs.rtcm_scheme_config import *
+
+# __slots__ record classes for the output message types (IMU, IM1, INS, GPS, GP2, HDG, AHRS, X3 IMU), one per format in
+# the scheme configs. they are Messages with the same attribute names: a field that wasn't set still fails hasattr, and
+# any other attribute still works, it goes in a __dict__ which is only made when needed. a parsed message has no
+# __dict__ at all. slots only pay off if they are the fields the message gets: a record with every field of every
+# format is bigger than the dict, so the schemes pick the record for the exact format (type byte, comma count).
+
+# set by each scheme on every message, before decoding the payload
+READABLE_RECORD_FIELDS = ["valid", "error", "msgtype", "data", "payload", "checksum", "checksum_input", "talker"]
+BINARY_RECORD_FIELDS = ["valid", "error", "msgtype", "data", "raw_data", "payload", "payload_length", "checksum",
+                        "checksum_input", "binary_msgtype"]
+RTCM_RECORD_FIELDS = ["valid", "error", "msgtype", "data", "raw_data", "payload", "payload_length", "checksum",
+                      "company_code", "rtcm_msgtype"]
+
+# output types with records: ASCII formats by type. the schemes tell them apart by field count
+READABLE_RECORD_FORMATS = {
+    b'IMU': [FORMAT_IMU_NO_SYNC, FORMAT_IMU_WITH_SYNC, FORMAT_IMU_3FOG, FORMAT_IMU_X3_NO_STATUS, FORMAT_IMU_X3_WITH_STATUS],
+    b'IM1': [FORMAT_IM1],
+    b'INS': [FORMAT_INS, FORMAT_INS_EXTRA_COMMA],
+    b'GPS': [FORMAT_GPS],
+    b'GP2': [FORMAT_GP2],
+    b'HDG': [FORMAT_HDG],
+    b'AHRS': [FORMAT_AHRS],
+}
+# RTCM IMU is decoded with one format, then the other if that fails: its record has both
+RTCM_RECORD_FORMATS = {
+    RTCM_MSGTYPE_IMU: [RTCM_IMU_PAYLOAD_FIELDS_WITH_SYNC, RTCM_IMU_PAYLOAD_FIELDS_NO_SYNC],
+    RTCM_MSGTYPE_IM1: [RTCM_IM1_PAYLOAD_FIELDS],
+    RTCM_MSGTYPE_INS: [RTCM_INS_PAYLOAD_FIELDS],
+    RTCM_MSGTYPE_GPS: [RTCM_GPS_PAYLOAD_FIELDS],
+    RTCM_MSGTYPE_HEADING: [RTCM_DUAL_ANT_HEAD_FIELDS],
+    RTCM_MSGTYPE_AHRS: [RTCM_AHRS_PAYLOAD_FIELDS],
+}
+
+
+# fields the schemes compute from format fields, eg imu_time_ms from imu_time_ns
+def derived_fields(msgtype, names):
+    derived = []
+    for time_name in ["imu_time", "sync_time", "odometer_time"]:
+        if time_name + "_ns" in names:
+            derived.append(time_name + "_ms")
+    if "mems_ranges" in names:
+        derived += ["accel_range", "rate_range"]
+    if "status_info" in names or "siphog_x_status" in names:
+        derived += ["siphog_x_status_bits", "siphog_y_status_bits", "siphog_z_status_bits"]
+    if "ins_solution_status_and_gps_used" in names:
+        derived += ["ins_solution_status", "gps_used"]
+    if "carrsoln_and_fix" in names:
+        derived += ["carrier_solution_status", "gnss_fix_type"]
+    if msgtype == b'HDG' and "flags" in names:
+        derived += list(HEADING_FLAGS.values()) + ["carrSoln"]
+    return derived
+
+
+# a Message subclass with a slot for each field, made a module attribute so its records can be pickled.
+# names that can't be slots (like "extra comma") stay in __dict__
+def record_class(class_name, msgtype, common_fields, format_lists):
+    names = [item[0] for format_list in format_lists for item in format_list]
+    names += derived_fields(msgtype, names)
+    slots = tuple(dict.fromkeys(name for name in common_fields + names if name.isidentifier()))
+    record = type(class_name, (Message,), {"__slots__": slots})
+    globals()[class_name] = record
+    return record
+
+
+# ASCII: msgtype -> {number of commas in the payload: record class}
+READABLE_RECORD_CLASSES = {msgtype: {len(format_list) - 1: record_class(f"Readable{msgtype.decode()}Record{len(format_list)}",
+                                                                         msgtype, READABLE_RECORD_FIELDS, [format_list])
+                                     for format_list in format_lists}
+                           for msgtype, format_lists in READABLE_RECORD_FORMATS.items()}
+# binary: type byte -> record class. X3 IMU has its own type byte and record
+BINARY_RECORD_CLASSES = {binary_msgtype: record_class(
+    "BinaryX3IMURecord" if binary_msgtype == BINARY_MSGTYPE_X3_IMU else f"Binary{msgtype.decode()}Record",
+    msgtype, BINARY_RECORD_FIELDS, [BINARY_MESSAGE_TYPES[binary_msgtype]])
+    for binary_msgtype, msgtype in BINARY_EQUIVALENT_MESSAGE_TYPES.items()}
+# RTCM: 4 bit message type -> record class. GPS and GP2 are the same RTCM type
+RTCM_RECORD_CLASSES = {rtcm_msgtype: record_class(f"Rtcm{EQUIVALENT_MESSAGE_TYPES[rtcm_msgtype].decode()}Record",
+                                                  EQUIVALENT_MESSAGE_TYPES[rtcm_msgtype], RTCM_RECORD_FIELDS, format_lists)
+                       for rtcm_msgtype, format_lists in RTCM_RECORD_FORMATS.items()}
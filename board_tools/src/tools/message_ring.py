@@ -0,0 +1,150 @@
+import time
+import struct
+from multiprocessing import shared_memory
+try:  # importing from inside the package
+    from class_configs.message_ring_config import *
+    from message_scheme import Message
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.message_ring_config import *
+    from tools.message_scheme import Message
+
+# shared memory ring buffer of decoded messages, one writer (io_loop) and any number of readers (monitor).
+# each record is a fixed layout: sequence number, presence bits, two latency timestamps, then the fields as int64 /
+# float64. the timestamps (perf_counter_ns of the port read and of the ring write) are 0 unless io_loop times messages.
+# no locks: the writer zeroes a slot's sequence number, writes the record, then sets the sequence number and the
+# ring's write count. a reader keeps a record only if the slot has the same sequence number before and after copying,
+# otherwise the writer lapped it and it counts as dropped.
+
+# the counters are set through a uint64 memoryview, which stores each one with a single copy. struct.pack_into zeroes
+# its whole range before packing, so a reader could see a counter as 0.
+RING_COUNT_SIZE = 8  # ring header: number of records written so far. each slot also starts with its sequence number
+RING_FIELD_CODES = {int: "q", float: "d"}
+
+
+class MessageRing:
+
+    # create a new ring, or attach to an existing one by name (create=False) from another process
+    def __init__(self, msgtype, fields, capacity=MESSAGE_RING_CAPACITY, name=None, create=True):
+        if len(fields) > 64:
+            raise ValueError(f"{msgtype} ring has {len(fields)} fields, max is 64")
+        self.msgtype = msgtype
+        self.fields = fields
+        self.capacity = capacity
+        self.names = tuple(name for name, number_type in fields)
+        self.types = tuple(number_type for name, number_type in fields)
+        self.zero_values = tuple(number_type(0) for number_type in self.types)
+        self.record_struct = struct.Struct("<QQQ" + "".join(RING_FIELD_CODES[number_type] for number_type in self.types))
+        self.slot_size = RING_COUNT_SIZE + self.record_struct.size  # all 8 byte codes, so slots stay aligned
+        size = RING_COUNT_SIZE + capacity * self.slot_size
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        self.buf = self.shm.buf
+        if create:
+            self.buf[:size] = bytes(size)
+        self.counts = self.buf[:size].cast("Q")  # counts[0] is the write count, counts[offset // 8] a slot's sequence
+        self.read_count = self.write_count()  # reader position: only see records written after attaching
+        self.dropped = 0  # records the writer overwrote before this reader got to them
+
+    # attach by name after pickling, so the ring can be a Process arg with spawn (Windows, Mac) too
+    def __reduce__(self):
+        return self.__class__, (self.msgtype, self.fields, self.capacity, self.shm.name, False)
+
+    def write_count(self):
+        return self.counts[0]
+
+    def slot_offset(self, sequence):
+        return RING_COUNT_SIZE + (sequence % self.capacity) * self.slot_size
+
+    # writer side: copy the fields this message has into the next slot. read_ns: when its data was read from the port,
+    # for latency stats. the ring adds the write time if it's given
+    def write(self, message, read_ns=0):
+        present = 0
+        values = list(self.zero_values)
+        for i, name in enumerate(self.names):
+            value = getattr(message, name, None)
+            if value is None:
+                continue
+            try:
+                values[i] = self.types[i](value)
+            except (TypeError, ValueError):
+                continue  # eg blank ASCII field: leave it out like the parser did
+            present |= 1 << i
+        write_ns = time.perf_counter_ns() if read_ns else 0
+        sequence = self.write_count() + 1
+        offset = self.slot_offset(sequence)
+        counts = self.counts
+        counts[offset // RING_COUNT_SIZE] = 0  # slot is being written
+        self.record_struct.pack_into(self.buf, offset + RING_COUNT_SIZE, present, read_ns, write_ns, *values)
+        counts[offset // RING_COUNT_SIZE] = sequence
+        counts[0] = sequence
+
+    # reader side: every record written since the last read_new, oldest first, as Messages with only the present fields.
+    # if more than capacity were written since then, only the newest capacity are still there.
+    def read_new(self):
+        head = self.write_count()
+        start = max(self.read_count, head - self.capacity)
+        self.dropped += start - self.read_count
+        messages = []
+        counts = self.counts
+        for sequence in range(start + 1, head + 1):
+            offset = self.slot_offset(sequence)
+            if counts[offset // RING_COUNT_SIZE] != sequence:
+                self.dropped += 1
+                continue
+            record = self.record_struct.unpack_from(self.buf, offset + RING_COUNT_SIZE)
+            if counts[offset // RING_COUNT_SIZE] != sequence:  # overwritten while copying
+                self.dropped += 1
+                continue
+            messages.append(self.record_to_message(sequence, record))
+        self.read_count = head
+        return messages
+
+    # skip anything already written, eg when a monitor window opens
+    def skip_to_latest(self):
+        self.read_count = self.write_count()
+
+    # newest record only, or None if nothing new. for displays that skip the samples in between
+    def read_latest(self):
+        messages = self.read_new()
+        return messages[-1] if messages else None
+
+    def record_to_message(self, sequence, record):
+        message = Message({"msgtype": self.msgtype, "valid": True, "ring_sequence": sequence})
+        present, read_ns, write_ns = record[:3]
+        if read_ns:
+            message.latency_read_ns = read_ns
+            message.ring_write_ns = write_ns
+        for i, name in enumerate(self.names):
+            if present >> i & 1:
+                setattr(message, name, record[i + 3])
+        return message
+
+    def close(self):
+        self.counts.release()
+        self.buf = None
+        self.shm.close()
+
+    # the counts view has to go before SharedMemory can close, eg when io_loop exits without closing its rings
+    def __del__(self):
+        counts = getattr(self, "counts", None)
+        if counts is not None:
+            counts.release()
+
+    # creating process only, after every process is done with it
+    def unlink(self):
+        self.shm.unlink()
+
+
+# the six rings shared between io_loop and the monitor, in io_loop argument order: INS, GPS, GP2, IMU, HDG, AHRS
+def create_monitor_rings(capacity=MESSAGE_RING_CAPACITY):
+    return (MessageRing(b'INS', MESSAGE_RING_INS_FIELDS, capacity),
+            MessageRing(b'GPS', MESSAGE_RING_GPS_FIELDS, capacity),
+            MessageRing(b'GP2', MESSAGE_RING_GPS_FIELDS, capacity),
+            MessageRing(b'IMU', MESSAGE_RING_IMU_FIELDS, capacity),
+            MessageRing(b'HDG', MESSAGE_RING_HDG_FIELDS, capacity),
+            MessageRing(b'AHRS', MESSAGE_RING_AHRS_FIELDS, capacity))
+
+
+def release_monitor_rings(rings):
+    for ring in rings:
+        ring.close()
+        ring.unlink()
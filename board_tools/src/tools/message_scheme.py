@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+import struct
 
 
 # message encoding scheme - can be $-type or aa4412 - type
@@ -10,11 +11,19 @@ class Scheme(ABC):
     def write_one_message(self, message, connection):
         pass
 
+    # drop anything read but not returned yet, eg after connection.reset_input_buffer. schemes that buffer override it
+    def reset(self):
+        pass
+
     def parse_message(self, data):
-        m = Message()
+        m = self.new_message(data)
         self.set_fields_general(m, data)
         return m
 
+    # empty message to parse data into: schemes that can see the type first return its record class, see message_records
+    def new_message(self, data):
+        return Message()
+
     def set_fields_general(self, message, data):
         pass
 
@@ -43,13 +52,40 @@ class Scheme(ABC):
 # one message: has fields, can be valid or invalid
 class Message:
 
-    def __init__(self, var_dict={}):
-        for name in var_dict:
-            setattr(self, name, var_dict[name])
+    def __init__(self, var_dict=None):
+        if var_dict:  # skip the loop for the empty messages the schemes parse into
+            for name in var_dict:
+                setattr(self, name, var_dict[name])
+
+    # every field set on the message, including the __slots__ of record classes (message_records.py)
+    def fields(self):
+        values = {name: getattr(self, name) for name in getattr(type(self), "__slots__", ()) if hasattr(self, name)}
+        values.update(getattr(self, "__dict__", {}))
+        return values
 
     def __str__(self):
-        return "Message: " + str(self.__dict__)
+        return "Message: " + str(self.fields())
 
     def __repr__(self):
-        return "Message: " + str(self.__dict__)
-
+        return "Message: " + str(self.fields())
+
+
+
+# compile a format list of (name, format code, optional scale) into one struct.Struct plus the names and scales in order.
+# done once per format so decoding a message is a single unpack_from. number_types maps type names like 'int32' to codes.
+def compile_scaled_format(format_list, endian, number_types={}):
+    format_str = "<" if endian == "little" else ">"
+    names = []
+    scales = []
+    for item in format_list:
+        if len(item) == 3:
+            name, format_name, scale = item
+        elif len(item) == 2:
+            name, format_name = item
+            scale = 1
+        else:
+            continue
+        format_str += number_types.get(format_name, format_name)  # if not found, name itself is the code
+        names.append(name)
+        scales.append(scale)
+    return struct.Struct(format_str), tuple(names), tuple(scales)
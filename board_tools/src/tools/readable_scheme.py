@@ -2,10 +2,14 @@ try:  # importing from inside the package
     from message_scheme import Scheme, Message
     from class_configs.readable_scheme_config import *
     from connection import *
+    from message_records import READABLE_RECORD_CLASSES
+    from checksums import ascii_checksum
 except ModuleNotFoundError:  # importing from outside the package
     from tools.message_scheme import Scheme, Message
     from tools.class_configs.readable_scheme_config import *
     from tools.connection import *
+    from tools.message_records import READABLE_RECORD_CLASSES
+    from tools.checksums import ascii_checksum
 
 
 # b'AA' -> 170
@@ -47,6 +51,110 @@ def split_aln_string(aln_string):
     except Exception as e:  # could have exceptions on wrong aln string format
         return None
 
+
+# python source setting one field from the string in variable part_name
+def field_assignment(var_name, converter_name, part_name):
+    if var_name.isidentifier():
+        return f"message.{var_name} = {converter_name}({part_name})"
+    return f"setattr(message, {var_name!r}, {converter_name}({part_name}))"  # eg "extra comma"
+
+
+# compile a FORMAT_* list into one function decode(message, separated) with a line per field, so decoding doesn't
+# look up the format or check the type of each field. made once per format, see compiled_ascii_format.
+# all fields present: straight assignments. some blank: the same with a check on each. other field counts:
+# set_fields_generic, which also handles the "time" and "degrees" special cases.
+def compile_ascii_format(format_list):
+    converters = {}
+    all_present = []
+    some_blank = []
+    for i, (var_name, var_type) in enumerate(format_list):
+        if var_type in ("time", "degrees"):
+            return None  # rare formats with the special cases stay generic
+        converter_name = f"convert_{i}"
+        converters[converter_name] = var_type
+        assignment = field_assignment(var_name, converter_name, f"p{i}")
+        all_present.append(f"        {assignment}")
+        some_blank.append(f"        if p{i}:\n            {assignment}")
+    parts = ", ".join(f"p{i}" for i in range(len(format_list)))
+    source = "\n".join([
+        "def decode(message, separated):",
+        f"    if len(separated) != {len(format_list)}:",
+        "        return set_fields_generic(message, format_list, separated)",
+        f"    {parts}, = separated",
+        "    if all(separated):",
+        *all_present,
+        "    else:",
+        *some_blank,
+    ])
+    namespace = dict(converters, set_fields_generic=set_fields_generic, format_list=format_list)
+    exec(source, namespace)
+    decode = namespace["decode"]
+    decode.source = source
+    return decode
+
+
+# compiled decoder for each format list used so far, by id: the FORMAT_* lists are module constants
+COMPILED_ASCII_FORMATS = {}
+
+
+def compiled_ascii_format(format_list):
+    decode = COMPILED_ASCII_FORMATS.get(id(format_list))
+    if decode is None:
+        decode = compile_ascii_format(format_list) or (lambda message, separated: set_fields_generic(message, format_list, separated))
+        COMPILED_ASCII_FORMATS[id(format_list)] = decode
+    return decode
+
+
+# field by field version of the compiled decoders, for any number of fields and the "time" / "degrees" types
+def set_fields_generic(message, format_list, separated):
+    for i, part in enumerate(separated):
+        if part:    #missing field will be None, can't convert to float
+            var_name, var_type = format_list[i]
+            #handle special cases: time, degrees
+            #TODO can take these out if we remove GPS types from board output
+            if var_type == "time":
+                #time in hhmmss.ss format -> hours(int), min(int), second(float)
+                hours_part = int(part[:2])
+                minutes_part = int(part[2:4])
+                seconds_part = float(part[4:])
+                setattr(message, var_name+"_hours", hours_part)
+                setattr(message, var_name+"_minutes", minutes_part)
+                setattr(message, var_name+"_seconds", seconds_part)
+            elif var_type == "degrees":
+                #angle in (d)ddmm.mmmmm format -> degrees(int), minutes(float)
+                #could be 2 or 3 degrees digits, but has 2 m digits before .
+                split_point = part.find(b'.') - 2
+                degrees_part = int(part[:split_point])
+                seconds_part = float(part[split_point:])
+                setattr(message, var_name+"_degrees", degrees_part)
+                setattr(message, var_name+"_minutes", seconds_part)
+            else:
+                #regular case- use a python type
+                value = var_type(part)
+                setattr(message, var_name, value)
+
+
+# X3 siphog status bytes split into a dict of flags each
+def split_siphog_status(message):
+    for bitfield_name in ["siphog_x_status", "siphog_y_status", "siphog_z_status"]:
+        if not hasattr(message, bitfield_name):
+            continue
+        combined_val = getattr(message, bitfield_name)
+        single_flags = {}
+        for flag_name, ind in SIPHOG_STATUS_BIT_POSITIONS.items():
+            single_flags[flag_name] = nth_bit(combined_val, ind)
+        setattr(message, f"{bitfield_name}_bits", single_flags)
+
+
+# formats told apart by field count: comma count -> (compiled decoder, has siphog status fields)
+IMU_FORMATS_BY_COMMAS = {len(msg_format) - 1: (compiled_ascii_format(msg_format),
+                                               any(name.startswith("siphog") for name, var_type in msg_format))
+                         for msg_format in [FORMAT_IMU_WITH_SYNC, FORMAT_IMU_NO_SYNC, FORMAT_IMU_X3_NO_STATUS,
+                                            FORMAT_IMU_X3_WITH_STATUS, FORMAT_IMU_3FOG]}
+INS_FORMATS_BY_COMMAS = {len(msg_format) - 1: compiled_ascii_format(msg_format)
+                         for msg_format in [FORMAT_INS, FORMAT_INS_EXTRA_COMMA]}
+
+
 #messages encoded in readable form with start and end codes, comma separted values
 class ReadableScheme(Scheme):
     
@@ -58,6 +166,8 @@ class ReadableScheme(Scheme):
 
         if not data:
             return None
+        if type(data) is memoryview:  # from FileReaderConnection on an uncompressed log: copy once for bytes methods
+            data = data.tobytes()
         #print("receiving: "+data.decode())
         # if data[:len(READABLE_START)] == READABLE_START: #chop off start code if present
         #     data = data[len(READABLE_START):]
@@ -66,10 +176,18 @@ class ReadableScheme(Scheme):
         # else:
         #     pass #TODO if no end code, could handle partial read or give an error
         #if data:
-        message = Message()
+        message = self.new_message(data)
         self.set_fields_general(message, data)
         return message
 
+    # record for the message type (between the talker and the first comma) and the number of payload fields
+    def new_message(self, data):
+        type_start = READABLE_TALKER_LENGTH + len(READABLE_START) if data.startswith(READABLE_START) else READABLE_TALKER_LENGTH
+        type_end = data.find(READABLE_PAYLOAD_SEPARATOR, type_start)
+        records = READABLE_RECORD_CLASSES.get(data[type_start: type_end]) if type_end > 0 else None
+        record = records.get(data.count(READABLE_PAYLOAD_SEPARATOR) - 1) if records else None
+        return record() if record else Message()
+
     # def read_message_from_file(self, input_file):
     #     # if (not hasattr(self, "reader")) or self.reader is None:
     #     #     self.reader = RTCMReader(input_file)
@@ -227,27 +345,16 @@ class ReadableScheme(Scheme):
     def set_payload_fields_IMU(self, message, payload):
         #check with format by number of commas. num commas = num fields - 1
         #this relies on each format having different length.
-        num_commas = payload.count(READABLE_PAYLOAD_SEPARATOR)
-
-        for msg_format in [FORMAT_IMU_WITH_SYNC, FORMAT_IMU_NO_SYNC, FORMAT_IMU_X3_NO_STATUS, FORMAT_IMU_X3_WITH_STATUS, FORMAT_IMU_3FOG]:
-            if num_commas == len(msg_format) - 1:
-                self.set_fields_from_list(message, msg_format, payload)
-
-                # split X3 status bit fields
-                for bitfield_name in ["siphog_x_status", "siphog_y_status", "siphog_z_status"]:
-                    if not hasattr(message, bitfield_name):
-                        continue
-                    combined_val = getattr(message, bitfield_name)
-                    single_flags = {}
-                    for flag_name, ind in SIPHOG_STATUS_BIT_POSITIONS.items():
-                        single_flags[flag_name] = nth_bit(combined_val, ind)
-                    setattr(message, f"{bitfield_name}_bits", single_flags)
-
-                break
-
-        else:
+        separated = payload.split(READABLE_PAYLOAD_SEPARATOR)
+        imu_format = IMU_FORMATS_BY_COMMAS.get(len(separated) - 1)
+        if imu_format is None:
             message.valid = False
-            message.error = f"unexpected length for IMU:  {num_commas}"
+            message.error = f"unexpected length for IMU:  {len(separated) - 1}"
+            return
+        decode, has_status = imu_format
+        decode(message, separated)
+        if has_status:
+            split_siphog_status(message)
 
     #new IM1 type for IMU unit with/out FOG. should only have one length -> no need to count commas
     def set_payload_fields_IM1(self, message, payload):
@@ -255,15 +362,13 @@ class ReadableScheme(Scheme):
 
     def set_payload_fields_INS(self, message, payload):
         # check with format by number of commas. num commas = num fields - 1
-        num_commas = payload.count(READABLE_PAYLOAD_SEPARATOR)
-        if num_commas == len(FORMAT_INS) - 1:
-            self.set_fields_from_list(message, FORMAT_INS, payload)
-        elif num_commas == len(FORMAT_INS_EXTRA_COMMA) - 1:
-            self.set_fields_from_list(message, FORMAT_INS_EXTRA_COMMA, payload)
-        #print(message)
+        separated = payload.split(READABLE_PAYLOAD_SEPARATOR)
+        decode = INS_FORMATS_BY_COMMAS.get(len(separated) - 1)
+        if decode:
+            decode(message, separated)
         else:
             message.valid = False
-            message.error = f"unexpected length for INS: {num_commas}"
+            message.error = f"unexpected length for INS: {len(separated) - 1}"
 
         # carrier solution >= 8 means GPS off. separate into two attributes.
         if hasattr(message, "ins_solution_status_and_gps_used"):
@@ -402,39 +507,11 @@ class ReadableScheme(Scheme):
             separated = data
         else:
             separated = data.split(READABLE_PAYLOAD_SEPARATOR)
-        for i, part in enumerate(separated):
-            if part:    #missing field will be None, can't convert to float
-                var_name, var_type = format_list[i]
-                #handle special cases: time, degrees
-                #TODO can take these out if we remove GPS types from board output
-                if var_type == "time": 
-                    #time in hhmmss.ss format -> hours(int), min(int), second(float)
-                    hours_part = int(part[:2])
-                    minutes_part = int(part[2:4])
-                    seconds_part = float(part[4:])
-                    setattr(message, var_name+"_hours", hours_part)
-                    setattr(message, var_name+"_minutes", minutes_part)
-                    setattr(message, var_name+"_seconds", seconds_part)
-                elif var_type == "degrees":
-                    #angle in (d)ddmm.mmmmm format -> degrees(int), minutes(float)
-                    #could be 2 or 3 degrees digits, but has 2 m digits before .
-                    split_point = part.find(b'.') - 2
-                    degrees_part = int(part[:split_point])
-                    seconds_part = float(part[split_point:])
-                    setattr(message, var_name+"_degrees", degrees_part)
-                    setattr(message, var_name+"_minutes", seconds_part)
-                    pass
-                else: 
-                    #regular case- use a python type
-                    value = var_type(part)
-                    setattr(message, var_name, value)
+        compiled_ascii_format(format_list)(message, separated)
 
     #compute the checksum as an int
     def compute_checksum(self, data):
-        total = 0
-        for num in data: #this treats each byte as an integer
-            total ^= num
-        return total
+        return ascii_checksum(data)
 
     def checksum_passes(self, message):
         return self.compute_checksum(message.checksum_input) == message.checksum
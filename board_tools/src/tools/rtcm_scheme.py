@@ -1,21 +1,34 @@
 from ctypes import *
 import os
 import struct
-from bitstring import Bits
-from pyrtcm import RTCMReader, crc2bytes, calc_crc24q
+from pyrtcm import RTCMReader
 try:  # importing from inside the package
     from pyrtcm import RTCMReader, RTCMParseError
     from pyrtcm.rtcmtypes_core import ERR_RAISE, ERR_LOG, ERR_IGNORE
     from class_configs.rtcm_scheme_config import * #TODO make config file with fomats
     from readable_scheme import extract_flags_HDG
-    from message_scheme import Scheme, Message
+    from message_scheme import Scheme, Message, compile_scaled_format
+    from message_records import RTCM_RECORD_CLASSES
+    from checksums import crc24q
 except ModuleNotFoundError:  # importing from outside the package
     from tools.class_configs.rtcm_scheme_config import *
     from tools.readable_scheme import extract_flags_HDG
-    from tools.message_scheme import Scheme, Message
+    from tools.message_scheme import Scheme, Message, compile_scaled_format
+    from tools.message_records import RTCM_RECORD_CLASSES
+    from tools.checksums import crc24q
 
 #decoder for RTCM-style binary messages
 
+# struct and scales for each payload format, compiled once here instead of on every message
+RTCM_IMU_CODEC_WITH_SYNC = compile_scaled_format(RTCM_IMU_PAYLOAD_FIELDS_WITH_SYNC, ENDIAN)
+RTCM_IMU_CODEC_NO_SYNC = compile_scaled_format(RTCM_IMU_PAYLOAD_FIELDS_NO_SYNC, ENDIAN)
+RTCM_IM1_CODEC = compile_scaled_format(RTCM_IM1_PAYLOAD_FIELDS, ENDIAN)
+RTCM_INS_CODEC = compile_scaled_format(RTCM_INS_PAYLOAD_FIELDS, ENDIAN)
+RTCM_GPS_CODEC = compile_scaled_format(RTCM_GPS_PAYLOAD_FIELDS, ENDIAN)
+RTCM_DUAL_ANT_HEAD_CODEC = compile_scaled_format(RTCM_DUAL_ANT_HEAD_FIELDS, ENDIAN)
+RTCM_INFO_CODEC = compile_scaled_format(RTCM_INFO_PAYLOAD_FIELDS, ENDIAN)
+RTCM_AHRS_CODEC = compile_scaled_format(RTCM_AHRS_PAYLOAD_FIELDS, ENDIAN)
+
 #Common packet format:
 #   Preamble    |   Reserved    |   Length  |   payload |   CRC
 #   0xD3        | 000000 (6 bit)|   10 bits |           |   3 byte
@@ -30,6 +43,7 @@ class RTCM_Scheme(Scheme):
             # if no data, or RTCM3 CRC fail, this is None.
             if not read_data:
                 return None
+            message = self.new_message(read_data)
             self.set_fields_general(message, read_data)
         except:
             # TODO be more specific about exception
@@ -62,22 +76,30 @@ class RTCM_Scheme(Scheme):
     #   Preamble    |   Reserved    |   Length  | msgtype               |   payload     |   CRC
     #   0xD3        | 000000 (6 bit)|   10 bits | 12+4 bit = 2 bytes    |variable length|   3 byte
 
+    # record for the 4 bit message type
+    def new_message(self, data):
+        type_start = 1 + LENGTH_LENGTH
+        if len(data) < type_start + TYPE_LENGTH:
+            return Message()
+        msgtype = int.from_bytes(data[type_start: type_start + TYPE_LENGTH], "big") & 0xF
+        return RTCM_RECORD_CLASSES.get(msgtype, Message)()
+
     def set_fields_general(self, message, raw_data):
         #split into preamble/lentgh/payload/crc , then check_valid
         try:
             #message.data = data
             full_data = raw_data[1:]
-            length_and_reserved = Bits(full_data[0: LENGTH_LENGTH]) #6 bit reserved zeros, 10 bit lenght - separate them too?
-            type_and_subtype = Bits(full_data[LENGTH_LENGTH: LENGTH_LENGTH + TYPE_LENGTH])  # 12+4 bit = 2 bytes. TODO - split them?
+            length_and_reserved = int.from_bytes(full_data[0: LENGTH_LENGTH], "big") #6 bit reserved zeros, 10 bit length
+            type_and_subtype = int.from_bytes(full_data[LENGTH_LENGTH: LENGTH_LENGTH + TYPE_LENGTH], "big")  # 12+4 bit = 2 bytes
             #print(f"type_and_subtype = {type_and_subtype}")
 
             #split reserved/payload length
-            reserved, rtcm_length = Bits(bin=length_and_reserved.bin[:6]).uint, Bits(bin=length_and_reserved.bin[6:]).uint
+            reserved, rtcm_length = length_and_reserved >> 10, length_and_reserved & 0x3FF
             payload_length = rtcm_length - TYPE_LENGTH #if rtcm length includes the whole "data message", payload is smaller
             message.payload_length = payload_length
 
             #split type/subtype
-            company_code, msgtype = Bits(bin=type_and_subtype.bin[:12]).uint, Bits(bin=type_and_subtype.bin[12:]).uint
+            company_code, msgtype = type_and_subtype >> 4, type_and_subtype & 0xF
             message.company_code = company_code
             message.rtcm_msgtype = msgtype
 
@@ -154,24 +176,24 @@ class RTCM_Scheme(Scheme):
         if message.rtcm_msgtype not in RTCM_MESSAGE_TYPES:
             return
         if message.rtcm_msgtype == RTCM_MSGTYPE_IMU:
-            self.set_fields_from_list_scaled(message, RTCM_IMU_PAYLOAD_FIELDS_WITH_SYNC, payload)
+            self.set_fields_from_codec(message, RTCM_IMU_CODEC_WITH_SYNC, payload)
             #if parse with one format fails, try the other (or should it decide using length?)
             if not message.valid:
                 message.valid = True #need this or it will stay invalid. will be invalid again if second parse fails.
-                self.set_fields_from_list_scaled(message, RTCM_IMU_PAYLOAD_FIELDS_NO_SYNC, payload)
+                self.set_fields_from_codec(message, RTCM_IMU_CODEC_NO_SYNC, payload)
         elif message.rtcm_msgtype == RTCM_MSGTYPE_IM1:
-            self.set_fields_from_list_scaled(message, RTCM_IM1_PAYLOAD_FIELDS, payload)
+            self.set_fields_from_codec(message, RTCM_IM1_CODEC, payload)
         elif message.rtcm_msgtype == RTCM_MSGTYPE_INS:
-            self.set_fields_from_list_scaled(message, RTCM_INS_PAYLOAD_FIELDS, payload)
+            self.set_fields_from_codec(message, RTCM_INS_CODEC, payload)
         elif message.rtcm_msgtype == RTCM_MSGTYPE_GPS:
-            self.set_fields_from_list_scaled(message, RTCM_GPS_PAYLOAD_FIELDS, payload)
+            self.set_fields_from_codec(message, RTCM_GPS_CODEC, payload)
         elif message.rtcm_msgtype == RTCM_MSGTYPE_HEADING:
-            self.set_fields_from_list_scaled(message, RTCM_DUAL_ANT_HEAD_FIELDS, payload)
+            self.set_fields_from_codec(message, RTCM_DUAL_ANT_HEAD_CODEC, payload)
             extract_flags_HDG(message) #separate the heading flags in "flags" attribute, from ReadableScheme
         elif message.rtcm_msgtype == RTCM_MSGTYPE_INFO:
-            self.set_fields_from_list_scaled(message, RTCM_INFO_PAYLOAD_FIELDS, payload)
+            self.set_fields_from_codec(message, RTCM_INFO_CODEC, payload)
         elif message.rtcm_msgtype == RTCM_MSGTYPE_AHRS:
-            self.set_fields_from_list_scaled(message, RTCM_AHRS_PAYLOAD_FIELDS, payload)
+            self.set_fields_from_codec(message, RTCM_AHRS_CODEC, payload)
             # todo - handle special cases like orientation int -> +X+Y+Z string?
 
         #do any computed fields like adjusting time units after?
@@ -196,57 +218,29 @@ class RTCM_Scheme(Scheme):
 
     #version with optional scale factor as 3rd number of tuple in format_list
     def set_fields_from_list_scaled(self, message, format_list, data):
-        try:
-            #print(f'Payload length: {message.payload_length}')
-            data_offset = 0
-            for item in format_list:
-                if len(item) == 3:
-                    name, format_code, scale = item
-                elif len(item) == 2:
-                    name, format_code = item
-                    scale = 1
-                else:
-                    #print(f"wrong length in format: {item}")
-                    continue
-                format_str = "<" if ENDIAN == "little" else ">"
-                format_str += format_code
-                chunk_size = struct.calcsize(format_str)
-                data_chunk = data[data_offset:data_offset+chunk_size]
-                #message.setattr()
-                #value = struct.unpack_from(format_str, data, offset=data_offset)[0]
-                value = struct.unpack(format_str, data_chunk)[0]
-                data_offset += chunk_size #struct.calcsize(format_str)
-                #scale the value if numerical, put in the message.
-                # todo: should it put the un-scaled value in the message too? group the values as a dictionary?
-
-                if type(value) in [int, float]:
-                    scaled_value = scale * value
-                else:
-                    scaled_value = value
-
-                # setattr(message, name, value)
-                #setattr(message, name+"_scaled", scaled_value)
-                setattr(message, name, scaled_value) #scaled only
-
-                # print(f"\nfor item {item}:")
-                # print(f"format_str = {format_str}")
-                # print(f"chunk_size = {chunk_size}")
-                # print(f"data_chunk = {data_chunk}")
-                # print(f"value = {value}")
-                # print(f"scaled value = {scaled_value}")
+        self.set_fields_from_codec(message, compile_scaled_format(format_list, ENDIAN), data)
 
+    # decode with a format from compile_scaled_format: one unpack for the whole payload, then scale each value
+    def set_fields_from_codec(self, message, codec, data):
+        field_struct, names, scales = codec
+        try:
+            values = field_struct.unpack_from(data)
         except Exception as e:
             #print("error in set_fields_from_list")
             #print(e)
             message.valid = False
             message.error = "Length(unpack)"
+            return
+        for name, value, scale in zip(names, values, scales):
+            setattr(message, name, scale * value) #scaled only
 
     # def compute_checksum(self, message):
     #     #TODO - implement 3-byte RTCM checksum
     #     pass
 
     def checksum_passes(self, message):
-        #return self.compute_checksum(message) == message.checksum or something
         #if computed on whole message data including the checksum, should be 0.
-        return crc2bytes(RTCM_PREAMBLE + message.data) == b'\00\x00\x00'
-        #return True
+        return crc24q(message.data, crc=RTCM_PREAMBLE_CRC) == 0
+
+
+RTCM_PREAMBLE_CRC = crc24q(RTCM_PREAMBLE)
@@ -0,0 +1,83 @@
+import numpy as np
+
+# fixed size numpy ring of timestamped samples for live plots: a sliding window of the latest messages, with no
+# allocation as messages come in. every sample is written twice, at its slot and slot + capacity, so the newest
+# samples are always one contiguous slice in time order: plots read them as views without copying or concatenating.
+
+
+class SampleRing:
+
+    # fields: message attribute names, one column each. capacity: samples kept
+    def __init__(self, fields, capacity, time_field="imu_time_ms"):
+        self.fields = fields
+        self.capacity = capacity
+        self.time_field = time_field
+        self.times = np.zeros(2 * capacity)
+        self.values = np.full((2 * capacity, len(fields)), np.nan)
+        self.count = 0  # samples ever added
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def clear(self):
+        self.count = 0
+
+    # add samples in time order: times is 1d, values has a column per field. only the newest capacity are kept
+    def extend(self, times, values):
+        times = times[-self.capacity:]
+        values = values[-self.capacity:]
+        # the unit restarted if its clock went back: start over from the restart
+        backwards = np.flatnonzero(np.diff(times) < 0)
+        if len(backwards):
+            self.clear()
+            times, values = times[backwards[-1] + 1:], values[backwards[-1] + 1:]
+        elif self.count and len(times) and times[0] < self.latest_time():
+            self.clear()
+        slots = (self.count + np.arange(len(times))) % self.capacity
+        self.times[slots] = times
+        self.times[slots + self.capacity] = times
+        self.values[slots] = values
+        self.values[slots + self.capacity] = values
+        self.count += len(times)
+
+    # add decoded messages, eg MessageRing.read_new() records. missing fields are NaN, messages without a time skipped
+    def add_messages(self, messages):
+        rows = []
+        for message in messages:
+            message_time = getattr(message, self.time_field, None)
+            if message_time is not None:
+                rows.append([message_time] + [getattr(message, field, np.nan) for field in self.fields])
+        if rows:
+            rows = np.array(rows, dtype=float)
+            self.extend(rows[:, 0], rows[:, 1:])
+
+    def latest_time(self):
+        return self.times[(self.count - 1) % self.capacity] if self.count else None
+
+    # (times, values) of every sample kept, oldest first. views into the ring: valid until the next extend
+    def samples(self):
+        end = self.count % self.capacity + self.capacity
+        start = end - len(self)
+        return self.times[start: end], self.values[start: end]
+
+    # (times, values) of the samples at or after start_time
+    def since(self, start_time):
+        times, values = self.samples()
+        first = np.searchsorted(times, start_time)
+        return times[first:], values[first:]
+
+
+# reduce samples to at most 2 per column when start_time to end_time is drawn width pixels wide: the min and max of
+# each column's values, so spikes still show. values can be 1d, or 2d with a column per series (min / max of each).
+# returns (times, values) to draw, unchanged if there are already few enough samples
+def downsample_min_max(times, values, start_time, end_time, width):
+    if len(times) <= 2 * width or end_time <= start_time:
+        return times, values
+    columns = ((times - start_time) * (width / (end_time - start_time))).astype(np.int64)
+    starts = np.flatnonzero(np.diff(columns, prepend=columns[0] - 1))
+    lows = np.fmin.reduceat(values, starts, axis=0)  # fmin / fmax skip NaN unless the whole column is NaN
+    highs = np.fmax.reduceat(values, starts, axis=0)
+    out_values = np.empty((2 * len(starts),) + values.shape[1:])
+    out_values[0::2] = lows
+    out_values[1::2] = highs
+    return np.repeat(times[starts], 2), out_values
@@ -321,6 +321,7 @@ class Single_Port_Unit(IMUBoard):
     def clear_connection(self, connection, scheme, wait_time_seconds):
         # temporarily set timeout to zero, and read data until read is empty
         connection.reset_input_buffer()
+        scheme.reset()
         old_timeout = connection.get_timeout()
         try:
             connection.set_timeout(0)
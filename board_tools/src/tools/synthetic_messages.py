@@ -0,0 +1,120 @@
+import random
+import struct
+try:  # importing from inside the package
+    from class_configs.synthetic_messages_config import *
+    from class_configs.readable_scheme_config import READABLE_START, READABLE_END, READABLE_CHECKSUM_SEPARATOR, \
+        READABLE_PAYLOAD_SEPARATOR, OUR_TALKER
+    from class_configs.binary_scheme_config import BINARY_PREAMBLE, BINARY_ENDIAN, BINARY_MESSAGE_TYPES, NUMBER_TYPES
+    from class_configs.rtcm_scheme_config import RTCM_PREAMBLE, ANELLO_IDENTIFIER, ENDIAN, TYPE_LENGTH, LENGTH_LENGTH, \
+        RTCM_CRC_LEN
+    from readable_scheme import int_to_ascii
+    from checksums import ascii_checksum, binary_checksum, crc24q
+except ModuleNotFoundError:  # importing from outside the package
+    from tools.class_configs.synthetic_messages_config import *
+    from tools.class_configs.readable_scheme_config import READABLE_START, READABLE_END, READABLE_CHECKSUM_SEPARATOR, \
+        READABLE_PAYLOAD_SEPARATOR, OUR_TALKER
+    from tools.class_configs.binary_scheme_config import BINARY_PREAMBLE, BINARY_ENDIAN, BINARY_MESSAGE_TYPES, NUMBER_TYPES
+    from tools.class_configs.rtcm_scheme_config import RTCM_PREAMBLE, ANELLO_IDENTIFIER, ENDIAN, TYPE_LENGTH, \
+        LENGTH_LENGTH, RTCM_CRC_LEN
+    from tools.readable_scheme import int_to_ascii
+    from tools.checksums import ascii_checksum, binary_checksum, crc24q
+
+# synthetic output messages in each wire format, built from the scheme configs so they parse as valid messages.
+# values are random except times, which follow the stream's clock, and a few fields in SYNTHETIC_FIXED_VALUES.
+# synthetic_stream(wire format, count) gives a list of frames, like a unit's data port output.
+
+SYNTHETIC_MESSAGE_NAMES = {
+    "ASCII": list(SYNTHETIC_ASCII_MESSAGES),
+    "Binary": list(SYNTHETIC_BINARY_MESSAGES),
+    "RTCM": list(SYNTHETIC_RTCM_MESSAGES),
+}
+
+
+def ascii_value(name, var_type, rng, time_ms):
+    if name.endswith("_time_ms"):
+        return b"%.3f" % time_ms
+    if name == "gps_time_ns":
+        return b"%d" % (SYNTHETIC_GPS_TIME_OFFSET_NS + int(time_ms * 1e6))
+    if name == "extra comma":
+        return b""
+    if var_type is float:
+        return b"%.6f" % rng.uniform(-10, 10)
+    if var_type is int:
+        return b"%d" % rng.randrange(16)
+    return b"synthetic"
+
+
+# one struct value for a binary or RTCM field. integers stay well inside their type's range
+def packed_value(name, code, rng, time_ms, fixed_values):
+    if name in fixed_values:
+        return fixed_values[name]
+    if name == "gps_time_ns":
+        return SYNTHETIC_GPS_TIME_OFFSET_NS + int(time_ms * 1e6)
+    if name.endswith("_time_ns"):
+        return int(time_ms * 1e6)
+    if code in "fd":
+        return rng.uniform(-10, 10)
+    bound = 1 << min(8 * struct.calcsize(code) - 2, 30)
+    return rng.randrange(-bound, bound) if code.islower() else rng.randrange(bound)
+
+
+def pack_payload(format_list, endian, rng, time_ms, fixed_values, number_types={}):
+    codes = [number_types.get(item[1], item[1]) for item in format_list]
+    values = [packed_value(item[0], code, rng, time_ms, fixed_values) for item, code in zip(format_list, codes)]
+    return struct.pack(("<" if endian == "little" else ">") + "".join(codes), *values)
+
+
+# #APIMU,...*CS\r\n
+def synthetic_ascii_message(name, rng, time_ms):
+    msgtype, format_list = SYNTHETIC_ASCII_MESSAGES[name]
+    parts = [ascii_value(field_name, var_type, rng, time_ms) for field_name, var_type in format_list]
+    body = OUR_TALKER + msgtype + READABLE_PAYLOAD_SEPARATOR + READABLE_PAYLOAD_SEPARATOR.join(parts)
+    return READABLE_START + body + READABLE_CHECKSUM_SEPARATOR + int_to_ascii(ascii_checksum(body)) + READABLE_END
+
+
+# C5 50, type, length, payload, checksum
+def synthetic_binary_message(name, rng, time_ms):
+    binary_msgtype = SYNTHETIC_BINARY_MESSAGES[name]
+    payload = pack_payload(BINARY_MESSAGE_TYPES[binary_msgtype], BINARY_ENDIAN, rng, time_ms,
+                           SYNTHETIC_FIXED_VALUES, NUMBER_TYPES)
+    body = bytes([binary_msgtype, len(payload)]) + payload
+    return BINARY_PREAMBLE + body + binary_checksum(body)
+
+
+# D3, length, message number + subtype, payload, CRC-24Q
+def synthetic_rtcm_message(name, rng, time_ms):
+    rtcm_msgtype, format_list, fixed_values = SYNTHETIC_RTCM_MESSAGES[name]
+    payload = pack_payload(format_list, ENDIAN, rng, time_ms, {**SYNTHETIC_FIXED_VALUES, **fixed_values})
+    message_data = ((ANELLO_IDENTIFIER << 4) | rtcm_msgtype).to_bytes(TYPE_LENGTH, "big") + payload
+    frame = RTCM_PREAMBLE + len(message_data).to_bytes(LENGTH_LENGTH, "big") + message_data
+    return frame + crc24q(frame).to_bytes(RTCM_CRC_LEN, "big")
+
+
+SYNTHETIC_MESSAGE_BUILDERS = {
+    "ASCII": synthetic_ascii_message,
+    "Binary": synthetic_binary_message,
+    "RTCM": synthetic_rtcm_message,
+}
+
+
+def synthetic_message(wire_format, name, rng, time_ms):
+    return SYNTHETIC_MESSAGE_BUILDERS[wire_format](name, rng, time_ms)
+
+
+# count frames in time order: the SYNTHETIC_STREAM_MIXES mix for wire_format ("ASCII", "Binary", "RTCM" or "X3"),
+# or only message name at SYNTHETIC_SINGLE_TYPE_RATE_HZ. same seed gives the same frames
+def synthetic_stream(wire_format, count, name=None, seed=0):
+    rng = random.Random(seed)
+    if name is None:
+        mix = SYNTHETIC_STREAM_MIXES[wire_format]
+    else:
+        mix = [(wire_format, name, SYNTHETIC_SINGLE_TYPE_RATE_HZ)]
+    periods_ms = [(message_format, message_name, round(1000 / rate)) for message_format, message_name, rate in mix]
+    frames = []
+    time_ms = 0
+    while len(frames) < count:
+        for message_format, message_name, period_ms in periods_ms:
+            if time_ms % period_ms == 0 and len(frames) < count:
+                frames.append(synthetic_message(message_format, message_name, rng, float(time_ms)))
+        time_ms += 1
+    return frames
@@ -24,12 +24,13 @@ MENU_OPTIONS = [
     "Vehicle Configuration", #TODO - show this only when firmware version high enough / if unit responds to VEH,R
     "Log",
     "Monitor",
+    "Stats",  # io_loop message counters, and latency when LATENCY_STATS is on
     "NTRIP",
     "Send Inputs",
     "Send Custom Message",
     "Save Configs",
     "Firmware Update",
-    #"Plot", # put this back in menu when implemented
+    "Plot",  # monitor opened on the plot tab
     "Exit"
 ]
 
@@ -205,7 +206,24 @@ MAX_SINGLE_NTRIP_MESSAGE_SIZE = 1400  # max size of a single message to send to
 
 CONNECT_RETRIES = 3
 RUNNING_RETRIES = 10
-FLUSH_FREQUENCY = 200
+LOG_WRITER_QUEUE_BYTES = 16 * 1024 * 1024  # log data waiting for the writer thread. more than this is dropped
+LOG_WRITE_BLOCK_BYTES = 64 * 1024  # log writes are whole blocks at block-aligned file offsets
+LOG_WRITE_MAX_DELAY_SECONDS = 0.5  # write a partial block if data waited this long
+LOG_FSYNC_SECONDS = 2  # flush and fsync the log this often
+LOG_ROTATE_BYTES = 0  # start a new log file after this many bytes, 0 for no limit
+LOG_ROTATE_SECONDS = 0  # start a new log file after this long, 0 for no limit
+LOG_INDEX_WHILE_LOGGING = False  # write a seek index (.idx) next to each log. tools.build_log_index can make one later
+LOG_COMPRESSION = None  # "zstd" or "lz4" to write compressed .zst / .lz4 logs (needs zstandard / lz4), None for raw
+IO_LOOP_POLL_SECONDS = 1e-3  # io_loop wait between checks when the data port can't be selected on (serial on Windows)
+ASYNC_QUEUE_SIZE = 256  # async_ioloop: max chunks waiting between two streams before the producer waits
+NTRIP_GGA_PERIOD_SECONDS = 1  # async_ioloop: how often to send GGA to the caster
+ODOMETER_SEND_RATE_HZ = 100  # async_ioloop: max odometer messages per second
+DAEMON_REPORT_SECONDS = 10  # logging_daemon: time between throughput reports
+BENCHMARK_MESSAGES = 10000  # parse_benchmark: messages in each synthetic stream
+BENCHMARK_REPEATS = 5  # parse_benchmark: timed runs of each benchmark, the fastest is kept
+BENCHMARK_CHUNK_BYTES = 4096  # parse_benchmark: stream parsers get the data in chunks this size, like port reads
+LATENCY_STATS = False  # time each message from the port read to the monitor display, see the Stats menu
+IO_STATS_CLI_SECONDS = 2  # io_stats_cli.py: seconds between printing the io_loop counters
 
 #__________Log export configs__________:
 
@@ -267,6 +285,12 @@ EXPORT_ALL_MESSAGES = {
     b'AHRS': EXPORT_AHRS_FIELDS,
 }
 
+# "csv" or "parquet". parquet needs pyarrow, and leaves out position_geojson (convertLog.position_geojson_column makes it)
+EXPORT_FILE_FORMAT = "csv"
+EXPORT_PARQUET_ROW_GROUP_SIZE = 65536
+EXPORT_PROCESSES = None  # worker processes for exporting multiple logs. None: one per cpu
+EXPORT_CHUNK_BYTES = 64 * 1024 * 1024  # logs bigger than this are split into parts which export in parallel
+
 EXPORT_DEFAULT_COLOR = [200, 200, 200]
 
 EXPORT_GPS_RADIUS = 3
@@ -290,6 +314,7 @@ MONITOR_GPS_TAB_TITLE = "GPS"
 MONITOR_GP2_TAB_TITLE = "GP2"
 MONITOR_HDG_TAB_TITLE = "HDG"
 MONITOR_AHRS_TAB_TITLE = "AHRS"
+MONITOR_PLOT_TAB_TITLE = "PLOT"
 MONITOR_REFRESH_MS = 200 #100
 ZERO_OUT_TIME = 5
 ODOMETER_ZERO_TIME = 10 #put a long time because odo in monitor updates slowly. at 5, it can blank with odo running.
@@ -299,6 +324,27 @@ table_color_2 = "light blue"
 # BASE_HEIGHT = 554
 MONITOR_ALIGN = "right" #alignemnt for label and value text in monitor. can be "left", "right", "center"
 
+#plot tab: rolling time series of the latest messages
+PLOT_WINDOW_SECONDS = 20  # time shown, by imu_time_ms
+PLOT_RING_SAMPLES = 8192  # samples kept per message type: 20 seconds of 400 Hz
+PLOT_DRAW_MS = 200  # redraw at most this often, even if the monitor refreshes faster
+PLOT_GRAPH_SIZE = (1000, 120)  # pixels per plot. samples are reduced to min / max per pixel column before drawing
+PLOT_MARGIN = 20  # pixels for the title above each plot and the value labels left of it
+PLOT_LABEL_WIDTH = 70
+PLOT_BACKGROUND = "white"
+PLOT_FONT = ("Tahoma", 10, "normal")
+# one plot per group: (title, message type, series). each series is (label, fields, color): one field is plotted as
+# is, more are plotted as the magnitude of the vector. fields are names in MESSAGE_RING_*_FIELDS
+PLOT_GROUPS = [
+    ("Accel (g)", b'IMU', [("x", ["accel_x_g"], "red"), ("y", ["accel_y_g"], "green"), ("z", ["accel_z_g"], "blue")]),
+    ("MEMS rate (deg/s)", b'IMU', [("x", ["angrate_x_dps"], "red"), ("y", ["angrate_y_dps"], "green"),
+                                   ("z", ["angrate_z_dps"], "blue")]),
+    ("FOG rate (deg/s)", b'IMU', [("x", ["fog_angrate_x_dps"], "red"), ("y", ["fog_angrate_y_dps"], "green"),
+                                  ("z", ["fog_angrate_z_dps"], "blue")]),
+    ("INS speed (m/s)", b'INS', [("speed", ["velocity_north_mps", "velocity_east_mps", "velocity_down_mps"], "black")]),
+    ("INS heading (deg)", b'INS', [("heading", ["heading_deg"], "purple")]),
+]
+
 #tab 1: numbers monitoring
 MONITOR_DEFAULT_VALUE = "--------------"
 MONITOR_TIMELABEL_SIZE = (10, 1)
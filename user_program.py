@@ -46,6 +46,7 @@ with open(os.devnull, "w") as f, redirect_stdout(f):
         import PySimpleGUI as sg
         from board_tools.convertLog import export_logs_detect_format
         from board_tools.map.geotiler_demo import draw_map, draw_dial
+        from board_tools.monitor_plots import MonitorPlots
         from board_tools.file_picking import pick_one_file, pick_multiple_files
         LOGO_PATH = os.path.join(BOARD_TOOLS_DIR, "anello_scaled.png")
         ON_BUTTON_PATH = os.path.join(BOARD_TOOLS_DIR, ON_BUTTON_FILE)
@@ -62,9 +63,10 @@ class UserProgram:
                  log_on, log_start, log_stop, log_name,
                  ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                  ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                 last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+                 ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
                  last_imu_time,
-                 shared_serial_number
+                 shared_serial_number,
+                 latency_stats=None, io_stats=None
         ):
         self.connection_info = None
         self.board = None
@@ -82,9 +84,11 @@ class UserProgram:
         self.log_on, self.log_start, self.log_stop, self.log_name = log_on, log_start, log_stop, log_name
         self.ntrip_on, self.ntrip_start, self.ntrip_stop, self.ntrip_succeed = ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed
         self.ntrip_ip, self.ntrip_port, self.ntrip_gga, self.ntrip_req = ntrip_ip, ntrip_port, ntrip_gga, ntrip_req
-        self.last_ins_msg, self.last_gps_msg, self.last_gp2_msg, self.last_imu_msg, self.last_hdg_msg, self.last_ahrs_msg\
-            = last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg
+        self.ins_ring, self.gps_ring, self.gp2_ring, self.imu_ring, self.hdg_ring, self.ahrs_ring\
+            = ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring
         self.last_imu_time = last_imu_time
+        self.latency_stats = latency_stats  # LatencyStats shared with io_loop, or None when LATENCY_STATS is off
+        self.io_stats = io_stats  # IOStats counters from io_loop, or None
 
         #any features which might or not be there - do based on firmware version?
         self.available_configs = []
@@ -124,6 +128,10 @@ class UserProgram:
                     if not USE_GRAPHICS:
                         menu_options.remove("Monitor")
                         menu_options.remove("Firmware Update")
+                        menu_options.remove("Plot")
+
+                    if not (self.io_stats or self.latency_stats):
+                        menu_options.remove("Stats")
 
                 else:
                     # not connected: reduced options
@@ -143,6 +151,8 @@ class UserProgram:
                     self.log()
                 elif action == "Monitor":
                     self.monitor()
+                elif action == "Stats":
+                    self.stats_menu()
                 elif action == "NTRIP":
                     self.ntrip_menu()
                 elif action == "Firmware Update":
@@ -311,6 +321,7 @@ class UserProgram:
                     self.show_ahrs_tab = True
                 else:
                     self.show_ahrs_tab = False
+                self.update_expected_periods()
                 return
             else:
                 self.release()
@@ -532,6 +543,23 @@ class UserProgram:
         resp = self.retry_command(method=set_method, args=[args], response_types=[b'CFG', b'ERR'])
         if not proper_response(resp, b'CFG', print_error=True):
             show_and_pause("") # proper_response already shows error, just pause to see it.
+        elif code == "odr":
+            self.update_expected_periods()
+
+    # expected period of the odr rate messages for io_stats gap counts, from the odr config. 0 (no gap counts) if
+    # the unit doesn't give it
+    def update_expected_periods(self):
+        if not self.io_stats:
+            return
+        resp = self.retry_command(method=self.board.get_cfg, args=[["odr"]], response_types=[b'CFG', b'ERR'])
+        period_us = 0
+        if hasattr(resp, "configurations") and "odr" in resp.configurations:
+            try:
+                period_us = 1e6 / float(resp.configurations["odr"])
+            except (ValueError, ZeroDivisionError):
+                pass
+        for msgtype in IO_STATS_ODR_MESSAGE_TYPES:
+            self.io_stats.set_expected_period_us(msgtype, period_us)
 
     # read and show all user configurations
     def read_all_configs(self, board):
@@ -904,7 +932,41 @@ class UserProgram:
         self.ntrip_on.value = 0
         self.ntrip_stop.value = 1
 
-    def monitor(self):
+    # io_loop counters, and latency histograms if LATENCY_STATS is on: show them, or save as JSON next to the logs.
+    # rates are since the last refresh
+    def stats_menu(self):
+        previous = None
+        while True:
+            clear_screen()
+            if self.io_stats:
+                print("\nData port messages by type:\n")
+                print(self.io_stats.summary_table(previous))
+                previous = self.io_stats.snapshot()
+                if self.io_stats.name != IO_STATS_NAME:
+                    print(f"\nshared as {self.io_stats.name} for io_stats_cli.py")
+            if self.latency_stats:
+                print("\nLatency by message type and stage, from reading the data port:\n")
+                print(self.latency_stats.summary_table())
+                print("\nhandoff, display and total are only recorded while the monitor is open")
+            actions = ["Refresh", "Save JSON", "cancel"]
+            selected_action = actions[cutie.select(actions)]
+            if selected_action == "Refresh":
+                continue
+            elif selected_action == "Save JSON":
+                location = os.path.normpath(os.path.join(BOARD_TOOLS_DIR, log_path()))
+                os.makedirs(location, exist_ok=True)
+                saved = []
+                for prefix, stats in [("io_stats", self.io_stats), ("latency", self.latency_stats)]:
+                    if stats:
+                        path = os.path.join(location, time.strftime(prefix + "_%Y_%m_%d_%H_%M_%S.json"))
+                        stats.save_json(path)
+                        saved.append(path)
+                show_and_pause("saved stats to " + ", ".join(saved))
+            else: #cancel
+                return
+
+    # start_tab: key of the tab to show first, eg "plot-tab"
+    def monitor(self, start_tab=None):
 
         if not USE_GRAPHICS:
             show_and_pause("\nno monitor when USE_GRAPHICS flag is false")
@@ -921,13 +983,9 @@ class UserProgram:
         # prevent prints in monitor, like PySimpleGUI prints on mac
         # this didn't stop geotiler prints when no internet -> do in geotiler_demo too?
         with open(os.devnull, "w") as f, redirect_stdout(f):
-            self.monitor_main()
-
-    def monitor_main(self):
+            self.monitor_main(start_tab)
 
-        ascii_scheme = ReadableScheme()
-        binary_scheme = Binary_Scheme()
-        rtcm_scheme = RTCM_Scheme()
+    def monitor_main(self, start_tab=None):
 
         sg.theme(SGTHEME)
 
@@ -1304,9 +1362,15 @@ class UserProgram:
         layout2 = [[map_main_column, map_side_column]]
         map_tab = sg.Tab(MONITOR_MAP_TAB_TITLE, layout2, key="map-tab", element_justification="top")#,title_color='Black', background_color='Orange', element_justification='right')
 
+        #________________TAB 7: rolling plots of IMU and INS data_______________________
+
+        plot_groups = [group for group in PLOT_GROUPS if self.show_gps_info or group[1] != b'INS']  # no INS without GPS
+        monitor_plots = MonitorPlots(plot_groups)
+        plot_tab = monitor_plots.tab(MONITOR_PLOT_TAB_TITLE, "plot-tab")
+
         #________________Window structure: contains both tabs_______________________
 
-        tab_group = sg.TabGroup([[ins_tab, ahrs_tab, imu_tab, gps_tab, gp2_tab, hdg_tab, map_tab]])#, tab_location='top',  # top, topleft, bottom, bottomright, left, right
+        tab_group = sg.TabGroup([[ins_tab, ahrs_tab, imu_tab, gps_tab, gp2_tab, hdg_tab, map_tab, plot_tab]])#, tab_location='top',  # top, topleft, bottom, bottomright, left, right
                                 #title_color='Red', tab_background_color='White',  # non-selected tabs
                                 #selected_title_color='Yellow', selected_background_color='Blue')  # selected tab
         try_set_expand(tab_group)
@@ -1373,12 +1437,6 @@ class UserProgram:
         debug_print("BASE_WIDTH: "+str(base_width))
         debug_print("BASE_HEIGHT:" +str(base_height))
 
-        last_last_ins = b''
-        last_last_gps = b''
-        last_last_gp2 = b''
-        last_last_imu = b''
-        last_last_hdg = b''
-        last_last_ahrs = b''
         last_ins_time = time.time()
         last_gps_time = last_ins_time
         last_gp2_time = last_ins_time
@@ -1414,6 +1472,12 @@ class UserProgram:
                 text_item.update(visible=False) #text elements have no "disabled". could check if hasattr("disabled")
         if not self.show_ahrs_tab:
             ahrs_tab.update(visible=False, disabled=True)
+        if start_tab:
+            window[start_tab].select()
+
+        #start from new messages, not ones from before the monitor opened
+        for ring in [self.ins_ring, self.gps_ring, self.gp2_ring, self.imu_ring, self.hdg_ring, self.ahrs_ring]:
+            ring.skip_to_latest()
 
         # update loop: check for new messages or button clicks, then update the displayed data
         while True:
@@ -1483,303 +1547,296 @@ class UserProgram:
                 debug_print("map zoom = " + str(current_zoom))
 
             #update for new ins data , only update items in the active tab.
-            if hasattr(self.last_ins_msg, "raw"):
-                #print(f"has last_ins_msg: {self.last_ins_msg.raw}")
-                #active_tab = tab_group.get() #move to top of loop
-                elapsed = time.time() - last_ins_time
-                # window["since_ins"].update('%.2f' % elapsed)
-                #if self.last_ins_msg.value == last_last_ins:
-                if self.last_ins_msg.raw == last_last_ins:
-                    #did not change - no update. but if it's been too long, zero the fields
-                    #time_since_ins.update(str(elapsed))
-                    #window.refresh()
-                    if (elapsed > ZERO_OUT_TIME) and active_tab == "numbers-tab": #zero out the numbers tab
-                        for field in ins_fields:
-                            field.update(MONITOR_DEFAULT_VALUE)
-                else: #changed - update the last_ins and counter, then update display from the new values
-                    #last_last_ins = self.last_ins_msg.value
-                    last_last_ins = self.last_ins_msg.raw
-                    last_ins_time = time.time()
-
-                    ins_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_ins_msg.raw)
-                    #print(f"\nins_msg: {ins_msg}")
-
-                    #update numbers display if active
-                    if active_tab == "numbers-tab":
-                        # debug_print(msg)
-                        # for label, attrname in configs:
-                        # textval = str(getattr(msg, attrname) if hasattr(msg, attrname) else default_value
-                        # window[label].update(textval)
-                        window["lat"].update('%.7f'%ins_msg.lat_deg if hasattr(ins_msg, "lat_deg") else MONITOR_DEFAULT_VALUE)
-                        window["lon"].update('%.7f'%ins_msg.lon_deg if hasattr(ins_msg, "lon_deg") else MONITOR_DEFAULT_VALUE)
-
-                        #compute ins speed as magnitude. include vz? should be small anyway
-                        vx = float(ins_msg.velocity_north_mps) if hasattr(ins_msg, "velocity_north_mps") else 0
-                        vy = float(ins_msg.velocity_east_mps) if hasattr(ins_msg, "velocity_east_mps") else 0
-                        vz = float(ins_msg.velocity_down_mps) if hasattr(ins_msg, "velocity_down_mps") else 0
-                        magnitude = ((vx**2)+(vy**2)+(vz**2))**(1/2)
-
-                        window["speed"].update('%.3f'%magnitude)
-                        window["att0"].update(
-                            '%.1f'%ins_msg.roll_deg if hasattr(ins_msg, "roll_deg") else MONITOR_DEFAULT_VALUE)
-                        window["att1"].update(
-                            '%.1f'%ins_msg.pitch_deg if hasattr(ins_msg, "pitch_deg") else MONITOR_DEFAULT_VALUE)
-                        window["att2"].update(
-                            '%.1f'%ins_msg.heading_deg if hasattr(ins_msg, "heading_deg") else MONITOR_DEFAULT_VALUE)
-
-                        window["soln"].update(INS_SOLN_NAMES.get(ins_msg.ins_solution_status, str(ins_msg.ins_solution_status))
-                            if hasattr(ins_msg, "ins_solution_status") else MONITOR_DEFAULT_VALUE)
-
-                        window["zupt"].update(ZUPT_NAMES.get(ins_msg.zupt_flag, str(ins_msg.zupt_flag))
-                                              if hasattr(ins_msg, "zupt_flag") else MONITOR_DEFAULT_VALUE)
-
-                        window["altitude"].update('%.1f'%ins_msg.alt_m if hasattr(ins_msg, "alt_m") else MONITOR_DEFAULT_VALUE)
-
-                        window["ins_imu_time"].update(
-                            '%.1f' % ins_msg.imu_time_ms if hasattr(ins_msg, "imu_time_ms") else MONITOR_DEFAULT_VALUE)
-
-                        window["ins_gps_time"].update(
-                            '%d' % ins_msg.gps_time_ns if hasattr(ins_msg, "gps_time_ns") else MONITOR_DEFAULT_VALUE)
-
-                    #Update Map if active
-                    if active_tab == "map-tab":
-                        #credit the provider selected with some text - maps from: name, website, copyright/license terms
-
-                        provider = "osm"  # force "osm" for now since stamen not working in geotiler.
-                        provider_credit_text = MAP_PROVIDER_CREDITS[provider] if provider in MAP_PROVIDER_CREDITS \
-                            else "maps from " + str(provider) + ", needs copyright/license info adding here"
-                        provider_credit_text_holder.update(provider_credit_text)
-
-                        #from ins message - could share variable with text updates above
-                        lat = ins_msg.lat_deg if hasattr(ins_msg, "lat_deg") else None #if None, will not update
-                        lon = ins_msg.lon_deg if hasattr(ins_msg, "lon_deg") else None
-                        heading = ins_msg.heading_deg if hasattr(ins_msg, "heading_deg") else None #0,1,2 = roll, pitch, heading
-
-                        #update the map, only if the lat/lon/position all received
-                        if (lat is not None) and (lon is not None) and (heading is not None):
-                            #tried to suppress map error prints with no internet, but doesn't work.
-                            #with open(os.devnull, "w") as f, redirect_stdout(f):
-                            pil_image = draw_map(lat, lon, current_zoom, MAP_DIMENSIONS, MAP_ARROW_SIZE, heading, ARROW_FILE_PATH, provider, storage=self.map_cache)
-                            bio = io.BytesIO()  # todo- does this accumulate memory? but if bio outside loop, image does't update
-                            pil_image.save(bio, format="PNG")  # put it in memory to load
-                            map_image.update(data=bio.getvalue()) #todo - check actual window size and handle resizes?
-
+            refresh_ns = time.perf_counter_ns() if self.latency_stats else 0
+            ins_records = self.ins_ring.read_new() #every INS message since the last refresh, already decoded by io_loop
+            #active_tab = tab_group.get() #move to top of loop
+            elapsed = time.time() - last_ins_time
+            # window["since_ins"].update('%.2f' % elapsed)
+            if not ins_records:
+                #did not change - no update. but if it's been too long, zero the fields
+                #time_since_ins.update(str(elapsed))
+                #window.refresh()
+                if (elapsed > ZERO_OUT_TIME) and active_tab == "numbers-tab": #zero out the numbers tab
+                    for field in ins_fields:
+                        field.update(MONITOR_DEFAULT_VALUE)
+            else: #changed - update the last_ins and counter, then update display from the new values
+                last_ins_time = time.time()
+
+                ins_msg = ins_records[-1]
+                #print(f"\nins_msg: {ins_msg}")
+
+                #update numbers display if active
+                if active_tab == "numbers-tab":
+                    # debug_print(msg)
+                    # for label, attrname in configs:
+                    # textval = str(getattr(msg, attrname) if hasattr(msg, attrname) else default_value
+                    # window[label].update(textval)
+                    window["lat"].update('%.7f'%ins_msg.lat_deg if hasattr(ins_msg, "lat_deg") else MONITOR_DEFAULT_VALUE)
+                    window["lon"].update('%.7f'%ins_msg.lon_deg if hasattr(ins_msg, "lon_deg") else MONITOR_DEFAULT_VALUE)
+
+                    #compute ins speed as magnitude. include vz? should be small anyway
+                    vx = float(ins_msg.velocity_north_mps) if hasattr(ins_msg, "velocity_north_mps") else 0
+                    vy = float(ins_msg.velocity_east_mps) if hasattr(ins_msg, "velocity_east_mps") else 0
+                    vz = float(ins_msg.velocity_down_mps) if hasattr(ins_msg, "velocity_down_mps") else 0
+                    magnitude = ((vx**2)+(vy**2)+(vz**2))**(1/2)
+
+                    window["speed"].update('%.3f'%magnitude)
+                    window["att0"].update(
+                        '%.1f'%ins_msg.roll_deg if hasattr(ins_msg, "roll_deg") else MONITOR_DEFAULT_VALUE)
+                    window["att1"].update(
+                        '%.1f'%ins_msg.pitch_deg if hasattr(ins_msg, "pitch_deg") else MONITOR_DEFAULT_VALUE)
+                    window["att2"].update(
+                        '%.1f'%ins_msg.heading_deg if hasattr(ins_msg, "heading_deg") else MONITOR_DEFAULT_VALUE)
+
+                    window["soln"].update(INS_SOLN_NAMES.get(ins_msg.ins_solution_status, str(ins_msg.ins_solution_status))
+                        if hasattr(ins_msg, "ins_solution_status") else MONITOR_DEFAULT_VALUE)
+
+                    window["zupt"].update(ZUPT_NAMES.get(ins_msg.zupt_flag, str(ins_msg.zupt_flag))
+                                          if hasattr(ins_msg, "zupt_flag") else MONITOR_DEFAULT_VALUE)
+
+                    window["altitude"].update('%.1f'%ins_msg.alt_m if hasattr(ins_msg, "alt_m") else MONITOR_DEFAULT_VALUE)
+
+                    window["ins_imu_time"].update(
+                        '%.1f' % ins_msg.imu_time_ms if hasattr(ins_msg, "imu_time_ms") else MONITOR_DEFAULT_VALUE)
+
+                    window["ins_gps_time"].update(
+                        '%d' % ins_msg.gps_time_ns if hasattr(ins_msg, "gps_time_ns") else MONITOR_DEFAULT_VALUE)
+
+                #Update Map if active
+                if active_tab == "map-tab":
+                    #credit the provider selected with some text - maps from: name, website, copyright/license terms
+
+                    provider = "osm"  # force "osm" for now since stamen not working in geotiler.
+                    provider_credit_text = MAP_PROVIDER_CREDITS[provider] if provider in MAP_PROVIDER_CREDITS \
+                        else "maps from " + str(provider) + ", needs copyright/license info adding here"
+                    provider_credit_text_holder.update(provider_credit_text)
+
+                    #from ins message - could share variable with text updates above
+                    lat = ins_msg.lat_deg if hasattr(ins_msg, "lat_deg") else None #if None, will not update
+                    lon = ins_msg.lon_deg if hasattr(ins_msg, "lon_deg") else None
+                    heading = ins_msg.heading_deg if hasattr(ins_msg, "heading_deg") else None #0,1,2 = roll, pitch, heading
+
+                    #update the map, only if the lat/lon/position all received
+                    if (lat is not None) and (lon is not None) and (heading is not None):
+                        #tried to suppress map error prints with no internet, but doesn't work.
+                        #with open(os.devnull, "w") as f, redirect_stdout(f):
+                        pil_image = draw_map(lat, lon, current_zoom, MAP_DIMENSIONS, MAP_ARROW_SIZE, heading, ARROW_FILE_PATH, provider, storage=self.map_cache)
+                        bio = io.BytesIO()  # todo- does this accumulate memory? but if bio outside loop, image does't update
+                        pil_image.save(bio, format="PNG")  # put it in memory to load
+                        map_image.update(data=bio.getvalue()) #todo - check actual window size and handle resizes?
+
+            # window.refresh()
+            gps_records = self.gps_ring.read_new() #every GPS message since the last refresh, already decoded by io_loop
+            elapsed = time.time() - last_gps_time
+            if not gps_records:
+                #did not change - no update. but if it's been too long, zero the fields
                 # window.refresh()
-            if hasattr(self.last_gps_msg, "raw"):
-                #print(f"has last_gps_msg: {self.last_gps_msg.raw}")
-                elapsed = time.time() - last_gps_time
-                #if self.last_gps_msg.value == last_last_gps:
-                if self.last_gps_msg.raw == last_last_gps:
-                    #did not change - no update. but if it's been too long, zero the fields
-                    # window.refresh()
-                    if elapsed > ZERO_OUT_TIME:
-                        if active_tab == "numbers-tab": #zero these if tab is active
-                            for field in ins_tab_gps_fields:
-                                field.update(MONITOR_DEFAULT_VALUE)
-                        elif active_tab == "gps-tab":
-                            for field in gps_tab_gps_fields:
-                                field.update(MONITOR_DEFAULT_VALUE)
-                else:
-                    #last_last_gps = self.last_gps_msg.value
-                    last_last_gps = self.last_gps_msg.raw
-                    last_gps_time = time.time()
-                    if active_tab == 'numbers-tab': #these items are in numbers tab, so update only if active
-                        gps_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_gps_msg.raw)
-                        #print(f"\ngps_msg: {gps_msg}")
-                        window["gps_carrsoln2"].update(GPS_SOLN_NAMES.get(gps_msg.carrier_solution_status, str(gps_msg.carrier_solution_status))
-                                                      if hasattr(gps_msg, "carrier_solution_status") else MONITOR_DEFAULT_VALUE)
-                        window["gps_fix2"].update(GPS_FIX_NAMES.get(gps_msg.gnss_fix_type, str(gps_msg.gnss_fix_type))
-                                                 if hasattr(gps_msg, "gnss_fix_type") else MONITOR_DEFAULT_VALUE)
-                        window["num_sats2"].update(gps_msg.num_sats if hasattr(gps_msg, "num_sats") else MONITOR_DEFAULT_VALUE)
-                    if active_tab == 'gps-tab':
-                        gps_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_gps_msg.raw)
-                        #update the fields. todo: can this be a loop over gps_tab_gps_fields?
-                        window["gps_lat"].update('%.7f' % gps_msg.lat_deg if hasattr(gps_msg, "lat_deg") else MONITOR_DEFAULT_VALUE)
-                        window["gps_lon"].update('%.7f' % gps_msg.lon_deg if hasattr(gps_msg, "lon_deg") else MONITOR_DEFAULT_VALUE)
-                        window["gps_alt_ell"].update('%.2f' % gps_msg.alt_ellipsoid_m if hasattr(gps_msg, "alt_ellipsoid_m") else MONITOR_DEFAULT_VALUE)
-                        window["gps_alt_msl"].update('%.2f' % gps_msg.alt_msl_m if hasattr(gps_msg, "alt_msl_m") else MONITOR_DEFAULT_VALUE)
-                        window["gps_spd"].update('%.2f' % gps_msg.speed_mps if hasattr(gps_msg, "speed_mps") else MONITOR_DEFAULT_VALUE)
-                        window["gps_hdg"].update('%.2f' % gps_msg.heading_deg if hasattr(gps_msg, "heading_deg") else MONITOR_DEFAULT_VALUE)
-                        window["gps_hacc"].update('%.2f' % gps_msg.accuracy_horizontal_m if hasattr(gps_msg, "accuracy_horizontal_m") else MONITOR_DEFAULT_VALUE)
-                        window["gps_vacc"].update('%.2f' % gps_msg.accuracy_vertical_m if hasattr(gps_msg, "accuracy_vertical_m") else MONITOR_DEFAULT_VALUE)
-                        window["gps_pdop"].update('%.2f' % gps_msg.PDOP if hasattr(gps_msg, "PDOP") else MONITOR_DEFAULT_VALUE)
-                        window["gps_numsv"].update(gps_msg.num_sats if hasattr(gps_msg, "num_sats") else MONITOR_DEFAULT_VALUE) #int, don't %3f.
-                        window["gps_spd_acc"].update('%.2f' % gps_msg.speed_accuracy_mps if hasattr(gps_msg, "speed_accuracy_mps") else MONITOR_DEFAULT_VALUE)
-                        window["gps_hdg_acc"].update('%.2f' % gps_msg.heading_accuracy_deg if hasattr(gps_msg, "heading_accuracy_deg") else MONITOR_DEFAULT_VALUE)
-                        #values with names - get name from dictionary.
-                        window["gps_carrsoln"].update(GPS_SOLN_NAMES.get(gps_msg.carrier_solution_status, str(gps_msg.carrier_solution_status))
-                                                      if hasattr(gps_msg, "carrier_solution_status") else MONITOR_DEFAULT_VALUE)
-                        window["gps_fix"].update(GPS_FIX_NAMES.get(gps_msg.gnss_fix_type, str(gps_msg.gnss_fix_type))
-                                                 if hasattr(gps_msg, "gnss_fix_type") else MONITOR_DEFAULT_VALUE)
-
-            #update GP2 tab for GP2 message. TODO - can this logic be combined with GPS tab?
-            if hasattr(self.last_gp2_msg, "raw"):
-                #print(f"has last_gps_msg: {self.last_gps_msg.raw}")
-                elapsed = time.time() - last_gp2_time
-                if self.last_gp2_msg.raw == last_last_gp2:
-                    #did not change - no update. but if it's been too long, zero the fields
-                    if elapsed > ZERO_OUT_TIME:
-                        if active_tab == "gp2-tab":
-                            for field in gp2_tab_gp2_fields:
-                                field.update(MONITOR_DEFAULT_VALUE)
-                else:
-                    #last_last_gps = self.last_gps_msg.value
-                    last_last_gp2 = self.last_gp2_msg.raw
-                    last_gp2_time = time.time()
-                    if active_tab == 'gp2-tab':
-                        gps_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_gp2_msg.raw)
-                        #update the fields. todo: can this be a loop over gps_tab_gps_fields?
-                        window["gp2_lat"].update('%.7f' % gps_msg.lat_deg if hasattr(gps_msg, "lat_deg") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_lon"].update('%.7f' % gps_msg.lon_deg if hasattr(gps_msg, "lon_deg") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_alt_ell"].update('%.2f' % gps_msg.alt_ellipsoid_m if hasattr(gps_msg, "alt_ellipsoid_m") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_alt_msl"].update('%.2f' % gps_msg.alt_msl_m if hasattr(gps_msg, "alt_msl_m") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_spd"].update('%.2f' % gps_msg.speed_mps if hasattr(gps_msg, "speed_mps") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_hdg"].update('%.2f' % gps_msg.heading_deg if hasattr(gps_msg, "heading_deg") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_hacc"].update('%.2f' % gps_msg.accuracy_horizontal_m if hasattr(gps_msg, "accuracy_horizontal_m") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_vacc"].update('%.2f' % gps_msg.accuracy_vertical_m if hasattr(gps_msg, "accuracy_vertical_m") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_pdop"].update('%.2f' % gps_msg.PDOP if hasattr(gps_msg, "PDOP") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_numsv"].update(gps_msg.num_sats if hasattr(gps_msg, "num_sats") else MONITOR_DEFAULT_VALUE) #int, don't %3f.
-                        window["gp2_spd_acc"].update('%.2f' % gps_msg.speed_accuracy_mps if hasattr(gps_msg, "speed_accuracy_mps") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_hdg_acc"].update('%.2f' % gps_msg.heading_accuracy_deg if hasattr(gps_msg, "heading_accuracy_deg") else MONITOR_DEFAULT_VALUE)
-                        #values with names - get name from dictionary.
-                        window["gp2_carrsoln"].update(GPS_SOLN_NAMES.get(gps_msg.carrier_solution_status, str(gps_msg.carrier_solution_status))
-                                                      if hasattr(gps_msg, "carrier_solution_status") else MONITOR_DEFAULT_VALUE)
-                        window["gp2_fix"].update(GPS_FIX_NAMES.get(gps_msg.gnss_fix_type, str(gps_msg.gnss_fix_type))
-                                                 if hasattr(gps_msg, "gnss_fix_type") else MONITOR_DEFAULT_VALUE)
-            if hasattr(self.last_imu_msg, "raw"):
-                #print(f"has last_imu_msg: {self.last_imu_msg.raw}")
-                #update for new imu message
-                elapsed = time.time() - last_imu_time
-                #TODO - can update any "time since imu" indicator here
-                #if self.last_imu_msg.value == last_last_imu:
-                if self.last_imu_msg.raw == last_last_imu:
-                    # did not change - no update. but if it's been too long, zero the fields
-                    # time_since_ins.update(str(elapsed))
-                    # window.refresh()
-                    if (elapsed > ZERO_OUT_TIME) and active_tab == "imu-tab":  # zero out the numbers tab
-                        for field in imu_fields:
+                if elapsed > ZERO_OUT_TIME:
+                    if active_tab == "numbers-tab": #zero these if tab is active
+                        for field in ins_tab_gps_fields:
                             field.update(MONITOR_DEFAULT_VALUE)
-                else:  # changed - update the last_ins and counter, then update display from the new values
-                    # last_last_imu = self.last_imu_msg.value
-                    last_last_imu = self.last_imu_msg.raw
-                    last_imu_time = time.time()
-                    imu_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_imu_msg.raw)
-                    if active_tab == 'imu-tab':
-                        #print(f"\nimu_msg: {imu_msg}")
-                        #update the imu fields from the message
-                        window["ax_value"].update('%.4f'%imu_msg.accel_x_g if hasattr(imu_msg, "accel_x_g")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["ay_value"].update('%.4f' % imu_msg.accel_y_g if hasattr(imu_msg, "accel_y_g")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["az_value"].update('%.4f' % imu_msg.accel_z_g if hasattr(imu_msg, "accel_z_g")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["wx_value"].update('%.4f' % imu_msg.angrate_x_dps if hasattr(imu_msg, "angrate_x_dps")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["wy_value"].update('%.4f' % imu_msg.angrate_y_dps if hasattr(imu_msg, "angrate_y_dps")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["wz_value"].update('%.4f' % imu_msg.angrate_z_dps if hasattr(imu_msg, "angrate_z_dps")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["fog_value"].update('%.4f' % imu_msg.fog_angrate_z_dps
-                                                   if hasattr(imu_msg, "fog_angrate_z_dps") else MONITOR_DEFAULT_VALUE)
-                        window["temp_value"].update('%.2f' % imu_msg.temperature_c
-                                                   if hasattr(imu_msg, "temperature_c") else MONITOR_DEFAULT_VALUE)
-                        window["imu_cpu_time"].update('%.2f' % imu_msg.imu_time_ms
-                                                    if hasattr(imu_msg, "imu_time_ms") else MONITOR_DEFAULT_VALUE)
-                        window["imu_sync_time"].update('%.2f' % imu_msg.sync_time_ms
-                                                    if hasattr(imu_msg, "sync_time_ms") else MONITOR_DEFAULT_VALUE)
-
-                        #message with an odometer speed/time: update the latest speed, reset timer.
-                        if self.show_gps_info:
-                            if hasattr(imu_msg, "odometer_speed_mps") and hasattr(imu_msg, "odometer_time_ms") and imu_msg.odometer_time_ms > 0:
-                                #odo_value =  '%.2f' % imu_msg.odometer_speed_mps
-                                #last_odo_speed = imu_msg.odometer_speed_mps
-                                last_odo_time = time.time() #or use time of the message?
-                                window["odo_value"].update('%.2f' % imu_msg.odometer_speed_mps)
-                            #if timer runs out, blank the odo speed.
-                            elif time.time() - last_odo_time > ODOMETER_ZERO_TIME:
-                                #odo_value = MONITOR_DEFAULT_VALUE #TODO - do the timeout logic here.
-                                window["odo_value"].update(MONITOR_DEFAULT_VALUE)
-            if hasattr(self.last_hdg_msg, "raw"):
-                #print(f"last_hdg_msg.raw is {self.last_hdg_msg.raw}")
-                elapsed_hdg = time.time() - last_hdg_time
-                # can update any "time since hdg" indicator here
-                if self.last_hdg_msg.raw == last_last_hdg:
-                    # can zero any heading fields if too much time passed
-                    if (elapsed_hdg > ZERO_OUT_TIME) and active_tab == "gps-tab":  # zero out the numbers tab
-                        for field in hdg_fields:
+                    elif active_tab == "gps-tab":
+                        for field in gps_tab_gps_fields:
                             field.update(MONITOR_DEFAULT_VALUE)
-                else:  # changed - update the last_ins and counter, then update display from the new values
-                    # last_last_imu = self.last_imu_msg.value
-                    last_last_hdg = self.last_hdg_msg.raw
-                    last_hdg_time = time.time()
-                    if active_tab == 'hdg-tab':
-                        hdg_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_hdg_msg.raw)
-                        #print(f"new heading message: {hdg_msg}")
-                        #update the hdg monitor fields here
-                        window["hdg_hdg"].update('%.2f' % hdg_msg.relPosHeading_deg if hasattr(hdg_msg, "relPosHeading_deg")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_len"].update('%.2f' % hdg_msg.relPosLen_m if hasattr(hdg_msg, "relPosLen_m")
-                                                  else MONITOR_DEFAULT_VALUE)
-
-                        window["hdg_N"].update('%.2f' % hdg_msg.relPosN_m if hasattr(hdg_msg, "relPosN_m")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_E"].update('%.2f' % hdg_msg.relPosE_m if hasattr(hdg_msg, "relPosE_m")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_D"].update('%.2f' % hdg_msg.relPosD_m if hasattr(hdg_msg, "relPosD_m")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_lenacc"].update('%.2f' % hdg_msg.relPosLenAcc_m if hasattr(hdg_msg, "relPosLenAcc_m")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_hdgacc"].update('%.2f' % hdg_msg.relPosHeadingAcc_deg if hasattr(hdg_msg, "relPosHeadingAcc_deg")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags"].update(hdg_msg.flags if hasattr(hdg_msg, "flags") #int, don't show decimals
-                                                  else MONITOR_DEFAULT_VALUE)
-                        #flags are ints - show as 1/0 or on/off?
-                        window["hdg_flags_fixok"].update(hdg_msg.gnssFixOK if hasattr(hdg_msg, "gnssFixOK")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_diffsoln"].update(hdg_msg.diffSoln if hasattr(hdg_msg, "diffSoln")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_posvalid"].update(hdg_msg.relPosValid if hasattr(hdg_msg, "relPosValid")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_ismoving"].update(hdg_msg.isMoving if hasattr(hdg_msg, "isMoving")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_refposmiss"].update(hdg_msg.refPosMiss if hasattr(hdg_msg, "refPosMiss")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_refobsmiss"].update(hdg_msg.refObsMiss if hasattr(hdg_msg, "refObsMiss")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_hdgvalid"].update(hdg_msg.relPosHeading_Valid if hasattr(hdg_msg, "relPosHeading_Valid")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_normalized"].update(hdg_msg.relPos_Normalized if hasattr(hdg_msg, "relPos_Normalized")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["hdg_flags_carrsoln"].update(hdg_msg.carrSoln if hasattr(hdg_msg, "carrSoln")
-                                                  else MONITOR_DEFAULT_VALUE)
-            if hasattr(self.last_ahrs_msg, "raw"):
-                #print(f"last_hdg_msg.raw is {self.last_hdg_msg.raw}")
-                elapsed_ahrs = time.time() - last_ahrs_time
-                # can update any "time since hdg" indicator here
-                if self.last_ahrs_msg.raw == last_last_ahrs:
-                    # can zero any heading fields if too much time passed
-                    if (elapsed_ahrs > ZERO_OUT_TIME) and active_tab == "ahrs-tab":  # zero out the numbers tab
-                        for field in ahrs_fields:
+            else:
+                last_gps_time = time.time()
+                if active_tab == 'numbers-tab': #these items are in numbers tab, so update only if active
+                    gps_msg = gps_records[-1]
+                    #print(f"\ngps_msg: {gps_msg}")
+                    window["gps_carrsoln2"].update(GPS_SOLN_NAMES.get(gps_msg.carrier_solution_status, str(gps_msg.carrier_solution_status))
+                                                  if hasattr(gps_msg, "carrier_solution_status") else MONITOR_DEFAULT_VALUE)
+                    window["gps_fix2"].update(GPS_FIX_NAMES.get(gps_msg.gnss_fix_type, str(gps_msg.gnss_fix_type))
+                                             if hasattr(gps_msg, "gnss_fix_type") else MONITOR_DEFAULT_VALUE)
+                    window["num_sats2"].update(gps_msg.num_sats if hasattr(gps_msg, "num_sats") else MONITOR_DEFAULT_VALUE)
+                if active_tab == 'gps-tab':
+                    gps_msg = gps_records[-1]
+                    #update the fields. todo: can this be a loop over gps_tab_gps_fields?
+                    window["gps_lat"].update('%.7f' % gps_msg.lat_deg if hasattr(gps_msg, "lat_deg") else MONITOR_DEFAULT_VALUE)
+                    window["gps_lon"].update('%.7f' % gps_msg.lon_deg if hasattr(gps_msg, "lon_deg") else MONITOR_DEFAULT_VALUE)
+                    window["gps_alt_ell"].update('%.2f' % gps_msg.alt_ellipsoid_m if hasattr(gps_msg, "alt_ellipsoid_m") else MONITOR_DEFAULT_VALUE)
+                    window["gps_alt_msl"].update('%.2f' % gps_msg.alt_msl_m if hasattr(gps_msg, "alt_msl_m") else MONITOR_DEFAULT_VALUE)
+                    window["gps_spd"].update('%.2f' % gps_msg.speed_mps if hasattr(gps_msg, "speed_mps") else MONITOR_DEFAULT_VALUE)
+                    window["gps_hdg"].update('%.2f' % gps_msg.heading_deg if hasattr(gps_msg, "heading_deg") else MONITOR_DEFAULT_VALUE)
+                    window["gps_hacc"].update('%.2f' % gps_msg.accuracy_horizontal_m if hasattr(gps_msg, "accuracy_horizontal_m") else MONITOR_DEFAULT_VALUE)
+                    window["gps_vacc"].update('%.2f' % gps_msg.accuracy_vertical_m if hasattr(gps_msg, "accuracy_vertical_m") else MONITOR_DEFAULT_VALUE)
+                    window["gps_pdop"].update('%.2f' % gps_msg.PDOP if hasattr(gps_msg, "PDOP") else MONITOR_DEFAULT_VALUE)
+                    window["gps_numsv"].update(gps_msg.num_sats if hasattr(gps_msg, "num_sats") else MONITOR_DEFAULT_VALUE) #int, don't %3f.
+                    window["gps_spd_acc"].update('%.2f' % gps_msg.speed_accuracy_mps if hasattr(gps_msg, "speed_accuracy_mps") else MONITOR_DEFAULT_VALUE)
+                    window["gps_hdg_acc"].update('%.2f' % gps_msg.heading_accuracy_deg if hasattr(gps_msg, "heading_accuracy_deg") else MONITOR_DEFAULT_VALUE)
+                    #values with names - get name from dictionary.
+                    window["gps_carrsoln"].update(GPS_SOLN_NAMES.get(gps_msg.carrier_solution_status, str(gps_msg.carrier_solution_status))
+                                                  if hasattr(gps_msg, "carrier_solution_status") else MONITOR_DEFAULT_VALUE)
+                    window["gps_fix"].update(GPS_FIX_NAMES.get(gps_msg.gnss_fix_type, str(gps_msg.gnss_fix_type))
+                                             if hasattr(gps_msg, "gnss_fix_type") else MONITOR_DEFAULT_VALUE)
+
+            #update GP2 tab for GP2 message. TODO - can this logic be combined with GPS tab?
+            gp2_records = self.gp2_ring.read_new() #every GP2 message since the last refresh, already decoded by io_loop
+            elapsed = time.time() - last_gp2_time
+            if not gp2_records:
+                #did not change - no update. but if it's been too long, zero the fields
+                if elapsed > ZERO_OUT_TIME:
+                    if active_tab == "gp2-tab":
+                        for field in gp2_tab_gp2_fields:
                             field.update(MONITOR_DEFAULT_VALUE)
-                else:  # changed - update the last_ins and counter, then update display from the new values
-                    last_last_ahrs = self.last_ahrs_msg.raw
-                    last_ahrs_time = time.time()
-                    if active_tab == 'ahrs-tab':
-                        ahrs_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_ahrs_msg.raw)
-                        #print(f"new heading message: {ahrs_msg}")
-                        #update the ahrs monitor fields here
-                        window["ahrs_time"].update('%.2f' % ahrs_msg.imu_time_ms if hasattr(ahrs_msg, "imu_time_ms")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["ahrs_sync"].update('%.2f' % ahrs_msg.sync_time_ms if hasattr(ahrs_msg, "sync_time_ms")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["ahrs_roll"].update('%.2f' % ahrs_msg.roll_deg if hasattr(ahrs_msg, "roll_deg")
-                                                   else MONITOR_DEFAULT_VALUE)
-                        window["ahrs_pitch"].update('%.2f' % ahrs_msg.pitch_deg if hasattr(ahrs_msg, "pitch_deg")
-                                                   else MONITOR_DEFAULT_VALUE)
-                        window["ahrs_heading"].update('%.2f' % ahrs_msg.heading_deg if hasattr(ahrs_msg, "heading_deg")
-                                                   else MONITOR_DEFAULT_VALUE)
-                        window["ahrs_zupt"].update(ZUPT_NAMES.get(ahrs_msg.zupt_flag, str(ahrs_msg.zupt_flag))
-                                                   if hasattr(ahrs_msg, "zupt_flag") else MONITOR_DEFAULT_VALUE)
+            else:
+                last_gp2_time = time.time()
+                if active_tab == 'gp2-tab':
+                    gps_msg = gp2_records[-1]
+                    #update the fields. todo: can this be a loop over gps_tab_gps_fields?
+                    window["gp2_lat"].update('%.7f' % gps_msg.lat_deg if hasattr(gps_msg, "lat_deg") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_lon"].update('%.7f' % gps_msg.lon_deg if hasattr(gps_msg, "lon_deg") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_alt_ell"].update('%.2f' % gps_msg.alt_ellipsoid_m if hasattr(gps_msg, "alt_ellipsoid_m") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_alt_msl"].update('%.2f' % gps_msg.alt_msl_m if hasattr(gps_msg, "alt_msl_m") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_spd"].update('%.2f' % gps_msg.speed_mps if hasattr(gps_msg, "speed_mps") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_hdg"].update('%.2f' % gps_msg.heading_deg if hasattr(gps_msg, "heading_deg") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_hacc"].update('%.2f' % gps_msg.accuracy_horizontal_m if hasattr(gps_msg, "accuracy_horizontal_m") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_vacc"].update('%.2f' % gps_msg.accuracy_vertical_m if hasattr(gps_msg, "accuracy_vertical_m") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_pdop"].update('%.2f' % gps_msg.PDOP if hasattr(gps_msg, "PDOP") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_numsv"].update(gps_msg.num_sats if hasattr(gps_msg, "num_sats") else MONITOR_DEFAULT_VALUE) #int, don't %3f.
+                    window["gp2_spd_acc"].update('%.2f' % gps_msg.speed_accuracy_mps if hasattr(gps_msg, "speed_accuracy_mps") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_hdg_acc"].update('%.2f' % gps_msg.heading_accuracy_deg if hasattr(gps_msg, "heading_accuracy_deg") else MONITOR_DEFAULT_VALUE)
+                    #values with names - get name from dictionary.
+                    window["gp2_carrsoln"].update(GPS_SOLN_NAMES.get(gps_msg.carrier_solution_status, str(gps_msg.carrier_solution_status))
+                                                  if hasattr(gps_msg, "carrier_solution_status") else MONITOR_DEFAULT_VALUE)
+                    window["gp2_fix"].update(GPS_FIX_NAMES.get(gps_msg.gnss_fix_type, str(gps_msg.gnss_fix_type))
+                                             if hasattr(gps_msg, "gnss_fix_type") else MONITOR_DEFAULT_VALUE)
+            imu_records = self.imu_ring.read_new() #every IMU message since the last refresh, already decoded by io_loop
+            #update for new imu message
+            elapsed = time.time() - last_imu_time
+            #TODO - can update any "time since imu" indicator here
+            if not imu_records:
+                # did not change - no update. but if it's been too long, zero the fields
+                # time_since_ins.update(str(elapsed))
+                # window.refresh()
+                if (elapsed > ZERO_OUT_TIME) and active_tab == "imu-tab":  # zero out the numbers tab
+                    for field in imu_fields:
+                        field.update(MONITOR_DEFAULT_VALUE)
+            else:  # changed - update the last_ins and counter, then update display from the new values
+                last_imu_time = time.time()
+                imu_msg = imu_records[-1]
+                if active_tab == 'imu-tab':
+                    #print(f"\nimu_msg: {imu_msg}")
+                    #update the imu fields from the message
+                    window["ax_value"].update('%.4f'%imu_msg.accel_x_g if hasattr(imu_msg, "accel_x_g")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["ay_value"].update('%.4f' % imu_msg.accel_y_g if hasattr(imu_msg, "accel_y_g")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["az_value"].update('%.4f' % imu_msg.accel_z_g if hasattr(imu_msg, "accel_z_g")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["wx_value"].update('%.4f' % imu_msg.angrate_x_dps if hasattr(imu_msg, "angrate_x_dps")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["wy_value"].update('%.4f' % imu_msg.angrate_y_dps if hasattr(imu_msg, "angrate_y_dps")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["wz_value"].update('%.4f' % imu_msg.angrate_z_dps if hasattr(imu_msg, "angrate_z_dps")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["fog_value"].update('%.4f' % imu_msg.fog_angrate_z_dps
+                                               if hasattr(imu_msg, "fog_angrate_z_dps") else MONITOR_DEFAULT_VALUE)
+                    window["temp_value"].update('%.2f' % imu_msg.temperature_c
+                                               if hasattr(imu_msg, "temperature_c") else MONITOR_DEFAULT_VALUE)
+                    window["imu_cpu_time"].update('%.2f' % imu_msg.imu_time_ms
+                                                if hasattr(imu_msg, "imu_time_ms") else MONITOR_DEFAULT_VALUE)
+                    window["imu_sync_time"].update('%.2f' % imu_msg.sync_time_ms
+                                                if hasattr(imu_msg, "sync_time_ms") else MONITOR_DEFAULT_VALUE)
+
+                    #message with an odometer speed/time: update the latest speed, reset timer.
+                    if self.show_gps_info:
+                        if hasattr(imu_msg, "odometer_speed_mps") and hasattr(imu_msg, "odometer_time_ms") and imu_msg.odometer_time_ms > 0:
+                            #odo_value =  '%.2f' % imu_msg.odometer_speed_mps
+                            #last_odo_speed = imu_msg.odometer_speed_mps
+                            last_odo_time = time.time() #or use time of the message?
+                            window["odo_value"].update('%.2f' % imu_msg.odometer_speed_mps)
+                        #if timer runs out, blank the odo speed.
+                        elif time.time() - last_odo_time > ODOMETER_ZERO_TIME:
+                            #odo_value = MONITOR_DEFAULT_VALUE #TODO - do the timeout logic here.
+                            window["odo_value"].update(MONITOR_DEFAULT_VALUE)
+            hdg_records = self.hdg_ring.read_new() #every HDG message since the last refresh, already decoded by io_loop
+            elapsed_hdg = time.time() - last_hdg_time
+            # can update any "time since hdg" indicator here
+            if not hdg_records:
+                # can zero any heading fields if too much time passed
+                if (elapsed_hdg > ZERO_OUT_TIME) and active_tab == "gps-tab":  # zero out the numbers tab
+                    for field in hdg_fields:
+                        field.update(MONITOR_DEFAULT_VALUE)
+            else:  # changed - update the last_ins and counter, then update display from the new values
+                last_hdg_time = time.time()
+                if active_tab == 'hdg-tab':
+                    hdg_msg = hdg_records[-1]
+                    #print(f"new heading message: {hdg_msg}")
+                    #update the hdg monitor fields here
+                    window["hdg_hdg"].update('%.2f' % hdg_msg.relPosHeading_deg if hasattr(hdg_msg, "relPosHeading_deg")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_len"].update('%.2f' % hdg_msg.relPosLen_m if hasattr(hdg_msg, "relPosLen_m")
+                                              else MONITOR_DEFAULT_VALUE)
+
+                    window["hdg_N"].update('%.2f' % hdg_msg.relPosN_m if hasattr(hdg_msg, "relPosN_m")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_E"].update('%.2f' % hdg_msg.relPosE_m if hasattr(hdg_msg, "relPosE_m")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_D"].update('%.2f' % hdg_msg.relPosD_m if hasattr(hdg_msg, "relPosD_m")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_lenacc"].update('%.2f' % hdg_msg.relPosLenAcc_m if hasattr(hdg_msg, "relPosLenAcc_m")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_hdgacc"].update('%.2f' % hdg_msg.relPosHeadingAcc_deg if hasattr(hdg_msg, "relPosHeadingAcc_deg")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags"].update(hdg_msg.flags if hasattr(hdg_msg, "flags") #int, don't show decimals
+                                              else MONITOR_DEFAULT_VALUE)
+                    #flags are ints - show as 1/0 or on/off?
+                    window["hdg_flags_fixok"].update(hdg_msg.gnssFixOK if hasattr(hdg_msg, "gnssFixOK")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_diffsoln"].update(hdg_msg.diffSoln if hasattr(hdg_msg, "diffSoln")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_posvalid"].update(hdg_msg.relPosValid if hasattr(hdg_msg, "relPosValid")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_ismoving"].update(hdg_msg.isMoving if hasattr(hdg_msg, "isMoving")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_refposmiss"].update(hdg_msg.refPosMiss if hasattr(hdg_msg, "refPosMiss")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_refobsmiss"].update(hdg_msg.refObsMiss if hasattr(hdg_msg, "refObsMiss")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_hdgvalid"].update(hdg_msg.relPosHeading_Valid if hasattr(hdg_msg, "relPosHeading_Valid")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_normalized"].update(hdg_msg.relPos_Normalized if hasattr(hdg_msg, "relPos_Normalized")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["hdg_flags_carrsoln"].update(hdg_msg.carrSoln if hasattr(hdg_msg, "carrSoln")
+                                              else MONITOR_DEFAULT_VALUE)
+            ahrs_records = self.ahrs_ring.read_new() #every AHRS message since the last refresh, already decoded by io_loop
+            elapsed_ahrs = time.time() - last_ahrs_time
+            # can update any "time since hdg" indicator here
+            if not ahrs_records:
+                # can zero any heading fields if too much time passed
+                if (elapsed_ahrs > ZERO_OUT_TIME) and active_tab == "ahrs-tab":  # zero out the numbers tab
+                    for field in ahrs_fields:
+                        field.update(MONITOR_DEFAULT_VALUE)
+            else:  # changed - update the last_ins and counter, then update display from the new values
+                last_ahrs_time = time.time()
+                if active_tab == 'ahrs-tab':
+                    ahrs_msg = ahrs_records[-1]
+                    #print(f"new heading message: {ahrs_msg}")
+                    #update the ahrs monitor fields here
+                    window["ahrs_time"].update('%.2f' % ahrs_msg.imu_time_ms if hasattr(ahrs_msg, "imu_time_ms")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["ahrs_sync"].update('%.2f' % ahrs_msg.sync_time_ms if hasattr(ahrs_msg, "sync_time_ms")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["ahrs_roll"].update('%.2f' % ahrs_msg.roll_deg if hasattr(ahrs_msg, "roll_deg")
+                                               else MONITOR_DEFAULT_VALUE)
+                    window["ahrs_pitch"].update('%.2f' % ahrs_msg.pitch_deg if hasattr(ahrs_msg, "pitch_deg")
+                                               else MONITOR_DEFAULT_VALUE)
+                    window["ahrs_heading"].update('%.2f' % ahrs_msg.heading_deg if hasattr(ahrs_msg, "heading_deg")
+                                               else MONITOR_DEFAULT_VALUE)
+                    window["ahrs_zupt"].update(ZUPT_NAMES.get(ahrs_msg.zupt_flag, str(ahrs_msg.zupt_flag))
+                                               if hasattr(ahrs_msg, "zupt_flag") else MONITOR_DEFAULT_VALUE)
+
+            # plots keep every message so they have the history when their tab opens, but only draw while it shows
+            monitor_plots.add(b'IMU', imu_records)
+            monitor_plots.add(b'INS', ins_records)
+            if active_tab == "plot-tab":
+                monitor_plots.draw()
+
+            # latency of every message read this refresh, up to the window updates. tk draws them in the next window.read
+            if self.latency_stats:
+                display_ns = time.perf_counter_ns()
+                for records in [ins_records, gps_records, gp2_records, imu_records, hdg_records, ahrs_records]:
+                    self.latency_stats.record_display(records, refresh_ns, display_ns)
 
     # tell them to get bootloader exe and hex, give upgrade instructions. Will not do this automatically yet.
     # prompt to activate boot loader mode
@@ -1855,7 +1912,7 @@ class UserProgram:
             self.con_succeed.value = 0
 
     def plot(self):
-        show_and_pause("Not implemented yet")
+        self.monitor(start_tab="plot-tab")
 
     # retry command on error responses (APERR type)
     # retry only on error codes from connection issues: no start, incomplete, checksum fail
@@ -1923,15 +1980,6 @@ def version_greater_or_equal(our_ver, compareto):
     return True #equal
 
 
-# try parsing a message by multiple parsers, return result of whichever worked (valid)
-def try_multiple_parsers(parser_list, raw_data):
-    for parser in parser_list:
-        message = parser.parse_message(raw_data)
-        #print(f"\n{type(parser)} parses: {message}")
-        if message.valid:
-            return message
-    return None #fail, no parsers worked
-
 
 # pause on messages if it will refresh after
 def show_and_pause(text): #UserProgram
@@ -2129,18 +2177,20 @@ def runUserProg(exitflag, con_on, con_start, con_stop, con_succeed,
                 log_on, log_start, log_stop, log_name,
                 ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                 ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+                ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
                 last_imu_time,
-                serial_number
+                serial_number,
+                latency_stats=None, io_stats=None
     ):
     prog = UserProgram(exitflag, con_on, con_start, con_stop, con_succeed,
                        con_type, com_port, data_port_baud, control_port_baud, udp_ip, udp_port, gps_received,
                        log_on, log_start, log_stop, log_name,
                        ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                        ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                       last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+                       ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
                        last_imu_time,
-                       serial_number
+                       serial_number,
+                       latency_stats, io_stats
     )
     prog.mainloop()
 
@@ -2150,10 +2200,11 @@ if __name__ == "__main__":
     string_size = 500 # make Arrays big unless I find out how to resize
     #shared vars
 
-    exitflag = Value('b', 0)
-    con_on = Value('b', 0)
-    con_start = Value('b', 0)
-    con_stop = Value('b', 0)
+    control_wakeup = ControlWakeup()  # commands below wake io_loop through this
+    exitflag = ControlFlag(control_wakeup)
+    con_on = ControlFlag(control_wakeup)  # user sets it after con_start succeeds: wake io_loop to register the port
+    con_start = ControlFlag(control_wakeup)
+    con_stop = ControlFlag(control_wakeup)
     con_succeed = Value('b', 0)
     con_type = Array('c', string_size) #com/udp
     com_port = Array('c', string_size)#str
@@ -2166,40 +2217,46 @@ if __name__ == "__main__":
     # or group into arrays by type: all single flags, all ints, etc
 
     log_on = Value('b', 0) # for current status
-    log_start = Value('b', 0) # start signal
-    log_stop = Value('b', 0) # stop signal
+    log_start = ControlFlag(control_wakeup) # start signal
+    log_stop = ControlFlag(control_wakeup) # stop signal
     log_name = Array('c', string_size) #Array('c', b'')
 
     ntrip_on = Value('b',0)
-    ntrip_start = Value('b', 0)
-    ntrip_stop = Value('b', 0)
+    ntrip_start = ControlFlag(control_wakeup)
+    ntrip_stop = ControlFlag(control_wakeup)
     ntrip_succeed = Value('b', 0)
     ntrip_ip = Array('c', string_size)
     ntrip_port = Value('i', 0)
     ntrip_gga = Value('b', 0)
     ntrip_req = Array('c', string_size)  # b'') #probably biggest string - allocate more?
 
-    #shared vars for monitor
-    last_ins_msg = Array('c', string_size)
-    last_gps_msg = Array('c', string_size)
-    last_gp2_msg = Array('c', string_size)
-    last_imu_msg = Array('c', string_size)
-    last_hdg_msg = Array('c', string_size)
-    last_ahrs_msg = Array('c', string_size)
+    #shared ring buffers of decoded messages for monitor
+    monitor_rings = create_monitor_rings()
+    ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring = monitor_rings
 
     last_imu_time = Value('d', 0)
 
     serial_number = Array('c', string_size)
 
+    #latency histograms filled by io_loop and the monitor
+    latency_stats = LatencyStats() if LATENCY_STATS else None
+    #message and drop counters from io_loop, also read by io_stats_cli.py
+    io_stats = IOStats()
+
     shared_args = (exitflag, con_on, con_start, con_stop, con_succeed,
                    con_type, com_port, data_port_baud, control_port_baud, udp_ip, udp_port, gps_received,
                    log_on, log_start, log_stop, log_name,
                    ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed, ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                   last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg, last_imu_time,
-                   serial_number,               
+                   ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring, last_imu_time,
+                   serial_number, latency_stats, io_stats,
     )
     io_process = Process(target=io_loop, args=shared_args)
     io_process.start()
     runUserProg(*shared_args) # must do this in main thread so it can take inputs
     io_process.join()
-
+    release_monitor_rings(monitor_rings)
+    if latency_stats:
+        latency_stats.close()
+        latency_stats.unlink()
+    io_stats.close()
+    io_stats.unlink()
@@ -247,7 +247,7 @@ def runUserProg(exitflag, con_on, con_start, con_stop, con_succeed,
                 log_on, log_start, log_stop, log_name,
                 ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                 ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+                ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
                 last_imu_time,
                 serial_number
                 ):
@@ -256,7 +256,7 @@ def runUserProg(exitflag, con_on, con_start, con_stop, con_succeed,
                        log_on, log_start, log_stop, log_name,
                        ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                        ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                       last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+                       ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
                        last_imu_time,
                        serial_number
                        )
@@ -268,10 +268,11 @@ if __name__ == "__main__":
     string_size = 500 # make Arrays big unless I find out how to resize
     #shared vars
 
-    exitflag = Value('b', 0)
-    con_on = Value('b', 0)
-    con_start = Value('b', 0)
-    con_stop = Value('b', 0)
+    control_wakeup = ControlWakeup()  # commands below wake io_loop through this
+    exitflag = ControlFlag(control_wakeup)
+    con_on = ControlFlag(control_wakeup)  # user sets it after con_start succeeds: wake io_loop to register the port
+    con_start = ControlFlag(control_wakeup)
+    con_stop = ControlFlag(control_wakeup)
     con_succeed = Value('b', 0)
     con_type = Array('c', string_size) #com/udp
     com_port = Array('c', string_size)#str
@@ -284,26 +285,22 @@ if __name__ == "__main__":
     # or group into arrays by type: all single flags, all ints, etc
 
     log_on = Value('b', 0) # for current status
-    log_start = Value('b', 0) # start signal
-    log_stop = Value('b', 0) # stop signal
+    log_start = ControlFlag(control_wakeup) # start signal
+    log_stop = ControlFlag(control_wakeup) # stop signal
     log_name = Array('c', string_size) #Array('c', b'')
 
     ntrip_on = Value('b',0)
-    ntrip_start = Value('b', 0)
-    ntrip_stop = Value('b', 0)
+    ntrip_start = ControlFlag(control_wakeup)
+    ntrip_stop = ControlFlag(control_wakeup)
     ntrip_succeed = Value('b', 0)
     ntrip_ip = Array('c', string_size)
     ntrip_port = Value('i', 0)
     ntrip_gga = Value('b', 0)
     ntrip_req = Array('c', string_size)  # b'') #probably biggest string - allocate more?
 
-    #shared vars for monitor
-    last_ins_msg = Array('c', string_size)
-    last_gps_msg = Array('c', string_size)
-    last_gp2_msg = Array('c', string_size)
-    last_imu_msg = Array('c', string_size)
-    last_hdg_msg = Array('c', string_size)
-    last_ahrs_msg = Array('c', string_size)
+    #shared ring buffers of decoded messages for monitor
+    monitor_rings = create_monitor_rings()
+    ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring = monitor_rings
 
     last_imu_time = Value('d', 0)
 
@@ -313,11 +310,11 @@ if __name__ == "__main__":
                    con_type, com_port, data_port_baud, control_port_baud, udp_ip, udp_port, gps_received,
                    log_on, log_start, log_stop, log_name,
                    ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed, ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                   last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg, last_imu_time,
+                   ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring, last_imu_time,
                    serial_number,               
                    )
     io_process = Process(target=io_loop, args=shared_args)
     io_process.start()
     runUserProg(*shared_args) # must do this in main thread so it can take inputs
     io_process.join()
-
+    release_monitor_rings(monitor_rings)
@@ -41,6 +41,7 @@ with open(os.devnull, "w") as f, redirect_stdout(f):
         import PySimpleGUI as sg
         from board_tools.convertLog_x3 import export_logs_detect_format
         from board_tools.file_picking import pick_one_file, pick_multiple_files
+        from board_tools.monitor_plots import MonitorPlots
         LOGO_PATH = os.path.join(BOARD_TOOLS_DIR, "anello_scaled.png")
         ON_BUTTON_PATH = os.path.join(BOARD_TOOLS_DIR, ON_BUTTON_FILE)
         OFF_BUTTON_PATH = os.path.join(BOARD_TOOLS_DIR, OFF_BUTTON_FILE)
@@ -57,7 +58,7 @@ class UserProgram:
                  log_on, log_start, log_stop, log_name,
                  ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                  ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                 last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg,
+                 ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring,
                  last_imu_time,
                  shared_serial_number
                  ):
@@ -78,7 +79,7 @@ class UserProgram:
         self.log_on, self.log_start, self.log_stop, self.log_name = log_on, log_start, log_stop, log_name
         self.ntrip_on, self.ntrip_start, self.ntrip_stop, self.ntrip_succeed = ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed
         self.ntrip_ip, self.ntrip_port, self.ntrip_gga, self.ntrip_req = ntrip_ip, ntrip_port, ntrip_gga, ntrip_req
-        self.last_ins_msg, self.last_gps_msg, self.last_gp2_msg, self.last_imu_msg, self.last_hdg_msg = last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg
+        self.ins_ring, self.gps_ring, self.gp2_ring, self.imu_ring, self.hdg_ring = ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring
         self.last_imu_time = last_imu_time
 
         #any features which might or not be there - do based on firmware version?
@@ -97,6 +98,7 @@ class UserProgram:
                     if not USE_GRAPHICS:
                         menu_options.remove("Monitor")
                         menu_options.remove("Firmware Update")
+                        menu_options.remove("Plot")
 
                 else:
                     # not connected: reduced options
@@ -509,7 +511,8 @@ class UserProgram:
         self.log_on.value = 0
         self.log_stop.value = 1 #send stop signal to other thread which will close the log
 
-    def monitor(self):
+    # start_tab: key of the tab to show first, eg "plot-tab"
+    def monitor(self, start_tab=None):
 
         if not USE_GRAPHICS:
             show_and_pause("\nno monitor when USE_GRAPHICS flag is false")
@@ -528,7 +531,7 @@ class UserProgram:
         # prevent prints in monitor, like PySimpleGUI prints on mac
         # this didn't stop geotiler prints when no internet -> do in geotiler_demo too?
         with open(os.devnull, "w") as f, redirect_stdout(f):
-            self.monitor_main()
+            self.monitor_main(start_tab)
 
     # prompt if ok to stop logging. needed for single port if we want to do config messaging.
     def check_stop_data_mode(self):
@@ -551,12 +554,7 @@ class UserProgram:
             self.stop_data_mode()
             return True
 
-    def monitor_main(self):
-        ascii_scheme = ReadableScheme()
-        #binary_scheme = RTCM_Scheme() #ByteScheme()
-        binary_scheme = Binary_Scheme()
-        rtcm_scheme = RTCM_Scheme()
-
+    def monitor_main(self, start_tab=None):
         sg.theme(SGTHEME)
 
         # label_font = LABEL_FONT
@@ -633,7 +631,12 @@ class UserProgram:
         imu_tab_layout = [[sg.vtop(imu_col1), sg.Push(), sg.vtop(imu_col2)]]
         imu_tab = sg.Tab(MONITOR_IMU_TAB_TITLE, imu_tab_layout, key="imu-tab")
 
-        tab_group = sg.TabGroup([[imu_tab]])
+        # ________________ Rolling plots of IMU data _______________________
+
+        monitor_plots = MonitorPlots(PLOT_GROUPS_X3)
+        plot_tab = monitor_plots.tab(MONITOR_PLOT_TAB_TITLE, "plot-tab")
+
+        tab_group = sg.TabGroup([[imu_tab, plot_tab]])
         try_set_expand(tab_group)
 
         #group elements by size for resizing  - can this be assembled from ins_fields, imu_fields etc?
@@ -655,7 +658,6 @@ class UserProgram:
         debug_print("BASE_WIDTH: "+str(base_width))
         debug_print("BASE_HEIGHT:" +str(base_height))
 
-        last_last_imu = b''
         last_imu_time = time.time()
         #last_odo_speed = None
         last_odo_time = last_imu_time
@@ -665,6 +667,12 @@ class UserProgram:
                       fog_x_value, fog_y_value, fog_z_value, mag_x_value, mag_y_value, mag_z_value,
                       temp_value, imu_time_value, imu_sync_value]
 
+        #start from new messages, not ones from before the monitor opened
+        for ring in [self.imu_ring]:
+            ring.skip_to_latest()
+        if start_tab:
+            window[start_tab].select()
+
         # update loop: check for new messages or button clicks, then update the displayed data
         while True:
 
@@ -704,57 +712,58 @@ class UserProgram:
                     fontname, fontsize, fontstyle = LABEL_FONT
                     item.font = (fontname, int(fontsize * scale), fontstyle)
 
-            if hasattr(self.last_imu_msg, "raw"):
-                #print(f"has last_imu_msg: {self.last_imu_msg.raw}")
-                #update for new imu message
-                elapsed = time.time() - last_imu_time
-                #TODO - can update any "time since imu" indicator here
-                #if self.last_imu_msg.value == last_last_imu:
-                if self.last_imu_msg.raw == last_last_imu:
-                    # did not change - no update. but if it's been too long, zero the fields
-                    # time_since_ins.update(str(elapsed))
-                    # window.refresh()
-                    if (elapsed > ZERO_OUT_TIME) and active_tab == "imu-tab":  # zero out the numbers tab
-                        for field in imu_fields:
-                            field.update(MONITOR_DEFAULT_VALUE)
-                else:  # changed - update the last_ins and counter, then update display from the new values
-                    # last_last_imu = self.last_imu_msg.value
-                    last_last_imu = self.last_imu_msg.raw
-                    last_imu_time = time.time()
-                    imu_msg = try_multiple_parsers([binary_scheme, ascii_scheme, rtcm_scheme], self.last_imu_msg.raw)
-                    if active_tab == 'imu-tab':
-                        #print(f"\nimu_msg: {imu_msg}")
-                        #update the imu fields from the message
-                        window["ax_value"].update('%.4f'%imu_msg.accel_x_g if hasattr(imu_msg, "accel_x_g")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["ay_value"].update('%.4f' % imu_msg.accel_y_g if hasattr(imu_msg, "accel_y_g")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["az_value"].update('%.4f' % imu_msg.accel_z_g if hasattr(imu_msg, "accel_z_g")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["wx_value"].update('%.4f' % imu_msg.angrate_x_dps if hasattr(imu_msg, "angrate_x_dps")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["wy_value"].update('%.4f' % imu_msg.angrate_y_dps if hasattr(imu_msg, "angrate_y_dps")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["wz_value"].update('%.4f' % imu_msg.angrate_z_dps if hasattr(imu_msg, "angrate_z_dps")
-                                                  else MONITOR_DEFAULT_VALUE)
-                        window["fog_x_value"].update('%.4f' % imu_msg.fog_angrate_x_dps
-                                                   if hasattr(imu_msg, "fog_angrate_x_dps") else MONITOR_DEFAULT_VALUE)
-                        window["fog_y_value"].update('%.4f' % imu_msg.fog_angrate_y_dps
-                                                   if hasattr(imu_msg, "fog_angrate_y_dps") else MONITOR_DEFAULT_VALUE)
-                        window["fog_z_value"].update('%.4f' % imu_msg.fog_angrate_z_dps
-                                                   if hasattr(imu_msg, "fog_angrate_z_dps") else MONITOR_DEFAULT_VALUE)
-                        window["mag_x_value"].update('%.4f' % imu_msg.mag_x
-                                                   if hasattr(imu_msg, "mag_x") else MONITOR_DEFAULT_VALUE)
-                        window["mag_y_value"].update('%.4f' % imu_msg.mag_y
-                                                   if hasattr(imu_msg, "mag_y") else MONITOR_DEFAULT_VALUE)
-                        window["mag_z_value"].update('%.4f' % imu_msg.mag_z
-                                                   if hasattr(imu_msg, "mag_z") else MONITOR_DEFAULT_VALUE)
-                        window["temp_value"].update('%.2f' % imu_msg.temperature_c
-                                                   if hasattr(imu_msg, "temperature_c") else MONITOR_DEFAULT_VALUE)
-                        window["imu_cpu_time"].update('%.2f' % imu_msg.imu_time_ms
-                                                    if hasattr(imu_msg, "imu_time_ms") else MONITOR_DEFAULT_VALUE)
-                        window["imu_sync_time"].update('%.2f' % imu_msg.sync_time_ms
-                                                    if hasattr(imu_msg, "sync_time_ms") else MONITOR_DEFAULT_VALUE)
+            imu_records = self.imu_ring.read_new() #every IMU message since the last refresh, already decoded by io_loop
+            #update for new imu message
+            elapsed = time.time() - last_imu_time
+            #TODO - can update any "time since imu" indicator here
+            if not imu_records:
+                # did not change - no update. but if it's been too long, zero the fields
+                # time_since_ins.update(str(elapsed))
+                # window.refresh()
+                if (elapsed > ZERO_OUT_TIME) and active_tab == "imu-tab":  # zero out the numbers tab
+                    for field in imu_fields:
+                        field.update(MONITOR_DEFAULT_VALUE)
+            else:  # changed - update the last_ins and counter, then update display from the new values
+                last_imu_time = time.time()
+                imu_msg = imu_records[-1]
+                if active_tab == 'imu-tab':
+                    #print(f"\nimu_msg: {imu_msg}")
+                    #update the imu fields from the message
+                    window["ax_value"].update('%.4f'%imu_msg.accel_x_g if hasattr(imu_msg, "accel_x_g")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["ay_value"].update('%.4f' % imu_msg.accel_y_g if hasattr(imu_msg, "accel_y_g")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["az_value"].update('%.4f' % imu_msg.accel_z_g if hasattr(imu_msg, "accel_z_g")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["wx_value"].update('%.4f' % imu_msg.angrate_x_dps if hasattr(imu_msg, "angrate_x_dps")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["wy_value"].update('%.4f' % imu_msg.angrate_y_dps if hasattr(imu_msg, "angrate_y_dps")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["wz_value"].update('%.4f' % imu_msg.angrate_z_dps if hasattr(imu_msg, "angrate_z_dps")
+                                              else MONITOR_DEFAULT_VALUE)
+                    window["fog_x_value"].update('%.4f' % imu_msg.fog_angrate_x_dps
+                                               if hasattr(imu_msg, "fog_angrate_x_dps") else MONITOR_DEFAULT_VALUE)
+                    window["fog_y_value"].update('%.4f' % imu_msg.fog_angrate_y_dps
+                                               if hasattr(imu_msg, "fog_angrate_y_dps") else MONITOR_DEFAULT_VALUE)
+                    window["fog_z_value"].update('%.4f' % imu_msg.fog_angrate_z_dps
+                                               if hasattr(imu_msg, "fog_angrate_z_dps") else MONITOR_DEFAULT_VALUE)
+                    window["mag_x_value"].update('%.4f' % imu_msg.mag_x
+                                               if hasattr(imu_msg, "mag_x") else MONITOR_DEFAULT_VALUE)
+                    window["mag_y_value"].update('%.4f' % imu_msg.mag_y
+                                               if hasattr(imu_msg, "mag_y") else MONITOR_DEFAULT_VALUE)
+                    window["mag_z_value"].update('%.4f' % imu_msg.mag_z
+                                               if hasattr(imu_msg, "mag_z") else MONITOR_DEFAULT_VALUE)
+                    window["temp_value"].update('%.2f' % imu_msg.temperature_c
+                                               if hasattr(imu_msg, "temperature_c") else MONITOR_DEFAULT_VALUE)
+                    window["imu_cpu_time"].update('%.2f' % imu_msg.imu_time_ms
+                                                if hasattr(imu_msg, "imu_time_ms") else MONITOR_DEFAULT_VALUE)
+                    window["imu_sync_time"].update('%.2f' % imu_msg.sync_time_ms
+                                                if hasattr(imu_msg, "sync_time_ms") else MONITOR_DEFAULT_VALUE)
+
+            # plots keep every message so they have the history when their tab opens, but only draw while it shows
+            monitor_plots.add(b'IMU', imu_records)
+            if active_tab == "plot-tab":
+                monitor_plots.draw()
 
     # tell them to get bootloader exe and hex, give upgrade instructions. Will not do this automatically yet.
     # prompt to activate boot loader mode
@@ -839,7 +848,7 @@ class UserProgram:
         self.con_succeed.value = 0
 
     def plot(self):
-        show_and_pause("Not implemented yet")
+        self.monitor(start_tab="plot-tab")
 
     # retry command on error responses (APERR type)
     # retry only on error codes from connection issues: no start, incomplete, checksum fail
@@ -904,15 +913,6 @@ def version_greater_or_equal(our_ver, compareto):
             return False
     return True #equal
 
-#try parsing a message by multiple parsers, return result of whichever worked (valid)
-def try_multiple_parsers(parser_list, raw_data):
-    for parser in parser_list:
-        message = parser.parse_message(raw_data)
-        #print(f"\n{type(parser)} parses: {message}")
-        if message.valid:
-            return message
-    return None #fail, no parsers worked
-
 
 # pause on messages if it will refresh after
 def show_and_pause(text): #UserProgram
@@ -985,7 +985,7 @@ def runUserProg(exitflag, con_on, con_start, con_stop, con_succeed,
                 log_on, log_start, log_stop, log_name,
                 ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                 ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg, last_ahrs_msg,
+                ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring,
                 last_imu_time,
                 serial_number
     ):
@@ -994,7 +994,7 @@ def runUserProg(exitflag, con_on, con_start, con_stop, con_succeed,
                        log_on, log_start, log_stop, log_name,
                        ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed,
                        ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                       last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg,  # ignore AHRS for x3
+                       ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring,  # ignore AHRS for x3
                        last_imu_time,
                        serial_number
     )
@@ -1006,10 +1006,11 @@ if __name__ == "__main__":
     string_size = 500 # make Arrays big unless I find out how to resize
     #shared vars
 
-    exitflag = Value('b', 0)
-    con_on = Value('b', 0)
-    con_start = Value('b', 0)
-    con_stop = Value('b', 0)
+    control_wakeup = ControlWakeup()  # commands below wake io_loop through this
+    exitflag = ControlFlag(control_wakeup)
+    con_on = ControlFlag(control_wakeup)  # user sets it after con_start succeeds: wake io_loop to register the port
+    con_start = ControlFlag(control_wakeup)
+    con_stop = ControlFlag(control_wakeup)
     con_succeed = Value('b', 0)
     con_type = Array('c', string_size) #com/udp
     com_port = Array('c', string_size)#str
@@ -1022,26 +1023,22 @@ if __name__ == "__main__":
     # or group into arrays by type: all single flags, all ints, etc
 
     log_on = Value('b', 0) # for current status
-    log_start = Value('b', 0) # start signal
-    log_stop = Value('b', 0) # stop signal
+    log_start = ControlFlag(control_wakeup) # start signal
+    log_stop = ControlFlag(control_wakeup) # stop signal
     log_name = Array('c', string_size) #Array('c', b'')
 
     ntrip_on = Value('b',0)
-    ntrip_start = Value('b', 0)
-    ntrip_stop = Value('b', 0)
+    ntrip_start = ControlFlag(control_wakeup)
+    ntrip_stop = ControlFlag(control_wakeup)
     ntrip_succeed = Value('b', 0)
     ntrip_ip = Array('c', string_size)
     ntrip_port = Value('i', 0)
     ntrip_gga = Value('b', 0)
     ntrip_req = Array('c', string_size)  # b'') #probably biggest string - allocate more?
 
-    #shared vars for monitor
-    last_ins_msg = Array('c', string_size)
-    last_gps_msg = Array('c', string_size)
-    last_gp2_msg = Array('c', string_size)
-    last_imu_msg = Array('c', string_size)
-    last_hdg_msg = Array('c', string_size)
-    last_ahrs_msg = Array('c', string_size)
+    #shared ring buffers of decoded messages for monitor
+    monitor_rings = create_monitor_rings()
+    ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring = monitor_rings
 
     last_imu_time = Value('d', 0)
 
@@ -1051,11 +1048,11 @@ if __name__ == "__main__":
                    con_type, com_port, data_port_baud, control_port_baud, udp_ip, udp_port, gps_received,
                    log_on, log_start, log_stop, log_name,
                    ntrip_on, ntrip_start, ntrip_stop, ntrip_succeed, ntrip_ip, ntrip_port, ntrip_gga, ntrip_req,
-                   last_ins_msg, last_gps_msg, last_gp2_msg, last_imu_msg, last_hdg_msg,last_ahrs_msg, last_imu_time,
+                   ins_ring, gps_ring, gp2_ring, imu_ring, hdg_ring, ahrs_ring, last_imu_time,
                    serial_number,               
     )
     io_process = Process(target=io_loop, args=shared_args)
     io_process.start()
     runUserProg(*shared_args) # must do this in main thread so it can take inputs
     io_process.join()
-
+    release_monitor_rings(monitor_rings)